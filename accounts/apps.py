@@ -8,3 +8,6 @@ class AccountsConfig(AppConfig):
 
     def ready(self):
         import accounts.signals
+        from kilimo_guru.images import image_derivatives
+        from .models import User
+        image_derivatives.register(User, 'profile_picture')
@@ -103,6 +103,7 @@ class User(AbstractUser):
         null=True,
         verbose_name=_('Profile Picture')
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_verified = models.BooleanField(
         default=False,
         verbose_name=_('Is Verified')
@@ -5,3 +5,14 @@ class AdvisoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'advisory'
     verbose_name = 'Advisory & E-Learning'
+
+    def ready(self):
+        from kilimo_guru.cache import catalog_cache
+        from kilimo_guru.counters import counter_buffer
+        from kilimo_guru.images import image_derivatives
+        from .models import AdvisoryArticle, AdvisoryCategory, FAQ, TeleVetConsultation
+        catalog_cache.register(AdvisoryCategory)
+        counter_buffer.register(AdvisoryArticle, 'view_count', 'like_count')
+        counter_buffer.register(FAQ, 'view_count')
+        image_derivatives.register(AdvisoryArticle, 'featured_image')
+        image_derivatives.register(TeleVetConsultation, 'image_1', 'image_2', 'image_3')
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advisory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advisoryarticle',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='televetconsultation',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -46,6 +46,7 @@ class AdvisoryArticle(models.Model):
     
     # Media
     featured_image = models.ImageField(upload_to='advisory/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     video_url = models.URLField(blank=True, null=True)
     
     # Language
@@ -301,6 +302,7 @@ class TeleVetConsultation(models.Model):
     image_1 = models.ImageField(upload_to='vet_consultations/', blank=True, null=True)
     image_2 = models.ImageField(upload_to='vet_consultations/', blank=True, null=True)
     image_3 = models.ImageField(upload_to='vet_consultations/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -8,6 +8,7 @@ urlpatterns = [
     path('', views.AdvisoryHomeView.as_view(), name='home'),
     path('articles/', views.ArticleListView.as_view(), name='article_list'),
     path('articles/<slug:slug>/', views.ArticleDetailView.as_view(), name='article_detail'),
+    path('articles/<slug:slug>/like/', views.ArticleLikeView.as_view(), name='article_like'),
     
     # Webinars
     path('webinars/', views.WebinarListView.as_view(), name='webinar_list'),
@@ -24,6 +25,7 @@ urlpatterns = [
     
     # FAQ
     path('faq/', views.FAQListView.as_view(), name='faq'),
+    path('faq/<int:pk>/viewed/', views.FAQViewedView.as_view(), name='faq_viewed'),
     
     # Tips
     path('tips/', views.TipsView.as_view(), name='tips'),
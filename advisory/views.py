@@ -1,3 +1,4 @@
+from django.http import HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import (
     View, ListView, DetailView, CreateView, UpdateView, TemplateView
@@ -6,6 +7,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.utils import timezone
 
+from kilimo_guru.cache import catalog_cache
+from kilimo_guru.counters import counter_buffer
 from .models import (
     AdvisoryCategory, AdvisoryArticle, Webinar,
     ExpertConsultation, FAQ, FarmingTip, TeleVetConsultation
@@ -85,7 +88,11 @@ class ArticleListView(ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = AdvisoryCategory.objects.all()
+        context['categories'] = catalog_cache.get_or_load(
+            'advisory:categories',
+            lambda: list(AdvisoryCategory.objects.all()),
+            models=[AdvisoryCategory],
+        )
         context['languages'] = AdvisoryArticle.LANGUAGE_CHOICES
         return context
 
@@ -103,9 +110,9 @@ class ArticleDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Increment view count
-        self.object.view_count += 1
-        self.object.save(update_fields=['view_count'])
+        # Increment view count (written by the next counter flush)
+        counter_buffer.increment(self.object, 'view_count')
+        self.object.view_count += counter_buffer.pending_count(self.object, 'view_count')
         
         # Related articles
         context['related_articles'] = AdvisoryArticle.objects.filter(
@@ -116,6 +123,15 @@ class ArticleDetailView(DetailView):
         return context
 
 
+class ArticleLikeView(LoginRequiredMixin, View):
+    """Like an article"""
+    
+    def post(self, request, slug):
+        article = get_object_or_404(AdvisoryArticle, slug=slug, is_published=True)
+        counter_buffer.increment(article, 'like_count')
+        return redirect('advisory:article_detail', slug=slug)
+
+
 class WebinarListView(ListView):
     """List webinars"""
     model = Webinar
@@ -228,6 +244,15 @@ class FAQListView(ListView):
         return context
 
 
+class FAQViewedView(View):
+    """Count an FAQ answer being opened"""
+    
+    def post(self, request, pk):
+        faq = get_object_or_404(FAQ, pk=pk, is_published=True)
+        counter_buffer.increment(faq, 'view_count')
+        return HttpResponse(status=204)
+
+
 class TipsView(ListView):
     """Farming tips"""
     model = FarmingTip
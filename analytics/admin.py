@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import FarmerAnalytics, MarketTrend, SystemMetric
+from .models import FarmerAnalytics, CropYearRollup, MarketTrend, SystemMetric
 
 
 @admin.register(FarmerAnalytics)
@@ -11,6 +11,16 @@ class FarmerAnalyticsAdmin(admin.ModelAdmin):
     search_fields = ['farmer__username']
 
 
+@admin.register(CropYearRollup)
+class CropYearRollupAdmin(admin.ModelAdmin):
+    list_display = [
+        'crop_name', 'year', 'farmer_profile', 'total_yield',
+        'total_revenue', 'total_cost', 'last_updated'
+    ]
+    list_filter = ['year']
+    search_fields = ['crop_name', 'farmer_profile__user__username']
+
+
 @admin.register(MarketTrend)
 class MarketTrendAdmin(admin.ModelAdmin):
     list_display = [
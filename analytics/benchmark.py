@@ -0,0 +1,443 @@
+"""
+Query-count and latency benchmark of every named URL.
+
+The benchmark_views command seeds a synthetic dataset (analytics/synthetic.py)
+into a throwaway test database, adds a benchmark farmer and buyer owning one
+of everything the URLs take as arguments, then requests each named URL of
+the project with the test client, logged in as the user in URL_USERS
+(the farmer by default). The cache is cleared before every request, so each
+one pays for its cold path; per URL it records the status, the query count,
+the time spent in the database and the wall-clock time (medians over the
+repeats) and the response size.
+
+Many templates are missing from the tree. Pages are rendered with
+benchmark_templates(), whose last loader stands in a stub for any template
+not found; the stub evaluates every queryset, page, model, form and
+container in its context, so the queries a real template would run over
+its context are still counted instead of the view failing on the lookup.
+Templates that fail to compile are stubbed the same way and reported.
+
+Results are compared against a stored JSON baseline: more queries than the
+baseline, or a wall-clock time beyond the allowed slack, is a regression.
+"""
+
+import copy
+import json
+import os
+import statistics
+import time
+from collections.abc import Mapping
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.db import connection
+from django.db.models import Model, QuerySet
+from django.forms import BaseForm, BaseFormSet
+from django.template import Library, Origin, Template, TemplateSyntaxError
+from django.template.loaders.base import Loader
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from accounts.models import UserDevice
+from advisory.models import FAQ, AdvisoryArticle, AdvisoryCategory, Webinar
+from crops.models import Crop, FarmerCrop, Livestock, PestDisease, PestDiseaseDetection
+from farmers.models import CreditHistory, FarmerProfile, FarmingHistory, FarmParcel
+from finance.models import InsuranceProduct, LoanApplication, LoanProduct
+from marketplace.models import BuyerInquiry, LivestockListing, ProduceListing, Transaction
+from marketplace.search import build_search_document
+from weather.county_alerts import sync_alert_counties
+from weather.models import ClimateAlert, WeatherData
+
+# Namespaces not served by the project's apps
+SKIPPED_NAMESPACES = {'admin'}
+# The scrape endpoint grows with every metric recorded earlier in the run
+SKIPPED_URLS = {'metrics'}
+
+# URLs requested as the buyer or anonymously; the rest as the farmer
+URL_USERS = {
+    'marketplace:buyer_dashboard': 'buyer',
+    'marketplace:request_create': 'buyer',
+    'marketplace:inquire': 'buyer',
+    'accounts:login': None,
+    'rest_framework:login': None,
+    'accounts:register_farmer': None,
+    'accounts:register_buyer': None,
+    'accounts:password_reset': None,
+    'accounts:password_reset_confirm': None,
+    'home': None,
+}
+
+# Arguments of each URL taking any, read from the benchmark fixtures
+URL_KWARGS = {
+    'accounts:remove_device': lambda f: {'pk': f['device'].pk},
+    'advisory:article_detail': lambda f: {'slug': f['article'].slug},
+    'advisory:article_like': lambda f: {'slug': f['article'].slug},
+    'advisory:webinar_detail': lambda f: {'pk': f['webinar'].pk},
+    'advisory:register_webinar': lambda f: {'pk': f['webinar'].pk},
+    'advisory:faq_viewed': lambda f: {'pk': f['faq'].pk},
+    'crops:crop_detail': lambda f: {'pk': f['crop'].pk},
+    'crops:update_crop': lambda f: {'pk': f['farmer_crop'].pk},
+    'crops:delete_crop': lambda f: {'pk': f['farmer_crop'].pk},
+    'crops:regional_calendar': lambda f: {'region': f['county']},
+    'crops:pest_disease_detail': lambda f: {'pk': f['pest'].pk},
+    'crops:livestock_detail': lambda f: {'pk': f['livestock'].pk},
+    'crops:edit_livestock': lambda f: {'pk': f['livestock'].pk},
+    'crops:delete_livestock': lambda f: {'pk': f['livestock'].pk},
+    'crops:add_production': lambda f: {'pk': f['livestock'].pk},
+    'farmers:parcel_detail': lambda f: {'pk': f['parcel'].pk},
+    'farmers:parcel_edit': lambda f: {'pk': f['parcel'].pk},
+    'farmers:parcel_delete': lambda f: {'pk': f['parcel'].pk},
+    'farmers:history_edit': lambda f: {'pk': f['history'].pk},
+    'finance:loan_detail': lambda f: {'pk': f['loan_product'].pk},
+    'finance:loan_repay': lambda f: {'pk': f['loan'].pk},
+    'finance:insurance_detail': lambda f: {'pk': f['insurance_product'].pk},
+    'marketplace:prices_by_market': lambda f: {'market': 'nairobi'},
+    'marketplace:produce_detail': lambda f: {'pk': f['listing'].pk},
+    'marketplace:produce_edit': lambda f: {'pk': f['listing'].pk},
+    'marketplace:produce_delete': lambda f: {'pk': f['listing'].pk},
+    'marketplace:inquire': lambda f: {'pk': f['listing'].pk},
+    'marketplace:livestock_detail': lambda f: {'pk': f['livestock_listing'].pk},
+    'marketplace:respond_inquiry': lambda f: {'pk': f['inquiry'].pk},
+    'marketplace:transaction_detail': lambda f: {'pk': f['transaction'].pk},
+    'weather:county_weather': lambda f: {'county': f['county']},
+    'weather:forecast': lambda f: {'county': f['county']},
+    'weather:alert_detail': lambda f: {'pk': f['alert'].pk},
+    'api:crop-detail': lambda f: {'pk': f['crop'].pk},
+    'api:producelisting-detail': lambda f: {'pk': f['listing'].pk},
+    'api:weatherdata-detail': lambda f: {'pk': f['weather'].pk},
+    'api:detection_status': lambda f: {'pk': f['detection'].pk},
+}
+
+# Query strings of URLs that answer 400 without one
+URL_QUERIES = {
+    'analytics:api_data': 'metric=yield_by_month',
+    'api:current_weather': 'county=Nakuru',
+    'api:detection_clusters': 'bbox=33.9,-4.7,41.9,5.0',
+    'api:sync': 'device=benchmark-device',
+    'weather:api_current': 'county=Nakuru',
+}
+
+
+def url_names(patterns=None, namespace=''):
+    """Qualified names of the project's named URL patterns"""
+    names = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            names |= url_names(pattern.url_patterns, prefix)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}{pattern.name}'
+            if name not in SKIPPED_URLS:
+                names.add(name)
+    return names
+
+
+def create_fixtures(county='Nakuru'):
+    """Benchmark farmer and buyer, and one object for each URL argument"""
+    User = get_user_model()
+    today = timezone.localdate()
+    now = timezone.now()
+    farmer = User.objects.create_user(
+        'benchmark-farmer', 'farmer@benchmark.invalid', None, user_type='farmer', county=county
+    )
+    buyer = User.objects.create_user(
+        'benchmark-buyer', 'buyer@benchmark.invalid', None, user_type='buyer', county=county
+    )
+    profile, _ = FarmerProfile.objects.get_or_create(user=farmer)
+
+    crop = Crop.objects.create(name='Maize', category='cereals')
+    parcel = FarmParcel.objects.create(
+        farmer_profile=profile, parcel_name='Benchmark shamba', size=Decimal('2.50')
+    )
+    history = None
+    for year in range(today.year - 4, today.year + 1):
+        for season in ['long_rains', 'short_rains']:
+            history = FarmingHistory.objects.create(
+                farmer_profile=profile, parcel=parcel, crop_name=crop.name, season=season,
+                year=year, actual_yield=Decimal('900'), total_cost=Decimal('20000'),
+                total_revenue=Decimal('31000'),
+            )
+    CreditHistory.objects.create(
+        farmer_profile=profile, loan_type='input', lender_name='Benchmark SACCO',
+        loan_amount=Decimal('10000'), amount_repaid=Decimal('2500'), application_date=today,
+        due_date=today + timedelta(days=180), status='active',
+    )
+    listing = ProduceListing(
+        farmer=farmer, product_name='Maize', category='cereals', quantity_available=10,
+        unit='bag_90kg', price_per_unit=Decimal('4200'), county=county,
+        pickup_location=f'{county} town', available_from=today,
+        available_until=today + timedelta(days=30),
+    )
+    listing.search_document = build_search_document(listing)
+    listing.save()
+    category = AdvisoryCategory.objects.create(name='Crop management', description='')
+    loan_product = LoanProduct.objects.create(
+        name='Input loan', loan_type='input', description='Seed and fertiliser.',
+        min_amount=1000, max_amount=100000, interest_rate=Decimal('12'),
+        min_duration_days=30, max_duration_days=365, provider_name='Benchmark SACCO',
+    )
+    # bulk_create so the alert is not dispatched to subscribers
+    alert = ClimateAlert.objects.bulk_create([ClimateAlert(
+        alert_type='heavy_rain', severity='moderate', title='Heavy rain expected',
+        description='Heavy rain expected over the weekend.', counties=[county],
+        effective_from=now, expires_at=now + timedelta(days=3),
+        recommended_actions='Clear drainage channels.',
+    )])[0]
+    sync_alert_counties(alert)
+
+    return {
+        'farmer': farmer,
+        'buyer': buyer,
+        'county': county,
+        'crop': crop,
+        'parcel': parcel,
+        'history': history,
+        'listing': listing,
+        'alert': alert,
+        'weather': WeatherData.objects.filter(county=county).order_by('-timestamp').first(),
+        'device': UserDevice.objects.create(
+            user=farmer, device_id='benchmark-device', device_type='android'
+        ),
+        'article': AdvisoryArticle.objects.create(
+            title='Top dressing maize', slug='top-dressing-maize', category=category,
+            summary='When and how to top dress.', content='Apply CAN six weeks after planting.',
+            author=farmer, is_published=True, published_at=now,
+        ),
+        'webinar': Webinar.objects.create(
+            title='Post-harvest handling', description='Storage and drying.', presenter=farmer,
+            scheduled_date=today + timedelta(days=7), start_time='10:00', end_time='11:00',
+            platform='zoom',
+        ),
+        'faq': FAQ.objects.create(question='When should I plant maize?', answer='At the onset of rains.'),
+        'farmer_crop': FarmerCrop.objects.create(
+            farmer=farmer, crop=crop, parcel=parcel, season='long_rains', year=today.year,
+            planting_date=today - timedelta(days=30), area_planted=Decimal('2'),
+        ),
+        'pest': PestDisease.objects.create(
+            name='Fall armyworm', pest_disease_type='pest', severity_level='high'
+        ),
+        'detection': PestDiseaseDetection.objects.create(farmer=farmer, image='detections/benchmark.jpg'),
+        'livestock': Livestock.objects.create(farmer=farmer, species='cattle', gender='female'),
+        'livestock_listing': LivestockListing.objects.create(
+            farmer=farmer, species='cattle', breed='Friesian', price_per_animal=Decimal('85000'),
+            county=county, pickup_location=f'{county} town',
+        ),
+        'inquiry': BuyerInquiry.objects.create(
+            listing=listing, buyer=buyer, quantity_requested=5, contact_phone='+254700000000'
+        ),
+        'transaction': Transaction.objects.create(
+            farmer=farmer, buyer=buyer, product_name='Maize', quantity=5, unit='bag_90kg',
+            price_per_unit=Decimal('4200'), total_amount=Decimal('21000'),
+        ),
+        'loan_product': loan_product,
+        'loan': LoanApplication.objects.create(
+            farmer=farmer, loan_product=loan_product, amount_requested=Decimal('20000'),
+            duration_days=180, purpose='Certified seed and fertiliser.', status='active',
+        ),
+        'insurance_product': InsuranceProduct.objects.create(
+            name='Crop cover', insurance_type='crop', description='Drought and flood.',
+            premium_rate=Decimal('5'), min_sum_insured=10000, max_sum_insured=500000,
+            provider_name='Benchmark Insurance',
+        ),
+    }
+
+
+# Template library of the stub, loaded as benchmark_stub
+register = Library()
+
+# Names of the templates rendered as stubs, for the report
+stubbed_templates = set()
+broken_templates = set()
+
+# How far the stub follows containers nested in the context
+STUB_DEPTH = 3
+
+
+def _evaluate(value, depth=0):
+    """Evaluate value as a template listing it would"""
+    if isinstance(value, (Model, BaseForm)):
+        # __str__ of models often follows relations; forms render their choices
+        str(value)
+    elif depth < STUB_DEPTH:
+        if isinstance(value, Mapping):
+            for item in list(value.values()):
+                _evaluate(item, depth + 1)
+        elif isinstance(value, (QuerySet, Page, BaseFormSet, list, tuple, set)):
+            for item in value:
+                _evaluate(item, depth + 1)
+
+
+@register.simple_tag(takes_context=True)
+def evaluate_context(context):
+    _evaluate(context.flatten())
+    return ''
+
+
+def _stub_source(template_name):
+    return f'{{% load benchmark_stub %}}{{% evaluate_context %}}<!-- stub for {template_name} -->'
+
+
+class StubTemplateLoader(Loader):
+    """Last loader of the benchmark engine: a stub evaluating its context for any template not found"""
+
+    def get_template_sources(self, template_name):
+        yield Origin(name=template_name, template_name=template_name, loader=self)
+
+    def get_contents(self, origin):
+        stubbed_templates.add(origin.template_name)
+        return _stub_source(origin.template_name)
+
+
+class BenchmarkLoader(CachedLoader):
+    """Cached loader that also stubs templates failing to compile (e.g. unknown filters)"""
+
+    def get_template(self, template_name, skip=None):
+        try:
+            return super().get_template(template_name, skip)
+        except TemplateSyntaxError:
+            broken_templates.add(template_name)
+            origin = Origin(name=template_name, template_name=template_name, loader=self)
+            template = Template(_stub_source(template_name), origin, template_name, self.engine)
+            self.get_template_cache[self.cache_key(template_name, skip)] = template
+            return template
+
+
+def benchmark_templates():
+    """TEMPLATES setting with StubTemplateLoader after the project's own loaders"""
+    templates = copy.deepcopy(settings.TEMPLATES)
+    for engine in templates:
+        if engine['BACKEND'] == 'django.template.backends.django.DjangoTemplates':
+            engine['APP_DIRS'] = False
+            engine['OPTIONS'].setdefault('libraries', {})['benchmark_stub'] = 'analytics.benchmark'
+            engine['OPTIONS']['loaders'] = [('analytics.benchmark.BenchmarkLoader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+                'analytics.benchmark.StubTemplateLoader',
+            ])]
+    return templates
+
+
+def benchmark_urls(fixtures, names=None):
+    """(name, user, path) of each URL to request; ValueError names URLs lacking sample arguments"""
+    missing = []
+    urls = []
+    for name in sorted(names or url_names()):
+        user = URL_USERS.get(name, 'farmer')
+        try:
+            kwargs = URL_KWARGS[name](fixtures) if name in URL_KWARGS else {}
+            path = reverse(name, kwargs=kwargs)
+        except NoReverseMatch:
+            missing.append(name)
+            continue
+        if name in URL_QUERIES:
+            path = f'{path}?{URL_QUERIES[name]}'
+        urls.append((name, user and fixtures[user], path))
+    if missing:
+        raise ValueError(f"No sample arguments for {', '.join(missing)}; add them to URL_KWARGS")
+    return urls
+
+
+class QueryTimer:
+    """Execute wrapper adding up the time spent in the database"""
+
+    def __init__(self):
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def measure(path, user=None, repeat=3):
+    """Status, queries, DB and wall-clock milliseconds (medians) and bytes of GET path"""
+    client = Client(raise_request_exception=False)
+    # One unmeasured request compiles templates and warms imports
+    client.get(path)
+    walls, db_times = [], []
+    for _ in range(repeat):
+        # Logged in afresh each time, as some URLs (logout) end the session
+        if user:
+            client.force_login(user)
+        cache.clear()
+        timer = QueryTimer()
+        with CaptureQueriesContext(connection) as queries, connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = client.get(path)
+            walls.append((time.perf_counter() - started) * 1000)
+        db_times.append(timer.seconds * 1000)
+    content = b'' if response.streaming else response.content
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'db_ms': round(statistics.median(db_times), 2),
+        'wall_ms': round(statistics.median(walls), 2),
+        'bytes': len(content),
+    }
+
+
+def run_benchmark(fixtures, names=None, repeat=3, log=None):
+    """Measure every URL; returns results by URL name"""
+    results = {}
+    for name, user, path in benchmark_urls(fixtures, names):
+        results[name] = {'path': path, **measure(path, user, repeat)}
+        if log:
+            log(name, results[name])
+    return results
+
+
+def _failed(name, status):
+    """Server errors, and a 404 where the URL was built to reach a fixture row"""
+    return status >= 500 or (status == 404 and (name in URL_KWARGS or name in URL_QUERIES))
+
+
+def compare(results, baseline, query_slack=0, time_slack=0.5, time_floor_ms=20):
+    """Regressions of results against a baseline, as messages.
+
+    A URL regresses when it fails (any 5xx, or a 404 although it was given
+    fixture arguments) whatever the baseline recorded, runs more than
+    query_slack extra queries, or takes more than time_slack (a fraction)
+    longer and at least time_floor_ms more, so noise on fast views is not
+    reported. Queries and time are not compared for failed responses, as a
+    view stopped by an error does a variable part of its work.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if _failed(name, result['status']):
+            regressions.append(f"{name}: status {result['status']}")
+            continue
+        base = baseline.get(name)
+        if base is None or _failed(name, base['status']):
+            continue
+        if result['queries'] > base['queries'] + query_slack:
+            regressions.append(f"{name}: {result['queries']} queries (baseline {base['queries']})")
+        slower = result['wall_ms'] - base['wall_ms']
+        if slower > base['wall_ms'] * time_slack and slower > time_floor_ms:
+            regressions.append(f"{name}: {result['wall_ms']:.0f} ms (baseline {base['wall_ms']:.0f} ms)")
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results, scale):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump({'scale': scale, 'urls': results}, handle, indent=1, sort_keys=True)
+        handle.write('\n')
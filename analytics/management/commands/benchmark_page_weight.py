@@ -0,0 +1,59 @@
+import re
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+IMG_SRC = re.compile(r'<img\b[^>]*?\bsrc="([^"]+)"')
+
+DEFAULT_PATHS = ['/marketplace/', '/crops/', '/advisory/']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the image bytes a page references with resized variants '
+        'switched off (originals) and on'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help=f"Pages to render (default: {' '.join(DEFAULT_PATHS)})")
+        parser.add_argument('--user', help='Username to render the pages as')
+
+    def image_bytes(self, client, path):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned {response.status_code}')
+        total = count = missing = 0
+        for url in IMG_SRC.findall(response.content.decode()):
+            url = unquote(urlsplit(url).path)
+            if not url.startswith(settings.MEDIA_URL):
+                continue
+            name = url[len(settings.MEDIA_URL):]
+            count += 1
+            if default_storage.exists(name):
+                total += default_storage.size(name)
+            else:
+                missing += 1
+        return total, count, missing
+
+    def handle(self, *args, **options):
+        client = Client()
+        if options['user']:
+            user = get_user_model().objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user {options['user']}")
+            client.force_login(user)
+
+        for path in options['paths'] or DEFAULT_PATHS:
+            with override_settings(IMAGE_VARIANTS_ENABLED=False):
+                before, count, missing = self.image_bytes(client, path)
+            after, _, _ = self.image_bytes(client, path)
+            saved = 1 - after / before if before else 0
+            self.stdout.write(
+                f'{path}: {count} media images ({missing} missing files), '
+                f'{before / 1024:.0f} KiB originals -> {after / 1024:.0f} KiB variants '
+                f'({saved:.0%} smaller)'
+            )
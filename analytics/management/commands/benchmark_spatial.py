@@ -0,0 +1,112 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kilimo_guru.spatial import GridIndex, haversine_km
+
+# Roughly the extent of Kenya
+LATITUDES = (-4.7, 5.0)
+LONGITUDES = (33.9, 41.9)
+
+
+def naive_nearest(points, latitude, longitude, count):
+    distances = sorted(
+        (haversine_km(latitude, longitude, point_lat, point_lon), key)
+        for key, point_lat, point_lon in points
+    )
+    return distances[:count]
+
+
+def naive_radius(points, latitude, longitude, radius_km):
+    return sorted(
+        (distance, key)
+        for key, point_lat, point_lon in points
+        if (distance := haversine_km(latitude, longitude, point_lat, point_lon)) <= radius_km
+    )
+
+
+def naive_bbox(points, min_lat, min_lon, max_lat, max_lon):
+    return [
+        point for point in points
+        if min_lat <= point[1] <= max_lat and min_lon <= point[2] <= max_lon
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the grid spatial index against naive scans on random points '
+        'and fail if any query result differs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--radius', type=float, default=25, help='Radius search distance in km')
+        parser.add_argument('--cell-size', type=float, default=0.1)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def timed(self, function, queries):
+        started = time.perf_counter()
+        results = [function(*query) for query in queries]
+        return results, (time.perf_counter() - started) * 1000 / len(queries)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        points = [
+            (key, rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES))
+            for key in range(options['points'])
+        ]
+
+        started = time.perf_counter()
+        index = GridIndex.from_points(points, cell_size=options['cell_size'])
+        self.stdout.write(
+            f"Indexed {index.size} points in {len(index.cells)} cells in "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+        locations = [
+            (rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES))
+            for _ in range(options['queries'])
+        ]
+        boxes = []
+        for latitude, longitude in locations:
+            height, width = rng.uniform(0.05, 1), rng.uniform(0.05, 1)
+            boxes.append((latitude, longitude, latitude + height, longitude + width))
+
+        radius = options['radius']
+        cases = [
+            ('nearest (5)',
+             lambda lat, lon: index.nearest(lat, lon, 5),
+             lambda lat, lon: naive_nearest(points, lat, lon, 5),
+             locations),
+            (f'radius ({radius:g} km)',
+             lambda lat, lon: index.within_radius(lat, lon, radius),
+             lambda lat, lon: naive_radius(points, lat, lon, radius),
+             locations),
+            ('bounding box',
+             lambda *box: sorted(index.within_bbox(*box)),
+             lambda *box: sorted(naive_bbox(points, *box)),
+             boxes),
+        ]
+
+        mismatches = []
+        for label, indexed, naive, queries in cases:
+            indexed_results, indexed_ms = self.timed(indexed, queries)
+            naive_results, naive_ms = self.timed(naive, queries)
+            matches = sum(
+                [key for *_, key in got] == [key for *_, key in expected]
+                if label != 'bounding box' else got == expected
+                for got, expected in zip(indexed_results, naive_results)
+            )
+            if matches != len(queries):
+                mismatches.append(label)
+            self.stdout.write(
+                f'{label:<20} grid {indexed_ms:8.3f} ms   naive {naive_ms:8.2f} ms   '
+                f'x{naive_ms / indexed_ms if indexed_ms else 0:7.0f}   '
+                f'{matches}/{len(queries)} identical'
+            )
+
+        if mismatches:
+            raise CommandError(f"Grid results differ from naive scans for: {', '.join(mismatches)}")
+        self.stdout.write(self.style.SUCCESS('Grid index results match naive scans'))
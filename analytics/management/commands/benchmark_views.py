@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+
+from analytics.benchmark import (
+    benchmark_templates, broken_templates, compare, create_fixtures, load_baseline, run_benchmark,
+    save_baseline, stubbed_templates, url_names,
+)
+from analytics.synthetic import generate_dataset
+from analytics.trends import compute_market_trends
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'baseline.json'
+
+# The benchmark clears the cache before every request; never the real one
+BENCHMARK_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic dataset into a test database, request every named URL '
+        'and fail if any runs more queries or is slower than the stored baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help='URL names to benchmark (default: all)')
+        parser.add_argument('--farmers', type=int, default=20000, help='Synthetic farmers to seed')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the dataset')
+        parser.add_argument('--repeat', type=int, default=3, help='Measured requests per URL')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file')
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Write the results as the new baseline instead of comparing'
+        )
+        parser.add_argument(
+            '--query-slack', type=int, default=0,
+            help='Extra queries over the baseline tolerated per URL'
+        )
+        parser.add_argument(
+            '--time-slack', type=float, default=0.5,
+            help='Fraction by which a URL may be slower than its baseline'
+        )
+        parser.add_argument(
+            '--time-floor', type=float, default=20,
+            help='Slowdowns under this many milliseconds are never regressions'
+        )
+
+    def log_result(self, name, result):
+        self.stdout.write(
+            f"{name:<40} {result['status']:>4} {result['queries']:>5} q "
+            f"{result['db_ms']:>8.1f} ms db {result['wall_ms']:>8.1f} ms "
+            f"{result['bytes'] / 1024:>7.1f} KiB"
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['urls']) - url_names()
+        if unknown:
+            raise CommandError(f"Unknown URL names: {', '.join(sorted(unknown))}")
+
+        scale = {'farmers': options['farmers'], 'buyers': max(options['farmers'] // 10, 1)}
+        baseline = load_baseline(options['baseline'])
+        if not options['update_baseline']:
+            if baseline is None:
+                raise CommandError(f"No baseline at {options['baseline']}; run with --update-baseline")
+            if baseline['scale'] != scale:
+                raise CommandError(
+                    f"Baseline was recorded at {baseline['scale']}, not {scale}; "
+                    f"rerun with --farmers {baseline['scale']['farmers']} or --update-baseline"
+                )
+
+        verbosity = options['verbosity']
+        setup_test_environment()
+        old_config = setup_databases(verbosity=verbosity, interactive=False)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES, TEMPLATES=benchmark_templates()):
+                counts = generate_dataset(
+                    seed=options['seed'], log=self.stdout.write if verbosity > 1 else None, **scale
+                )
+                compute_market_trends()
+                self.stdout.write(f"Seeded {sum(counts.values())} rows: {counts}")
+                fixtures = create_fixtures()
+                results = run_benchmark(
+                    fixtures, options['urls'], options['repeat'], self.log_result
+                )
+        except ValueError as exc:
+            raise CommandError(exc)
+        finally:
+            teardown_databases(old_config, verbosity=verbosity)
+            teardown_test_environment()
+
+        for names, kind in ((stubbed_templates, 'missing'), (broken_templates, 'failing to compile')):
+            if names:
+                self.stdout.write(
+                    f'Rendered {len(names)} templates {kind} as stubs'
+                    + (f": {', '.join(sorted(names))}" if verbosity > 1 else '')
+                )
+
+        if options['update_baseline']:
+            failures = compare(results, {})
+            if failures:
+                raise CommandError('Not recording failing URLs:\n' + '\n'.join(failures))
+            # A baseline at another scale is replaced, not merged into
+            kept = baseline['urls'] if baseline and baseline['scale'] == scale else {}
+            save_baseline(options['baseline'], {**kept, **results}, scale)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        new = sorted(set(results) - set(baseline['urls']))
+        if new:
+            self.stdout.write(f"Not in the baseline: {', '.join(new)}")
+
+        regressions = compare(
+            results, baseline['urls'], options['query_slack'],
+            options['time_slack'], options['time_floor'],
+        )
+        if regressions:
+            raise CommandError('Regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} URLs within the baseline'))
@@ -0,0 +1,28 @@
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from kilimo_guru.pwa import PRECACHE_MANIFEST, write_precache_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the service worker precache manifest from the collected static files '
+        '(collectstatic does this automatically)'
+    )
+
+    def handle(self, *args, **options):
+        manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+        if manifest_name and not staticfiles_storage.exists(manifest_name):
+            raise CommandError('No collected static files. Run collectstatic first.')
+        try:
+            manifest = write_precache_manifest(staticfiles_storage)
+        except ValueError as exc:
+            # Manifest storage has no hashed name for a file that was never collected
+            raise CommandError(f'{exc}. Run collectstatic first.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {PRECACHE_MANIFEST} version {manifest['version']} "
+            f"with {len(manifest['urls'])} files"
+        ))
+        for url in manifest['urls']:
+            self.stdout.write(f'  {url}')
@@ -0,0 +1,154 @@
+import re
+from datetime import date, timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from crops.models import Crop, FarmerCrop, PestDisease, PestDiseaseDetection
+from farmers.models import CreditHistory, FarmerProfile, FarmingHistory
+from finance.models import LoanApplication, MPesaTransaction
+from marketplace.models import BuyerRequest, MarketPrice, ProduceListing
+from weather.models import ClimateAlert, WeatherData, WeatherForecast
+
+# Full table scans as reported by EXPLAIN on PostgreSQL and SQLite
+SEQ_SCAN_PATTERNS = [
+    re.compile(r'Seq Scan on "?(\w+)"?'),
+    re.compile(r'\bSCAN (?:TABLE )?(\w+)(?! USING (?:COVERING )?INDEX)\b'),
+]
+
+
+def _first(model, field, default):
+    value = model.objects.order_by().values_list(field, flat=True).first()
+    # An empty table still gets an equality lookup, not IS NULL, so the plan is the real one
+    return default if value is None else value
+
+
+def view_querysets():
+    """Main queryset of each hot view, with parameters taken from the data"""
+    recent_date = date.today() - timedelta(days=7)
+    now = timezone.now()
+    user_id = _first(FarmerProfile, 'user_id', 1)
+    profile_id = _first(FarmerProfile, 'id', 1)
+    county = _first(WeatherData, 'county', 'Nairobi')
+
+    return [
+        ('marketplace:prices', MarketPrice.objects.filter(
+            price_date__gte=recent_date, market='nairobi', category='cereals'
+        ).order_by('-price_date')),
+        ('marketplace:prices_by_market', MarketPrice.objects.filter(
+            market='nairobi', price_date__gte=recent_date
+        ).order_by('product_name')),
+        ('marketplace:produce_list', ProduceListing.objects.filter(
+            status='active', category='cereals'
+        ).select_related('farmer')),
+        ('marketplace:request_list', BuyerRequest.objects.filter(status='active')),
+        ('weather:county_weather', WeatherData.objects.filter(
+            county=county
+        ).order_by('-timestamp')[:1]),
+        ('weather:forecast', WeatherForecast.objects.filter(
+            county=county, forecast_date__gte=now.date()
+        ).order_by('forecast_date', 'forecast_time')),
+        ('weather:alerts', ClimateAlert.objects.filter(
+            is_active=True, expires_at__gt=now
+        )),
+        ('farmers:dashboard', FarmingHistory.objects.filter(
+            farmer_profile_id=profile_id, year=now.year
+        )),
+        ('farmers:credit_score', CreditHistory.objects.filter(
+            farmer_profile_id=profile_id, status__in=['active', 'disbursed']
+        )),
+        ('finance:mpesa_callback', MPesaTransaction.objects.filter(
+            checkout_request_id='ws_CO_000000000000000000'
+        )),
+        ('finance:mpesa_history', MPesaTransaction.objects.filter(
+            user_id=user_id
+        ).order_by('-initiated_at')),
+        ('finance:dashboard', LoanApplication.objects.filter(
+            farmer_id=user_id, status__in=['active', 'disbursed']
+        )),
+        ('crops:crop_list', Crop.objects.filter(is_active=True, category='cereals')),
+        ('crops:my_crops', FarmerCrop.objects.filter(farmer_id=user_id)),
+        ('crops:pest_disease_list', PestDisease.objects.filter(
+            is_active=True, pest_disease_type='pest'
+        )),
+        ('crops:my_detections', PestDiseaseDetection.objects.filter(farmer_id=user_id)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN on the main queryset of each hot view and fail if a '
+        'sequential scan appears on a large table. Views whose table has fewer '
+        'than --min-rows rows are skipped, as planners rightly scan small tables; '
+        'on a fresh or empty database every view is skipped, so seed it first '
+        '(e.g. generate_synthetic_data) or lower --min-rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=10000,
+            help='Tables with fewer rows than this may be scanned sequentially; '
+                 'views on such a table are skipped'
+        )
+
+    def handle(self, *args, **options):
+        min_rows = options['min_rows']
+        models_by_table = {
+            model._meta.db_table: model for model in apps.get_models()
+        }
+        row_counts = {}
+        failures = []
+        skipped = []
+        checked = 0
+
+        def row_count(table):
+            if table not in row_counts:
+                row_counts[table] = models_by_table[table]._default_manager.count()
+            return row_counts[table]
+
+        for label, queryset in view_querysets():
+            view_table = queryset.model._meta.db_table
+            if row_count(view_table) < min_rows:
+                skipped.append(label)
+                self.stdout.write(f'{label}: skipped, {view_table} has {row_counts[view_table]} rows')
+                continue
+
+            checked += 1
+            plan = queryset.explain()
+            scanned = {
+                table
+                for pattern in SEQ_SCAN_PATTERNS
+                for table in pattern.findall(plan)
+                if table in models_by_table
+            }
+
+            large = []
+            for table in sorted(scanned):
+                if row_count(table) >= min_rows:
+                    large.append(f'{table} ({row_counts[table]} rows)')
+
+            if large:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(
+                    f"{label}: sequential scan on {', '.join(large)}"
+                ))
+                self.stdout.write(plan)
+            else:
+                self.stdout.write(f'{label}: OK')
+
+        if failures:
+            raise CommandError(
+                f"Sequential scans on large tables in {len(failures)} view(s) "
+                f"on {connection.vendor}: {', '.join(failures)}"
+            )
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'{len(skipped)} view(s) skipped: their tables have fewer than {min_rows} rows'
+            ))
+        if checked:
+            self.stdout.write(self.style.SUCCESS(
+                f'All {checked} checked view query plans use indexes'
+            ))
@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.trends import compute_market_trends
+
+
+class Command(BaseCommand):
+    help = 'Compute market price and volume trends from market price history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--end', help='Last day of the most recent period (YYYY-MM-DD, defaults to today)'
+        )
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help='Length of each period in days'
+        )
+        parser.add_argument(
+            '--periods', type=int, default=1,
+            help='Number of consecutive periods to compute, walking back from --end'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of trends written per bulk upsert'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            period_end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError:
+            raise CommandError('--end must be a date in YYYY-MM-DD format')
+
+        stats = compute_market_trends(
+            period_end=period_end,
+            period_days=options['days'],
+            periods=options['periods'],
+            batch_size=options['batch_size'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Computed {stats['rows']} trends over {stats['periods']} periods "
+            f"in {stats['seconds']:.1f}s ({stats['rows_per_second']:.0f} rows/s)"
+        ))
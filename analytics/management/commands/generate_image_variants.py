@@ -0,0 +1,51 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from kilimo_guru.images import image_derivatives, queue_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Render missing WebP variants of uploaded images for every registered model'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='Models to process as app_label.ModelName (defaults to all registered)'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Re-render variants that are already up to date'
+        )
+        parser.add_argument(
+            '--queue', action='store_true',
+            help='Queue a Celery task per instance instead of rendering here'
+        )
+
+    def handle(self, *args, **options):
+        models = list(image_derivatives.fields)
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as exc:
+                raise CommandError(exc)
+            unregistered = [model._meta.label for model in models if model not in image_derivatives.fields]
+            if unregistered:
+                raise CommandError(f"No image variants registered for {', '.join(unregistered)}")
+
+        for model in models:
+            started = time.monotonic()
+            instances = images = 0
+            for instance in model._base_manager.order_by('pk').iterator(chunk_size=500):
+                if not options['force'] and not image_derivatives.stale_fields(instance):
+                    continue
+                instances += 1
+                if options['queue']:
+                    queue_image_variants(instance)
+                else:
+                    images += len(image_derivatives.refresh(instance, force=options['force']))
+            action = 'Queued' if options['queue'] else f'Rendered {images} images of'
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.label}: {action} {instances} instances in {time.monotonic() - started:.2f}s'
+            ))
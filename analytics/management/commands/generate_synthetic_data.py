@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.synthetic import DEFAULT_SCALE, NATIONAL_SCALE, generate_dataset
+
+SCALES = {'default': DEFAULT_SCALE, 'national': NATIONAL_SCALE}
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate seeded synthetic farmers, buyers, listings, loans, payments, '
+        'market prices and weather for load testing'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=sorted(SCALES), default='default',
+            help='Preset sizes; national writes about 5M rows'
+        )
+        for name, value in DEFAULT_SCALE.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}", type=type(value),
+                help=f'Override the preset {name} (default preset: {value})'
+            )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument(
+            '--prefix', default='synthetic',
+            help='Username prefix of the generated users; must not be in use'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Rows written per bulk insert'
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if get_user_model().objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f'Users prefixed {prefix}- already exist; pass another --prefix')
+
+        scale = dict(SCALES[options['scale']])
+        scale.update({name: options[name] for name in scale if options[name] is not None})
+        log = self.stdout.write if options['verbosity'] > 1 else None
+
+        started = time.monotonic()
+        counts = generate_dataset(
+            seed=options['seed'], prefix=prefix, batch_size=options['batch_size'], log=log, **scale
+        )
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        for name, count in counts.items():
+            self.stdout.write(f'{name:<20} {count:>10}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {total} rows in {elapsed:.0f}s ({total / max(elapsed, 0.001):.0f} rows/s)'
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import rebuild_crop_rollups, rebuild_farmer_analytics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the crop/year rollups and farmer analytics from farming history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows written per bulk insert'
+        )
+        parser.add_argument(
+            '--year', type=int,
+            help='Year treated as the current year (defaults to this year)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        started = time.monotonic()
+        rollups = rebuild_crop_rollups(batch_size=batch_size)
+        self.stdout.write(
+            f'Rebuilt {rollups} crop/year rollups in {time.monotonic() - started:.1f}s'
+        )
+
+        started = time.monotonic()
+        farmers = rebuild_farmer_analytics(batch_size=batch_size, year=options['year'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt analytics for {farmers} farmers in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketTrend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=100)),
+                ('category', models.CharField(max_length=20)),
+                ('current_avg_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('previous_avg_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price_change_percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('current_volume', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('previous_volume', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('volume_change_percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('market', models.CharField(max_length=20)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Market Trend',
+                'verbose_name_plural': 'Market Trends',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SystemMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric_name', models.CharField(max_length=100)),
+                ('metric_value', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('metric_unit', models.CharField(blank=True, max_length=50)),
+                ('category', models.CharField(choices=[('users', 'Users'), ('transactions', 'Transactions'), ('listings', 'Listings'), ('loans', 'Loans'), ('weather', 'Weather'), ('engagement', 'Engagement')], max_length=20)),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'System Metric',
+                'verbose_name_plural': 'System Metrics',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FarmerAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_yield_current_year', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_yield_previous_year', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('yield_growth_percentage', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('total_revenue_current_year', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_costs_current_year', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('net_profit_current_year', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('profit_margin', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('top_performing_crop', models.CharField(blank=True, max_length=100, null=True)),
+                ('top_crop_yield', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('total_farm_area', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('utilized_area', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('utilization_rate', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('farmer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Farmer Analytics',
+                'verbose_name_plural': 'Farmers Analytics',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0001_initial'),
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farmeranalytics',
+            name='area_planted_current_year',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='farmeranalytics',
+            name='year',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='farmeranalytics',
+            name='profit_margin',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='farmeranalytics',
+            name='yield_growth_percentage',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.CreateModel(
+            name='CropYearRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('crop_name', models.CharField(max_length=100)),
+                ('total_yield', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('yield_records', models.PositiveIntegerField(default=0)),
+                ('area_planted', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('costed_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('costed_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('costed_records', models.PositiveIntegerField(default=0)),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('farmer_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crop_rollups', to='farmers.farmerprofile')),
+            ],
+            options={
+                'verbose_name': 'Crop Year Rollup',
+                'verbose_name_plural': 'Crop Year Rollups',
+                'ordering': ['-year', 'crop_name'],
+                'unique_together': {('farmer_profile', 'year', 'crop_name')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:13
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='markettrend',
+            unique_together={('product_name', 'market', 'period_start', 'period_end')},
+        ),
+    ]
@@ -11,6 +11,9 @@ class FarmerAnalytics(models.Model):
         User, on_delete=models.CASCADE, related_name='analytics'
     )
     
+    # Year the "current year" figures refer to
+    year = models.PositiveIntegerField(default=0)
+    
     # Yield analytics
     total_yield_current_year = models.DecimalField(
         max_digits=12, decimal_places=2, default=0
@@ -19,7 +22,7 @@ class FarmerAnalytics(models.Model):
         max_digits=12, decimal_places=2, default=0
     )
     yield_growth_percentage = models.DecimalField(
-        max_digits=5, decimal_places=2, default=0
+        max_digits=8, decimal_places=2, default=0
     )
     
     # Financial analytics
@@ -32,7 +35,7 @@ class FarmerAnalytics(models.Model):
     net_profit_current_year = models.DecimalField(
         max_digits=12, decimal_places=2, default=0
     )
-    profit_margin = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    profit_margin = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     
     # Crop performance
     top_performing_crop = models.CharField(max_length=100, blank=True, null=True)
@@ -41,6 +44,9 @@ class FarmerAnalytics(models.Model):
     )
     
     # Land utilization
+    area_planted_current_year = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0
+    )
     total_farm_area = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     utilized_area = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     utilization_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
@@ -56,6 +62,46 @@ class FarmerAnalytics(models.Model):
         return f"Analytics for {self.farmer.username}"
 
 
+class CropYearRollup(models.Model):
+    """Farming history totals per farmer, year and crop"""
+    
+    farmer_profile = models.ForeignKey(
+        'farmers.FarmerProfile', on_delete=models.CASCADE, related_name='crop_rollups'
+    )
+    year = models.PositiveIntegerField()
+    crop_name = models.CharField(max_length=100)
+    
+    # Yield
+    total_yield = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    yield_records = models.PositiveIntegerField(default=0)
+    area_planted = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    # Financials
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    # Records with both revenue and cost recorded
+    costed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    costed_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    costed_records = models.PositiveIntegerField(default=0)
+    
+    record_count = models.PositiveIntegerField(default=0)
+    last_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Crop Year Rollup'
+        verbose_name_plural = 'Crop Year Rollups'
+        ordering = ['-year', 'crop_name']
+        unique_together = ['farmer_profile', 'year', 'crop_name']
+    
+    def __str__(self):
+        return f"{self.crop_name} {self.year} - {self.farmer_profile_id}"
+    
+    @property
+    def profit(self):
+        return self.costed_revenue - self.costed_cost
+
+
 class MarketTrend(models.Model):
     """Market trends and analysis"""
     
@@ -85,6 +131,7 @@ class MarketTrend(models.Model):
         verbose_name = 'Market Trend'
         verbose_name_plural = 'Market Trends'
         ordering = ['-created_at']
+        unique_together = ['product_name', 'market', 'period_start', 'period_end']
     
     def __str__(self):
         return f"{self.product_name} - {self.market} - {self.period_start}"
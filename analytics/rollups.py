@@ -0,0 +1,254 @@
+"""
+Materialized analytics rollups maintained from FarmingHistory and FarmParcel.
+
+CropYearRollup holds one row of totals per farmer, year and crop, and
+FarmerAnalytics holds the per-farmer headline figures derived from those
+rows. Both are refreshed for the affected keys whenever farming history or
+parcels change, and can be rebuilt in bulk with ``rebuild_analytics``.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from farmers.models import FarmerProfile, FarmParcel, FarmingHistory
+from .models import CropYearRollup, FarmerAnalytics
+
+ROLLUP_FIELDS = [
+    'total_yield', 'yield_records', 'area_planted', 'total_revenue',
+    'total_cost', 'costed_revenue', 'costed_cost', 'costed_records',
+    'record_count',
+]
+
+ANALYTICS_FIELDS = [
+    'year', 'total_yield_current_year', 'total_yield_previous_year',
+    'yield_growth_percentage', 'total_revenue_current_year',
+    'total_costs_current_year', 'net_profit_current_year', 'profit_margin',
+    'top_performing_crop', 'top_crop_yield', 'area_planted_current_year',
+    'total_farm_area', 'utilized_area', 'utilization_rate', 'last_updated',
+]
+
+# Largest value a max_digits=8, decimal_places=2 percentage column can hold
+MAX_PERCENTAGE = Decimal('999999.99')
+
+
+def rollup_aggregates():
+    """Aggregates computing a CropYearRollup row from FarmingHistory.
+
+    Aliases are prefixed so they do not collide with FarmingHistory fields.
+    """
+    costed = Q(total_revenue__isnull=False, total_cost__isnull=False)
+    return {
+        'rollup_total_yield': Sum('actual_yield'),
+        'rollup_yield_records': Count('actual_yield'),
+        'rollup_area_planted': Sum('area_planted'),
+        'rollup_total_revenue': Sum('total_revenue'),
+        'rollup_total_cost': Sum('total_cost'),
+        'rollup_costed_revenue': Sum('total_revenue', filter=costed),
+        'rollup_costed_cost': Sum('total_cost', filter=costed),
+        'rollup_costed_records': Count('id', filter=costed),
+        'rollup_record_count': Count('id'),
+    }
+
+
+def _rollup_values(row):
+    return {field: row[f'rollup_{field}'] or 0 for field in ROLLUP_FIELDS}
+
+
+def _percentage(part, whole):
+    if not whole:
+        return Decimal('0')
+    value = (Decimal(part) / Decimal(whole)) * 100
+    value = max(min(value, MAX_PERCENTAGE), -MAX_PERCENTAGE)
+    return value.quantize(Decimal('0.01'))
+
+
+def refresh_crop_year(profile_id, year, crop_name):
+    """Recompute the rollup row for one farmer, year and crop"""
+    row = FarmingHistory.objects.filter(
+        farmer_profile_id=profile_id,
+        year=year,
+        crop_name=crop_name
+    ).aggregate(**rollup_aggregates())
+
+    lookup = {'farmer_profile_id': profile_id, 'year': year, 'crop_name': crop_name}
+
+    if not row['rollup_record_count']:
+        CropYearRollup.objects.filter(**lookup).delete()
+        return None
+
+    rollup, _ = CropYearRollup.objects.update_or_create(
+        defaults=_rollup_values(row), **lookup
+    )
+    return rollup
+
+
+def build_farmer_analytics(profiles, year):
+    """Build unsaved FarmerAnalytics rows for (profile_id, user_id) pairs"""
+    profile_ids = [profile_id for profile_id, _ in profiles]
+
+    year_totals = {}
+    for row in CropYearRollup.objects.filter(
+        farmer_profile_id__in=profile_ids,
+        year__in=[year, year - 1]
+    ).values('farmer_profile_id', 'year').annotate(
+        total_yield=Sum('total_yield'),
+        total_revenue=Sum('total_revenue'),
+        total_cost=Sum('total_cost'),
+        costed_revenue=Sum('costed_revenue'),
+        costed_cost=Sum('costed_cost'),
+        area_planted=Sum('area_planted'),
+    ).order_by():
+        year_totals[(row['farmer_profile_id'], row['year'])] = row
+
+    top_crops = {}
+    for row in CropYearRollup.objects.filter(
+        farmer_profile_id__in=profile_ids,
+        year=year,
+        yield_records__gt=0
+    ).values('farmer_profile_id', 'crop_name', 'total_yield').order_by(
+        'farmer_profile_id', '-total_yield'
+    ):
+        top_crops.setdefault(row['farmer_profile_id'], row)
+
+    parcel_totals = {
+        row['farmer_profile_id']: row
+        for row in FarmParcel.objects.filter(
+            farmer_profile_id__in=profile_ids,
+            is_active=True
+        ).values('farmer_profile_id').annotate(
+            total=Sum('size'),
+            utilized=Sum('size', filter=Q(current_crop__gt='')),
+        ).order_by()
+    }
+
+    empty = {}
+    analytics = []
+    for profile_id, user_id in profiles:
+        current = year_totals.get((profile_id, year), empty)
+        previous = year_totals.get((profile_id, year - 1), empty)
+        top_crop = top_crops.get(profile_id, empty)
+        parcels = parcel_totals.get(profile_id, empty)
+
+        current_yield = current.get('total_yield') or 0
+        previous_yield = previous.get('total_yield') or 0
+        revenue = current.get('total_revenue') or 0
+        net_profit = (current.get('costed_revenue') or 0) - (current.get('costed_cost') or 0)
+        total_area = parcels.get('total') or 0
+        utilized_area = parcels.get('utilized') or 0
+
+        analytics.append(FarmerAnalytics(
+            farmer_id=user_id,
+            year=year,
+            total_yield_current_year=current_yield,
+            total_yield_previous_year=previous_yield,
+            yield_growth_percentage=_percentage(current_yield - previous_yield, previous_yield),
+            total_revenue_current_year=revenue,
+            total_costs_current_year=current.get('total_cost') or 0,
+            net_profit_current_year=net_profit,
+            profit_margin=_percentage(net_profit, revenue),
+            top_performing_crop=top_crop.get('crop_name'),
+            top_crop_yield=top_crop.get('total_yield'),
+            area_planted_current_year=current.get('area_planted') or 0,
+            total_farm_area=total_area,
+            utilized_area=utilized_area,
+            utilization_rate=_percentage(utilized_area, total_area),
+        ))
+    return analytics
+
+
+def save_farmer_analytics(analytics):
+    """Upsert FarmerAnalytics rows keyed on the farmer"""
+    return FarmerAnalytics.objects.bulk_create(
+        analytics,
+        update_conflicts=True,
+        unique_fields=['farmer'],
+        update_fields=ANALYTICS_FIELDS,
+    )
+
+
+def refresh_farmer_analytics(profile_id, year=None):
+    """Recompute the FarmerAnalytics row for one farmer profile"""
+    year = year or timezone.now().year
+    user_id = FarmerProfile.objects.filter(
+        pk=profile_id
+    ).values_list('user_id', flat=True).first()
+
+    if user_id is None:
+        return None
+
+    save_farmer_analytics(build_farmer_analytics([(profile_id, user_id)], year))
+    return FarmerAnalytics.objects.get(farmer_id=user_id)
+
+
+def get_farmer_analytics(profile):
+    """Return the farmer's analytics, refreshing them when missing or stale"""
+    analytics = FarmerAnalytics.objects.filter(farmer_id=profile.user_id).first()
+    if analytics is None or analytics.year != timezone.now().year:
+        analytics = refresh_farmer_analytics(profile.pk)
+    return analytics
+
+
+def schedule_refresh(profile_id, keys=()):
+    """Refresh rollups for the given (year, crop_name) keys once the write commits"""
+    def refresh():
+        for year, crop_name in keys:
+            refresh_crop_year(profile_id, year, crop_name)
+        refresh_farmer_analytics(profile_id)
+
+    transaction.on_commit(refresh)
+
+
+def rebuild_crop_rollups(batch_size=1000):
+    """Rebuild every CropYearRollup row from FarmingHistory"""
+    created = 0
+    batch = []
+
+    rows = FarmingHistory.objects.values(
+        'farmer_profile_id', 'year', 'crop_name'
+    ).annotate(**rollup_aggregates()).order_by()
+
+    with transaction.atomic():
+        CropYearRollup.objects.all().delete()
+
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(CropYearRollup(
+                farmer_profile_id=row['farmer_profile_id'],
+                year=row['year'],
+                crop_name=row['crop_name'],
+                **_rollup_values(row)
+            ))
+            if len(batch) >= batch_size:
+                CropYearRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+
+        if batch:
+            CropYearRollup.objects.bulk_create(batch)
+            created += len(batch)
+
+    return created
+
+
+def rebuild_farmer_analytics(batch_size=1000, year=None):
+    """Rebuild every FarmerAnalytics row from the crop rollups"""
+    year = year or timezone.now().year
+    updated = 0
+    batch = []
+
+    profiles = FarmerProfile.objects.values_list('id', 'user_id').order_by('id')
+
+    for profile in profiles.iterator(chunk_size=batch_size):
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            save_farmer_analytics(build_farmer_analytics(batch, year))
+            updated += len(batch)
+            batch = []
+
+    if batch:
+        save_farmer_analytics(build_farmer_analytics(batch, year))
+        updated += len(batch)
+
+    return updated
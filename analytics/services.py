@@ -0,0 +1,129 @@
+"""
+Aggregation services shared by the analytics views and the JSON API.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from farmers.models import FarmingHistory
+
+ZERO = Decimal('0')
+
+MEASURES = ['yield_total', 'yield_count', 'revenue_total', 'revenue_count']
+
+
+def _empty_bucket():
+    return {measure: 0 if measure.endswith('_count') else ZERO for measure in MEASURES}
+
+
+def _merge(bucket, row):
+    for measure in MEASURES:
+        bucket[measure] += row[measure] or 0
+    return bucket
+
+
+class FarmingHistoryGrid:
+    """Month/crop/year grid of farming history totals for one farmer.
+
+    The whole grid is loaded with a single grouped query; every series the
+    analytics pages need is then folded from the grid in memory.
+    """
+
+    def __init__(self, profile, years=None):
+        self.profile = profile
+        self.years = years
+        self.rows = list(self.get_queryset())
+
+    def get_queryset(self):
+        queryset = FarmingHistory.objects.filter(farmer_profile=self.profile)
+        if self.years is not None:
+            queryset = queryset.filter(year__in=self.years)
+
+        return queryset.annotate(
+            month=TruncMonth('planting_date')
+        ).values(
+            'year', 'month', 'crop_name'
+        ).annotate(
+            yield_total=Sum('actual_yield'),
+            yield_count=Count('actual_yield'),
+            revenue_total=Sum('total_revenue'),
+            revenue_count=Count('total_revenue'),
+        ).order_by()
+
+    def _rows(self, year=None, crop=None):
+        for row in self.rows:
+            if year is not None and row['year'] != year:
+                continue
+            if crop is not None and row['crop_name'] != crop:
+                continue
+            yield row
+
+    def monthly_series(self, year, crop=None):
+        """Dense 12-bucket series of yield and revenue by planting month"""
+        buckets = [_empty_bucket() for _ in range(12)]
+        for row in self._rows(year, crop):
+            if row['month'] is not None:
+                _merge(buckets[row['month'].month - 1], row)
+
+        return [
+            {
+                'month': index + 1,
+                'yield': float(bucket['yield_total']),
+                'revenue': float(bucket['revenue_total']),
+            }
+            for index, bucket in enumerate(buckets)
+        ]
+
+    def by_crop(self, year=None):
+        """Totals per crop, keyed by crop name"""
+        crops = {}
+        for row in self._rows(year):
+            _merge(crops.setdefault(row['crop_name'], _empty_bucket()), row)
+        return crops
+
+    def by_year(self):
+        """Totals per year, keyed by year"""
+        years = {}
+        for row in self.rows:
+            _merge(years.setdefault(row['year'], _empty_bucket()), row)
+        return years
+
+    def yield_by_crop(self):
+        """Total and average yield per crop, over records with a recorded yield"""
+        crops = [
+            {
+                'crop_name': crop_name,
+                'total_yield': bucket['yield_total'],
+                'avg_yield': bucket['yield_total'] / bucket['yield_count'],
+                'count': bucket['yield_count'],
+            }
+            for crop_name, bucket in self.by_crop().items()
+            if bucket['yield_count']
+        ]
+        crops.sort(key=lambda item: item['total_yield'], reverse=True)
+        return crops
+
+    def yield_by_year(self):
+        """Total yield per year, over records with a recorded yield"""
+        return [
+            {'year': year, 'total_yield': bucket['yield_total']}
+            for year, bucket in sorted(self.by_year().items())
+            if bucket['yield_count']
+        ]
+
+    def revenue_by_crop(self, year=None):
+        """Total revenue per crop, over records with a recorded revenue"""
+        crops = [
+            {'crop_name': crop_name, 'revenue': bucket['revenue_total']}
+            for crop_name, bucket in self.by_crop(year).items()
+            if bucket['revenue_count']
+        ]
+        crops.sort(key=lambda item: item['revenue'], reverse=True)
+        return crops
+
+
+def get_farming_history_grid(profile, years=None):
+    """Load the farming history grid for a farmer profile"""
+    return FarmingHistoryGrid(profile, years=years)
@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from farmers.models import FarmParcel, FarmingHistory
+from .rollups import schedule_refresh
+
+
+def _rollup_key(instance):
+    """(profile_id, year, crop_name) the history record is rolled up under"""
+    values = instance.__dict__
+    return (values.get('farmer_profile_id'), values.get('year'), values.get('crop_name'))
+
+
+@receiver(post_init, sender=FarmingHistory)
+def remember_rollup_key(sender, instance, **kwargs):
+    """Remember the loaded rollup key so edits can refresh the old row too"""
+    instance._rollup_key = _rollup_key(instance)
+
+
+@receiver(post_save, sender=FarmingHistory)
+def update_rollups_on_history_save(sender, instance, **kwargs):
+    """Refresh crop and farmer rollups touched by a farming history write"""
+    previous_key = instance._rollup_key
+    current_key = _rollup_key(instance)
+    instance._rollup_key = current_key
+
+    for profile_id in {previous_key[0], current_key[0]}:
+        if profile_id is None:
+            continue
+        keys = {
+            (year, crop_name)
+            for key_profile_id, year, crop_name in (previous_key, current_key)
+            if key_profile_id == profile_id and year is not None
+        }
+        schedule_refresh(profile_id, keys)
+
+
+@receiver(post_delete, sender=FarmingHistory)
+def update_rollups_on_history_delete(sender, instance, **kwargs):
+    """Refresh crop and farmer rollups after a farming history record is removed"""
+    schedule_refresh(
+        instance.farmer_profile_id, [(instance.year, instance.crop_name)]
+    )
+
+
+@receiver([post_save, post_delete], sender=FarmParcel)
+def update_rollups_on_parcel_change(sender, instance, **kwargs):
+    """Refresh land utilization after a parcel is added, edited or removed"""
+    schedule_refresh(instance.farmer_profile_id)
@@ -0,0 +1,446 @@
+"""
+Seeded synthetic data shaped like Kenyan farming, for benchmarks and load tests.
+
+generate_dataset() writes consistent rows across accounts, farmers, crops,
+marketplace, finance and weather: farmers with their devices, profiles,
+parcels, farming and credit history, planted crops, produce listings, loan
+applications and M-Pesa payments; buyers with their requests; daily prices
+for every market and product; and hourly weather observations for the 47
+counties. Every foreign key points at rows written in the same run or at
+the crop and loan product catalogue, which is created when missing.
+
+Rows come from generators and are written with bulk_create a batch at a
+time, each batch in its own transaction, so memory stays flat whatever the
+scale and the same seed always yields the same data. bulk_create sends no
+signals; the derived tables the views read (current weather snapshots,
+search documents) are filled in directly, while rollups and caches are
+left to their rebuild commands.
+"""
+
+import itertools
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+from accounts.models import UserDevice
+from crops.models import Crop, FarmerCrop
+from farmers.models import CreditHistory, FarmerProfile, FarmingHistory, FarmParcel
+from finance.models import LoanApplication, LoanProduct, MPesaTransaction
+from marketplace.models import BuyerRequest, MarketPrice, ProduceListing
+from marketplace.search import build_search_document
+from weather.models import WeatherData
+from weather.snapshots import update_current_weather
+
+# County, latitude and longitude of the county headquarters
+COUNTIES = [
+    ('Mombasa', -4.04, 39.67), ('Kwale', -4.17, 39.45), ('Kilifi', -3.63, 39.85),
+    ('Tana River', -1.50, 40.03), ('Lamu', -2.27, 40.90), ('Taita Taveta', -3.40, 38.36),
+    ('Garissa', -0.45, 39.65), ('Wajir', 1.75, 40.06), ('Mandera', 3.94, 41.86),
+    ('Marsabit', 2.33, 37.99), ('Isiolo', 0.35, 37.58), ('Meru', 0.05, 37.65),
+    ('Tharaka Nithi', -0.30, 37.88), ('Embu', -0.54, 37.46), ('Kitui', -1.37, 38.01),
+    ('Machakos', -1.52, 37.26), ('Makueni', -1.80, 37.62), ('Nyandarua', -0.18, 36.52),
+    ('Nyeri', -0.42, 36.95), ('Kirinyaga', -0.50, 37.28), ("Murang'a", -0.72, 37.15),
+    ('Kiambu', -1.17, 36.83), ('Turkana', 3.12, 35.60), ('West Pokot', 1.24, 35.11),
+    ('Samburu', 1.10, 36.70), ('Trans Nzoia', 1.02, 35.00), ('Uasin Gishu', 0.52, 35.27),
+    ('Elgeyo Marakwet', 0.67, 35.51), ('Nandi', 0.20, 35.10), ('Baringo', 0.47, 35.97),
+    ('Laikipia', 0.02, 37.07), ('Nakuru', -0.30, 36.07), ('Narok', -1.08, 35.87),
+    ('Kajiado', -1.85, 36.78), ('Kericho', -0.37, 35.28), ('Bomet', -0.78, 35.34),
+    ('Kakamega', 0.28, 34.75), ('Vihiga', 0.08, 34.72), ('Bungoma', 0.56, 34.56),
+    ('Busia', 0.46, 34.11), ('Siaya', 0.06, 34.29), ('Kisumu', -0.09, 34.77),
+    ('Homa Bay', -0.53, 34.46), ('Migori', -1.06, 34.47), ('Kisii', -0.68, 34.77),
+    ('Nyamira', -0.56, 34.94), ('Nairobi', -1.29, 36.82),
+]
+
+# Product, category, unit and typical price per unit in KES
+PRODUCTS = [
+    ('Maize', 'cereals', 'bag_90kg', 4200), ('Wheat', 'cereals', 'bag_90kg', 5000),
+    ('Sorghum', 'cereals', 'kg', 60), ('Rice', 'cereals', 'kg', 140),
+    ('Beans', 'legumes', 'kg', 130), ('Green Grams', 'legumes', 'kg', 150),
+    ('Potatoes', 'roots_tubers', 'bag_50kg', 2500), ('Cassava', 'roots_tubers', 'kg', 35),
+    ('Sweet Potatoes', 'roots_tubers', 'kg', 45), ('Tomatoes', 'vegetables', 'crate', 4000),
+    ('Kales', 'vegetables', 'kg', 30), ('Cabbages', 'vegetables', 'piece', 40),
+    ('Onions', 'vegetables', 'kg', 90), ('Bananas', 'fruits', 'kg', 40),
+    ('Mangoes', 'fruits', 'piece', 15), ('Avocados', 'fruits', 'kg', 60),
+    ('Milk', 'dairy', 'liter', 55), ('Eggs', 'eggs', 'dozen', 180),
+]
+
+SEASONS = ['long_rains', 'short_rains']
+CONDITIONS = [
+    ('Clear', 'clear sky', '01d'), ('Clouds', 'scattered clouds', '03d'),
+    ('Clouds', 'overcast clouds', '04d'), ('Rain', 'light rain', '10d'),
+    ('Rain', 'moderate rain', '10d'), ('Thunderstorm', 'thunderstorm', '11d'),
+]
+
+DEFAULT_SCALE = {
+    'farmers': 20000,
+    'buyers': 2000,
+    'history_per_farmer': 4,
+    'listing_fraction': 0.5,
+    'loan_fraction': 0.3,
+    'payments_per_farmer': 2,
+    'device_fraction': 0.6,
+    'requests_per_buyer': 1,
+    'price_days': 90,
+    'weather_days': 14,
+}
+
+# About 5M rows: 2.5M seasons of farming history, a year of prices and weather
+NATIONAL_SCALE = {
+    **DEFAULT_SCALE,
+    'farmers': 250000,
+    'buyers': 25000,
+    'history_per_farmer': 10,
+    'price_days': 365,
+    'weather_days': 365,
+}
+
+CROP_STATUSES = ['planted', 'vegetative', 'flowering', 'fruiting', 'mature', 'harvested']
+
+# Name, loan type, interest rate and largest amount of the loan product catalogue
+LOAN_PRODUCTS = [
+    ('Synthetic input loan', 'input', 12, 50000),
+    ('Synthetic seasonal loan', 'seasonal', 14, 150000),
+    ('Synthetic equipment loan', 'equipment', 16, 500000),
+]
+
+
+
+def batched(rows, size):
+    """Lists of up to size items from an iterable"""
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+def bulk_insert(model, rows, batch_size, **kwargs):
+    """bulk_create rows from an iterable a batch at a time; returns the rows written"""
+    # Rows skipped by ignore_conflicts are still returned by bulk_create
+    before = model.objects.count() if kwargs.get('ignore_conflicts') else None
+    count = 0
+    for batch in batched(rows, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, **kwargs)
+        # Under DEBUG every INSERT is kept in connection.queries
+        reset_queries()
+        count += len(batch)
+    return count if before is None else model.objects.count() - before
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def _phone(rng):
+    return f'+2547{rng.randrange(10 ** 8):08d}'
+
+
+def catalogue():
+    """Crops and loan products by name, created when missing"""
+    crops = {}
+    categories = dict(Crop.CROP_CATEGORIES)
+    for product, category, _, _ in PRODUCTS:
+        if category in categories:
+            crops[product], _ = Crop.objects.get_or_create(
+                name=product, defaults={'category': category}
+            )
+    loan_products = [
+        LoanProduct.objects.get_or_create(name=name, defaults={
+            'loan_type': loan_type,
+            'description': f'{name} for smallholder farmers.',
+            'min_amount': 1000,
+            'max_amount': max_amount,
+            'interest_rate': rate,
+            'min_duration_days': 30,
+            'max_duration_days': 365,
+            'provider_name': 'Synthetic SACCO',
+        })[0]
+        for name, loan_type, rate, max_amount in LOAN_PRODUCTS
+    ]
+    return crops, loan_products
+
+
+def _users(rng, prefix, user_type, count, password):
+    for index in range(count):
+        county = rng.choice(COUNTIES)[0]
+        yield get_user_model()(
+            username=f'{prefix}-{user_type}-{index}',
+            first_name=user_type.title(),
+            last_name=str(index),
+            user_type=user_type,
+            county=county,
+            mpesa_number=_phone(rng),
+            password=password,
+            is_verified=rng.random() < 0.7,
+        )
+
+
+def _farm_rows(rng, users, scale, today, crops, loan_products):
+    """Rows belonging to one batch of farmer users; returns counts by table"""
+    crop_names = list(crops)
+    profiles = FarmerProfile.objects.bulk_create([
+        FarmerProfile(
+            user=user,
+            farm_size=_money(rng.uniform(0.25, 10)),
+            farming_type=rng.choice(['subsistence', 'subsistence', 'commercial', 'mixed']),
+            credit_score=rng.randint(300, 850),
+            years_of_experience=rng.randint(0, 40),
+        )
+        for user in users
+    ])
+    parcels = FarmParcel.objects.bulk_create([
+        FarmParcel(
+            farmer_profile=profile,
+            parcel_name=f'Shamba {number}',
+            size=_money(rng.uniform(0.25, 5)),
+            size_unit=rng.choice(['acres', 'acres', 'hectares']),
+            current_crop=rng.choice(crop_names),
+        )
+        for profile in profiles
+        for number in range(1, rng.randint(1, 3) + 1)
+    ])
+    parcels_by_profile = {}
+    for parcel in parcels:
+        parcels_by_profile.setdefault(parcel.farmer_profile_id, []).append(parcel)
+
+    history = []
+    for profile in profiles:
+        for season in range(scale['history_per_farmer']):
+            area = _money(rng.uniform(0.25, 3))
+            actual = _money(float(area) * rng.uniform(200, 1500))
+            cost = _money(float(area) * rng.uniform(8000, 30000))
+            history.append(FarmingHistory(
+                farmer_profile=profile,
+                parcel=rng.choice(parcels_by_profile[profile.pk]),
+                crop_name=rng.choice(crop_names),
+                season=SEASONS[season % 2],
+                year=today.year - season // 2,
+                area_planted=area,
+                expected_yield=actual,
+                actual_yield=actual,
+                yield_unit='kg',
+                total_cost=cost,
+                total_revenue=_money(float(cost) * rng.uniform(0.6, 2.2)),
+            ))
+    FarmingHistory.objects.bulk_create(history)
+
+    farmer_crops = FarmerCrop.objects.bulk_create([
+        FarmerCrop(
+            farmer_id=parcel.farmer_profile.user_id,
+            crop=crops[parcel.current_crop],
+            parcel=parcel,
+            season='long_rains',
+            year=today.year,
+            planting_date=today - timedelta(days=rng.randint(10, 150)),
+            area_planted=parcel.size,
+            status=rng.choice(CROP_STATUSES),
+        )
+        for parcel in parcels
+    ])
+
+    credit, loans = [], []
+    for profile in profiles:
+        if rng.random() >= scale['loan_fraction']:
+            continue
+        product = rng.choice(loan_products)
+        amount = _money(rng.uniform(5000, float(product.max_amount)))
+        applied = today - timedelta(days=rng.randint(0, 300))
+        status = rng.choice(['active', 'active', 'repaid', 'defaulted'])
+        repaid = amount if status == 'repaid' else _money(float(amount) * rng.uniform(0, 0.8))
+        credit.append(CreditHistory(
+            farmer_profile=profile,
+            loan_type=product.loan_type,
+            lender_name=product.provider_name,
+            loan_amount=amount,
+            interest_rate=product.interest_rate,
+            application_date=applied,
+            due_date=applied + timedelta(days=180),
+            status=status,
+            amount_repaid=repaid,
+        ))
+        loans.append(LoanApplication(
+            farmer_id=profile.user_id,
+            loan_product=product,
+            amount_requested=amount,
+            amount_approved=amount,
+            duration_days=180,
+            purpose=f'Inputs for {rng.choice(crop_names).lower()}',
+            status=status,
+        ))
+    CreditHistory.objects.bulk_create(credit)
+    LoanApplication.objects.bulk_create(loans)
+
+    listings = []
+    for user in users:
+        if rng.random() >= scale['listing_fraction']:
+            continue
+        product, category, unit, price = rng.choice(PRODUCTS)
+        listing = ProduceListing(
+            farmer=user,
+            product_name=product,
+            category=category,
+            quantity_available=_money(rng.uniform(1, 500)),
+            unit=unit,
+            price_per_unit=_money(price * rng.uniform(0.8, 1.3)),
+            quality_grade=rng.choice(['premium', 'grade_1', 'grade_2']),
+            county=user.county,
+            pickup_location=f'{user.county} town',
+            available_from=today - timedelta(days=rng.randint(0, 30)),
+            available_until=today + timedelta(days=rng.randint(1, 60)),
+            status=rng.choice(['active', 'active', 'active', 'sold']),
+        )
+        listing.search_document = build_search_document(listing)
+        listings.append(listing)
+    ProduceListing.objects.bulk_create(listings)
+
+    payments = MPesaTransaction.objects.bulk_create([
+        MPesaTransaction(
+            user=user,
+            transaction_type=rng.choice(['paybill', 'buy_goods', 'receive_money']),
+            amount=_money(rng.uniform(50, 20000)),
+            mpesa_receipt_number=f'S{rng.randrange(36 ** 9):09X}',
+            phone_number=user.mpesa_number,
+            status=rng.choice(['completed', 'completed', 'completed', 'failed']),
+        )
+        for user in users
+        for _ in range(scale['payments_per_farmer'])
+    ])
+    devices = UserDevice.objects.bulk_create([
+        UserDevice(
+            user=user,
+            device_id=f'synthetic-{user.pk}',
+            device_type=rng.choice(['android', 'android', 'android', 'feature_phone', 'web']),
+        )
+        for user in users
+        if rng.random() < scale['device_fraction']
+    ])
+
+    return {
+        'farmer_profiles': len(profiles),
+        'parcels': len(parcels),
+        'farming_history': len(history),
+        'farmer_crops': len(farmer_crops),
+        'credit_history': len(credit),
+        'loan_applications': len(loans),
+        'listings': len(listings),
+        'mpesa_transactions': len(payments),
+        'devices': len(devices),
+    }
+
+
+def _buyer_requests(rng, buyers, per_buyer, today):
+    for buyer in buyers:
+        for _ in range(per_buyer):
+            product, category, unit, price = rng.choice(PRODUCTS)
+            yield BuyerRequest(
+                buyer=buyer,
+                product_name=product,
+                category=category,
+                quantity_required=_money(rng.uniform(10, 2000)),
+                unit=unit,
+                max_price_per_unit=_money(price * rng.uniform(0.9, 1.2)),
+                preferred_counties=rng.sample([county for county, _, _ in COUNTIES], 3),
+                required_by_date=today + timedelta(days=rng.randint(7, 60)),
+                contact_phone=buyer.mpesa_number,
+            )
+
+
+def _market_prices(rng, days, today):
+    for offset in range(days):
+        price_date = today - timedelta(days=offset)
+        for market, _ in MarketPrice.MARKET_CHOICES:
+            for product, category, unit, price in PRODUCTS:
+                average = price * rng.uniform(0.85, 1.15)
+                yield MarketPrice(
+                    product_name=product,
+                    category=category,
+                    market=market,
+                    unit=unit,
+                    min_price=_money(average * 0.9),
+                    max_price=_money(average * 1.1),
+                    average_price=_money(average),
+                    price_date=price_date,
+                    source='synthetic',
+                )
+
+
+def _weather(rng, hours, now):
+    start = now.replace(minute=0, second=0, microsecond=0)
+    for offset in range(hours):
+        timestamp = start - timedelta(hours=offset)
+        for county, latitude, longitude in COUNTIES:
+            condition, description, icon = rng.choice(CONDITIONS)
+            temperature = 12 + 14 * rng.random() + (4 if 9 <= timestamp.hour <= 16 else 0)
+            yield WeatherData(
+                county=county,
+                # '' as in weather/ingestion.py; NULLs would never hit the unique key
+                sub_county='',
+                latitude=Decimal(str(latitude)),
+                longitude=Decimal(str(longitude)),
+                temperature=_money(temperature),
+                feels_like=_money(temperature - 1),
+                humidity=rng.randint(30, 95),
+                pressure=_money(rng.uniform(1005, 1020)),
+                weather_condition=condition,
+                weather_description=description,
+                weather_icon=icon,
+                wind_speed=_money(rng.uniform(0, 12)),
+                wind_direction=rng.randint(0, 359),
+                rain_1h=_money(rng.uniform(0, 8)) if condition != 'Clear' else None,
+                timestamp=timestamp,
+            )
+
+
+def generate_dataset(seed=0, prefix='synthetic', batch_size=2000, log=None, **scale):
+    """Write a synthetic dataset; scale keys override DEFAULT_SCALE. Returns row counts."""
+    scale = {**DEFAULT_SCALE, **scale}
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    now = timezone.now()
+    today = timezone.localdate()
+    password = make_password(None)
+    crops, loan_products = catalogue()
+    counts = {'farmers': 0}
+
+    # Each batch of farmers is written with its own rows, keeping memory flat
+    for users in batched(_users(rng, prefix, 'farmer', scale['farmers'], password), batch_size):
+        with transaction.atomic():
+            users = get_user_model().objects.bulk_create(users)
+            rows = _farm_rows(rng, users, scale, today, crops, loan_products)
+        reset_queries()
+        counts['farmers'] += len(users)
+        for name, count in rows.items():
+            counts[name] = counts.get(name, 0) + count
+        log(f"{counts['farmers']} farmers, {sum(counts.values())} rows")
+
+    counts['buyers'] = counts['buyer_requests'] = 0
+    for buyers in batched(_users(rng, prefix, 'buyer', scale['buyers'], password), batch_size):
+        with transaction.atomic():
+            buyers = get_user_model().objects.bulk_create(buyers)
+            requests = BuyerRequest.objects.bulk_create(
+                _buyer_requests(rng, buyers, scale['requests_per_buyer'], today)
+            )
+        reset_queries()
+        counts['buyers'] += len(buyers)
+        counts['buyer_requests'] += len(requests)
+    log(f"{counts['buyers']} buyers")
+
+    # Prices already stored for a product, market and day are kept
+    counts['market_prices'] = bulk_insert(
+        MarketPrice, _market_prices(rng, scale['price_days'], today), batch_size,
+        ignore_conflicts=True,
+    )
+    log(f"{counts['market_prices']} market prices")
+    # Observations already stored for a county and hour are kept
+    counts['weather'] = bulk_insert(
+        WeatherData, _weather(rng, scale['weather_days'] * 24, now), batch_size,
+        ignore_conflicts=True,
+    )
+    latest = WeatherData.objects.filter(timestamp=now.replace(minute=0, second=0, microsecond=0))
+    update_current_weather(latest)
+    log(f"{counts['weather']} weather observations")
+    return counts
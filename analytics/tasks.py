@@ -0,0 +1,20 @@
+import logging
+
+from celery import shared_task
+
+from .trends import compute_market_trends
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def compute_market_trends_task(period_days=7, periods=1, batch_size=1000):
+    """Nightly computation of market trends from market price history"""
+    stats = compute_market_trends(
+        period_days=period_days, periods=periods, batch_size=batch_size
+    )
+    logger.info(
+        'Computed %(rows)s market trends over %(periods)s periods '
+        'in %(seconds).1fs (%(rows_per_second).0f rows/s)', stats
+    )
+    return stats
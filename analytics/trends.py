@@ -0,0 +1,140 @@
+"""
+Batch computation of MarketTrend rows from MarketPrice history.
+"""
+
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Avg, Count, Max, Q
+
+from marketplace.models import MarketPrice
+from .models import MarketTrend
+
+TREND_UPDATE_FIELDS = [
+    'category', 'current_avg_price', 'previous_avg_price',
+    'price_change_percentage', 'current_volume', 'previous_volume',
+    'volume_change_percentage', 'created_at',
+]
+
+# Largest value a max_digits=5, decimal_places=2 percentage column can hold
+MAX_PERCENTAGE = Decimal('999.99')
+
+CENTS = Decimal('0.01')
+
+
+def _change_percentage(current, previous):
+    if not previous:
+        return Decimal('0')
+    value = ((Decimal(current) - Decimal(previous)) / Decimal(previous)) * 100
+    value = max(min(value, MAX_PERCENTAGE), -MAX_PERCENTAGE)
+    return value.quantize(CENTS)
+
+
+def period_price_rows(period_start, period_end):
+    """Per product/market averages for a period and the period before it.
+
+    Both windows are aggregated in one grouped pass over the price table;
+    products without prices in both windows are left out.
+    """
+    period_days = (period_end - period_start).days + 1
+    previous_start = period_start - timedelta(days=period_days)
+
+    current = Q(price_date__gte=period_start)
+    previous = Q(price_date__lt=period_start)
+
+    return MarketPrice.objects.filter(
+        price_date__gte=previous_start,
+        price_date__lte=period_end
+    ).values(
+        # Exactly the trend's unique key, so no batch upserts a row twice
+        'product_name', 'market'
+    ).annotate(
+        # A product reported under several categories takes one of the current window's
+        category=Max('category', filter=current),
+        current_avg=Avg('average_price', filter=current),
+        previous_avg=Avg('average_price', filter=previous),
+        current_reports=Count('id', filter=current),
+        previous_reports=Count('id', filter=previous),
+    ).filter(
+        current_reports__gt=0,
+        previous_reports__gt=0
+    ).order_by()
+
+
+def build_trend(row, period_start, period_end):
+    """Build an unsaved MarketTrend from a period_price_rows() row.
+
+    MarketPrice records no traded quantities, so volume is the number of
+    price reports in each window.
+    """
+    current_avg = Decimal(row['current_avg']).quantize(CENTS)
+    previous_avg = Decimal(row['previous_avg']).quantize(CENTS)
+
+    return MarketTrend(
+        product_name=row['product_name'],
+        category=row['category'],
+        market=row['market'],
+        current_avg_price=current_avg,
+        previous_avg_price=previous_avg,
+        price_change_percentage=_change_percentage(current_avg, previous_avg),
+        current_volume=row['current_reports'],
+        previous_volume=row['previous_reports'],
+        volume_change_percentage=_change_percentage(
+            row['current_reports'], row['previous_reports']
+        ),
+        period_start=period_start,
+        period_end=period_end,
+    )
+
+
+def _save_trends(trends):
+    MarketTrend.objects.bulk_create(
+        trends,
+        update_conflicts=True,
+        unique_fields=['product_name', 'market', 'period_start', 'period_end'],
+        update_fields=TREND_UPDATE_FIELDS,
+    )
+
+
+def compute_period_trends(period_end, period_days=7, batch_size=1000):
+    """Compute and upsert trends for the period ending on period_end"""
+    period_start = period_end - timedelta(days=period_days - 1)
+    written = 0
+    batch = []
+
+    rows = period_price_rows(period_start, period_end)
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(build_trend(row, period_start, period_end))
+        if len(batch) >= batch_size:
+            _save_trends(batch)
+            written += len(batch)
+            batch = []
+
+    if batch:
+        _save_trends(batch)
+        written += len(batch)
+
+    return written
+
+
+def compute_market_trends(period_end=None, period_days=7, periods=1, batch_size=1000):
+    """Compute trends for consecutive periods walking back from period_end.
+
+    Returns throughput statistics so the job can be sized as markets grow.
+    """
+    period_end = period_end or date.today()
+    started = time.monotonic()
+    rows = 0
+
+    for index in range(periods):
+        end = period_end - timedelta(days=period_days * index)
+        rows += compute_period_trends(end, period_days, batch_size)
+
+    seconds = time.monotonic() - started
+    return {
+        'periods': periods,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0,
+    }
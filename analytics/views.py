@@ -2,13 +2,15 @@ from django.shortcuts import render
 from django.views.generic import View, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import JsonResponse
-from django.db.models import Sum, Avg, Count, F
+from django.db.models import Sum, F
 from django.utils import timezone
 from datetime import datetime, timedelta
 
 from farmers.models import FarmerProfile, FarmingHistory
 from marketplace.models import Transaction
-from .models import FarmerAnalytics, MarketTrend
+from .models import FarmerAnalytics, MarketTrend, CropYearRollup
+from .rollups import get_farmer_analytics
+from .services import get_farming_history_grid
 
 
 class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
@@ -25,63 +27,25 @@ class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
             profile = None
         
         if profile:
-            # Yield data
             current_year = timezone.now().year
+            analytics = get_farmer_analytics(profile)
             
-            context['total_yield'] = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                year=current_year,
-                actual_yield__isnull=False
-            ).aggregate(total=Sum('actual_yield'))['total'] or 0
-            
-            # Revenue
-            context['total_revenue'] = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                year=current_year,
-                total_revenue__isnull=False
-            ).aggregate(total=Sum('total_revenue'))['total'] or 0
-            
-            # Profit
-            context['total_profit'] = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                year=current_year,
-                total_revenue__isnull=False,
-                total_cost__isnull=False
-            ).aggregate(
-                profit=Sum(F('total_revenue') - F('total_cost'))
-            )['profit'] or 0
+            # Yield, revenue and profit
+            context['total_yield'] = analytics.total_yield_current_year
+            context['total_revenue'] = analytics.total_revenue_current_year
+            context['total_profit'] = analytics.net_profit_current_year
             
             # Top crops
-            context['top_crops'] = FarmingHistory.objects.filter(
+            context['top_crops'] = CropYearRollup.objects.filter(
                 farmer_profile=profile,
                 year=current_year
-            ).values('crop_name').annotate(
-                total_yield=Sum('actual_yield')
-            ).order_by('-total_yield')[:5]
+            ).values('crop_name', 'total_yield', 'total_revenue').order_by('-total_yield')[:5]
             
             # Monthly data for charts
-            context['monthly_data'] = self.get_monthly_data(profile, current_year)
+            grid = get_farming_history_grid(profile, years=[current_year])
+            context['monthly_data'] = grid.monthly_series(current_year)
         
         return context
-    
-    def get_monthly_data(self, profile, year):
-        """Get monthly yield and revenue data"""
-        data = []
-        for month in range(1, 13):
-            month_data = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                year=year,
-                planting_date__month=month
-            ).aggregate(
-                yield_total=Sum('actual_yield'),
-                revenue_total=Sum('total_revenue')
-            )
-            data.append({
-                'month': month,
-                'yield': float(month_data['yield_total'] or 0),
-                'revenue': float(month_data['revenue_total'] or 0)
-            })
-        return data
 
 
 class YieldAnalyticsView(LoginRequiredMixin, TemplateView):
@@ -98,23 +62,13 @@ class YieldAnalyticsView(LoginRequiredMixin, TemplateView):
             profile = None
         
         if profile:
+            grid = get_farming_history_grid(profile)
+            
             # Yield by crop
-            context['yield_by_crop'] = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                actual_yield__isnull=False
-            ).values('crop_name').annotate(
-                total_yield=Sum('actual_yield'),
-                avg_yield=Avg('actual_yield'),
-                count=Count('id')
-            ).order_by('-total_yield')
+            context['yield_by_crop'] = grid.yield_by_crop()
             
             # Yield by year
-            context['yield_by_year'] = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                actual_yield__isnull=False
-            ).values('year').annotate(
-                total_yield=Sum('actual_yield')
-            ).order_by('year')
+            context['yield_by_year'] = grid.yield_by_year()
             
             # Yield by parcel
             context['yield_by_parcel'] = FarmingHistory.objects.filter(
@@ -142,15 +96,15 @@ class ProfitabilityView(LoginRequiredMixin, TemplateView):
             profile = None
         
         if profile:
+            rollups = CropYearRollup.objects.filter(farmer_profile=profile)
+            
             # Profit by crop
-            context['profit_by_crop'] = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                total_revenue__isnull=False,
-                total_cost__isnull=False
+            context['profit_by_crop'] = rollups.filter(
+                costed_records__gt=0
             ).values('crop_name').annotate(
-                total_revenue=Sum('total_revenue'),
-                total_cost=Sum('total_cost'),
-                profit=Sum(F('total_revenue') - F('total_cost'))
+                total_revenue=Sum('costed_revenue'),
+                total_cost=Sum('costed_cost'),
+                profit=Sum(F('costed_revenue') - F('costed_cost'))
             ).order_by('-profit')
             
             # ROI by crop
@@ -161,9 +115,9 @@ class ProfitabilityView(LoginRequiredMixin, TemplateView):
                     item['roi'] = 0
             
             # Cost breakdown
-            context['total_costs'] = FarmingHistory.objects.filter(
-                farmer_profile=profile
-            ).aggregate(total=Sum('total_cost'))['total'] or 0
+            context['total_costs'] = rollups.aggregate(
+                total=Sum('total_cost')
+            )['total'] or 0
         
         return context
 
@@ -208,62 +162,23 @@ class FarmPerformanceView(LoginRequiredMixin, TemplateView):
         
         if profile:
             # Performance metrics
-            current_year = timezone.now().year
+            analytics = get_farmer_analytics(profile)
             
-            context['yield_per_acre'] = self.calculate_yield_per_acre(profile, current_year)
-            context['revenue_per_acre'] = self.calculate_revenue_per_acre(profile, current_year)
+            context['yield_per_acre'] = self.per_acre(
+                analytics.total_yield_current_year, analytics
+            )
+            context['revenue_per_acre'] = self.per_acre(
+                analytics.total_revenue_current_year, analytics
+            )
             
             # Comparison with previous year
-            prev_year = current_year - 1
-            
-            current_yield = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                year=current_year,
-                actual_yield__isnull=False
-            ).aggregate(total=Sum('actual_yield'))['total'] or 0
-            
-            previous_yield = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                year=prev_year,
-                actual_yield__isnull=False
-            ).aggregate(total=Sum('actual_yield'))['total'] or 0
-            
-            if previous_yield > 0:
-                context['yield_growth'] = ((current_yield - previous_yield) / previous_yield) * 100
-            else:
-                context['yield_growth'] = 0
+            context['yield_growth'] = analytics.yield_growth_percentage
         
         return context
     
-    def calculate_yield_per_acre(self, profile, year):
-        total_yield = FarmingHistory.objects.filter(
-            farmer_profile=profile,
-            year=year,
-            actual_yield__isnull=False
-        ).aggregate(total=Sum('actual_yield'))['total'] or 0
-        
-        total_area = FarmingHistory.objects.filter(
-            farmer_profile=profile,
-            year=year,
-            area_planted__isnull=False
-        ).aggregate(total=Sum('area_planted'))['total'] or 1
-        
-        return total_yield / total_area if total_area > 0 else 0
-    
-    def calculate_revenue_per_acre(self, profile, year):
-        total_revenue = FarmingHistory.objects.filter(
-            farmer_profile=profile,
-            year=year,
-            total_revenue__isnull=False
-        ).aggregate(total=Sum('total_revenue'))['total'] or 0
-        
-        total_area = FarmingHistory.objects.filter(
-            farmer_profile=profile,
-            year=year,
-            area_planted__isnull=False
-        ).aggregate(total=Sum('area_planted'))['total'] or 1
-        
-        return total_revenue / total_area if total_area > 0 else 0
+    def per_acre(self, total, analytics):
+        total_area = analytics.area_planted_current_year or 1
+        return total / total_area if total_area > 0 else 0
 
 
 class ReportsView(LoginRequiredMixin, TemplateView):
@@ -325,19 +240,11 @@ class AnalyticsDataAPIView(LoginRequiredMixin, View):
         except:
             return JsonResponse({'data': []})
         
-        data = []
-        for month in range(1, 13):
-            total = FarmingHistory.objects.filter(
-                farmer_profile=profile,
-                year=year,
-                planting_date__month=month,
-                actual_yield__isnull=False
-            ).aggregate(total=Sum('actual_yield'))['total'] or 0
-            
-            data.append({
-                'month': month,
-                'yield': float(total)
-            })
+        grid = get_farming_history_grid(profile, years=[year])
+        data = [
+            {'month': item['month'], 'yield': item['yield']}
+            for item in grid.monthly_series(year)
+        ]
         
         return JsonResponse({'data': data})
     
@@ -350,13 +257,8 @@ class AnalyticsDataAPIView(LoginRequiredMixin, View):
         except:
             return JsonResponse({'data': []})
         
-        data = list(FarmingHistory.objects.filter(
-            farmer_profile=profile,
-            year=year,
-            total_revenue__isnull=False
-        ).values('crop_name').annotate(
-            revenue=Sum('total_revenue')
-        ).order_by('-revenue'))
+        grid = get_farming_history_grid(profile, years=[year])
+        data = grid.revenue_by_crop(year)
         
         return JsonResponse({'data': data})
     
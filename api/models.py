@@ -0,0 +1,49 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from accounts.models import UserDevice
+
+User = get_user_model()
+
+
+class SyncTombstone(models.Model):
+    """Deleted record that offline devices still have to drop (see api/sync.py)"""
+    
+    # No database constraint: tombstones are written while the owner itself
+    # may be being deleted, and are pruned by age instead
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    resource = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.resource} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class SyncOperation(models.Model):
+    """Offline write already handled, so a retried upload is not applied twice"""
+    
+    device = models.ForeignKey(
+        UserDevice, on_delete=models.CASCADE, related_name='sync_operations'
+    )
+    operation_id = models.CharField(max_length=64)
+    resource = models.CharField(max_length=30)
+    result = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['device', 'operation_id']
+        indexes = [
+            models.Index(fields=['created_at'], name='syncop_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.operation_id} ({self.result.get('status')})"
@@ -1,20 +1,45 @@
+from django.conf import settings
 from rest_framework import serializers
-from crops.models import Crop, FarmerCrop
+from crops.models import Crop, FarmerCrop, Livestock, PestDiseaseDetection
 from marketplace.models import ProduceListing, MarketPrice
 from weather.models import WeatherData, ClimateAlert
-from farmers.models import FarmerProfile
+from farmers.geometry import GeometryError, parcel_geometry
+from farmers.models import FarmerProfile, FarmParcel, FarmingHistory
+from kilimo_guru.images import variant_url
+
+
+class ImageVariantsField(serializers.Field):
+    """URLs of the original and the resized variants of an image field"""
+    
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+    
+    def to_representation(self, instance):
+        field_file = getattr(instance, self.image_field)
+        if not field_file:
+            return None
+        request = self.context.get('request')
+        absolute = request.build_absolute_uri if request else str
+        urls = {'original': absolute(field_file.url)}
+        for variant in settings.IMAGE_VARIANTS:
+            urls[variant] = absolute(variant_url(instance, self.image_field, variant))
+        return urls
 
 
 class CropSerializer(serializers.ModelSerializer):
     """Serializer for crops"""
     
+    image_variants = ImageVariantsField('image')
+    
     class Meta:
         model = Crop
         fields = [
             'id', 'name', 'local_name', 'scientific_name', 'category',
             'optimal_temperature_min', 'optimal_temperature_max',
             'rainfall_requirement_min', 'rainfall_requirement_max',
-            'growing_period_days', 'description', 'image'
+            'growing_period_days', 'description', 'image', 'image_variants'
         ]
 
 
@@ -36,6 +61,7 @@ class ProduceListingSerializer(serializers.ModelSerializer):
     """Serializer for produce listings"""
     
     farmer_name = serializers.CharField(source='farmer.get_full_name', read_only=True)
+    image_1_variants = ImageVariantsField('image_1')
     
     class Meta:
         model = ProduceListing
@@ -43,7 +69,7 @@ class ProduceListingSerializer(serializers.ModelSerializer):
             'id', 'product_name', 'category', 'variety',
             'quantity_available', 'unit', 'price_per_unit',
             'quality_grade', 'is_organic', 'county',
-            'farmer_name', 'image_1'
+            'farmer_name', 'image_1', 'image_1_variants'
         ]
 
 
@@ -93,3 +119,102 @@ class ClimateAlertSerializer(serializers.ModelSerializer):
             'id', 'alert_type', 'severity', 'title', 'description',
             'counties', 'recommended_actions', 'issued_at', 'expires_at'
         ]
+
+
+class PestDiseaseDetectionSerializer(serializers.ModelSerializer):
+    """Serializer for pest/disease detection results"""
+    
+    detected_pest_disease_name = serializers.CharField(
+        source='detected_pest_disease.name', read_only=True, default=None
+    )
+    
+    class Meta:
+        model = PestDiseaseDetection
+        fields = [
+            'id', 'image', 'status', 'detected_pest_disease', 'detected_pest_disease_name',
+            'confidence_score', 'ai_suggestions', 'is_verified', 'expert_notes',
+            'classifier_version', 'processed_at', 'created_at'
+        ]
+
+
+class OwnParcelMixin:
+    """Rejects parcels that belong to another farmer"""
+    
+    def validate_parcel(self, parcel):
+        user = self.context['request'].user
+        if parcel is not None and parcel.farmer_profile.user_id != user.pk:
+            raise serializers.ValidationError('Unknown parcel.')
+        return parcel
+
+
+class SyncFarmParcelSerializer(serializers.ModelSerializer):
+    """Offline writes to farm parcels"""
+    
+    class Meta:
+        model = FarmParcel
+        fields = [
+            'parcel_name', 'size', 'size_unit', 'boundary_coordinates',
+            'current_crop', 'is_active', 'soil_type', 'soil_ph', 'notes'
+        ]
+    
+    def validate_boundary_coordinates(self, value):
+        if value:
+            try:
+                parcel_geometry(value)
+            except GeometryError as exc:
+                raise serializers.ValidationError(str(exc))
+        return value
+
+
+class SyncFarmerCropSerializer(OwnParcelMixin, serializers.ModelSerializer):
+    """Offline writes to farmer crops"""
+    
+    class Meta:
+        model = FarmerCrop
+        fields = [
+            'crop', 'variety', 'parcel', 'season', 'year', 'planting_date',
+            'expected_harvest_date', 'actual_harvest_date', 'area_planted',
+            'planting_density', 'status', 'seed_quantity_used',
+            'fertilizers_applied', 'pesticides_applied', 'expected_yield',
+            'actual_yield', 'yield_unit', 'notes'
+        ]
+
+
+class SyncFarmingHistorySerializer(OwnParcelMixin, serializers.ModelSerializer):
+    """Offline writes to farming history"""
+    
+    class Meta:
+        model = FarmingHistory
+        fields = [
+            'parcel', 'crop_name', 'crop_variety', 'season', 'year',
+            'planting_date', 'harvest_date', 'area_planted', 'expected_yield',
+            'actual_yield', 'yield_unit', 'seed_variety', 'fertilizer_used',
+            'pesticides_used', 'total_cost', 'total_revenue', 'notes'
+        ]
+
+
+class SyncLivestockSerializer(serializers.ModelSerializer):
+    """Offline writes to livestock records"""
+    
+    class Meta:
+        model = Livestock
+        fields = [
+            'species', 'breed', 'tag_number', 'name', 'gender', 'date_of_birth',
+            'date_acquired', 'acquisition_method', 'is_healthy', 'health_notes',
+            'vaccination_records', 'is_for_breeding', 'is_for_meat',
+            'is_for_milk', 'is_for_eggs', 'is_active', 'date_sold', 'sale_price'
+        ]
+
+
+class SyncProduceListingSerializer(serializers.ModelSerializer):
+    """Offline writes to the farmer's own produce listings"""
+    
+    class Meta:
+        model = ProduceListing
+        fields = [
+            'product_name', 'category', 'variety', 'description',
+            'quantity_available', 'unit', 'price_per_unit', 'is_negotiable',
+            'quality_grade', 'is_organic', 'certifications', 'county',
+            'sub_county', 'pickup_location', 'available_from',
+            'available_until', 'status'
+        ]
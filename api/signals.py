@@ -0,0 +1,19 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete
+
+from .models import SyncTombstone
+from .sync import MODEL_RESOURCES
+
+
+def record_deletion(sender, instance, **kwargs):
+    """Leave a tombstone so offline copies of a deleted record are dropped"""
+    resource = MODEL_RESOURCES[sender]
+    try:
+        user_id = resource.owner_id(instance)
+    except ObjectDoesNotExist:
+        return
+    SyncTombstone.objects.create(user_id=user_id, resource=resource.name, object_id=instance.pk)
+
+
+for model in MODEL_RESOURCES:
+    post_delete.connect(record_deletion, sender=model, dispatch_uid=f'sync_tombstone_{model._meta.label}')
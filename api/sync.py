@@ -0,0 +1,338 @@
+"""
+Delta synchronisation for offline (PWA) clients.
+
+Pull: a device asks for the records of its user that changed after its
+cursor. Each resource is read with a keyset scan on its (owner, updated_at)
+index, ordered by (updated_at, pk), as plain column values, at most
+SYNC_PAGE_SIZE rows per resource and page. The cursor is an opaque token
+holding the time the device is in sync up to and, while a sync spans
+several pages, the position reached in each resource, so paging never
+skips or repeats rows even when many share a timestamp. A sync window ends
+CURSOR_LAG before the request, so rows saved by transactions that have not
+committed yet are picked up by the next sync instead of being skipped.
+Deletions are read from SyncTombstone rows left by a post_delete signal
+(api/signals.py) and kept for SYNC_RETENTION_DAYS; a device whose cursor is
+older than that is told to reset and gets a full copy.
+
+Push: offline writes arrive as a batch of operations. Updates and deletes
+carry the ``updated_at`` the device last saw; when the server copy has
+changed since, the operation is rejected as a conflict and the server copy
+returned so the device can merge and retry. Applied operations are recorded
+per device by their id, so a batch retried over a flaky connection is
+applied once. A create can be referenced by later operations as
+``"@<operation id>"`` in place of the id it has not got yet.
+"""
+
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import UserDevice
+from crops.models import FarmerCrop, Livestock
+from farmers.models import FarmerProfile, FarmingHistory, FarmParcel
+from marketplace.models import ProduceListing
+
+from .models import SyncOperation, SyncTombstone
+from .serializers import (
+    SyncFarmParcelSerializer, SyncFarmerCropSerializer, SyncFarmingHistorySerializer,
+    SyncLivestockSerializer, SyncProduceListingSerializer
+)
+
+# Longer than any write transaction is expected to stay open
+CURSOR_LAG = timedelta(seconds=10)
+
+ACTIONS = ('create', 'update', 'delete')
+DELETED = '_deleted'
+
+
+class SyncError(ValueError):
+    """Raised for a malformed cursor or batch of operations"""
+
+
+class SyncResource:
+    """A model that devices keep an offline copy of"""
+
+    def __init__(self, name, model, owner, serializer_class, extra_fields=(), owner_object=None):
+        self.name = name
+        self.model = model
+        self.owner = owner
+        self.serializer_class = serializer_class
+        self.fields = ['id', *serializer_class.Meta.fields, *extra_fields, 'updated_at']
+        self.relations = {
+            field.name for field in model._meta.get_fields()
+            if field.many_to_one and field.name in serializer_class.Meta.fields
+        }
+        self.owner_object = owner_object or (lambda user: user)
+
+    def owned(self, user):
+        return self.model._default_manager.filter(**{self.owner: user})
+
+    def owner_id(self, instance):
+        """User id of the owner of instance, following the owner lookup"""
+        *path, last = self.owner.split('__')
+        for name in path:
+            instance = getattr(instance, name)
+        return getattr(instance, f'{last}_id')
+
+    def owner_values(self, user):
+        """Field values that make a new record belong to user, or None"""
+        owner = self.owner_object(user)
+        return None if owner is None else {self.owner.split('__')[0]: owner}
+
+    def record(self, user, pk):
+        return self.owned(user).filter(pk=pk).values(*self.fields).first()
+
+
+def _farmer_profile(user):
+    return FarmerProfile.objects.filter(user=user).first()
+
+
+RESOURCES = {
+    resource.name: resource for resource in [
+        SyncResource(
+            'parcels', FarmParcel, 'farmer_profile__user', SyncFarmParcelSerializer,
+            extra_fields=['area_sq_m', 'centroid_latitude', 'centroid_longitude'],
+            owner_object=_farmer_profile,
+        ),
+        SyncResource('farmer_crops', FarmerCrop, 'farmer', SyncFarmerCropSerializer),
+        SyncResource(
+            'farming_history', FarmingHistory, 'farmer_profile__user', SyncFarmingHistorySerializer,
+            owner_object=_farmer_profile,
+        ),
+        SyncResource('livestock', Livestock, 'farmer', SyncLivestockSerializer),
+        SyncResource(
+            'produce_listings', ProduceListing, 'farmer', SyncProduceListingSerializer,
+            extra_fields=['view_count', 'inquiry_count'],
+        ),
+    ]
+}
+
+MODEL_RESOURCES = {resource.model: resource for resource in RESOURCES.values()}
+
+
+def _timestamp(value):
+    """ISO 8601 text of a datetime as rendered in API responses"""
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+def _datetime(value):
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Invalid timestamp {value!r}')
+    return parsed
+
+
+def encode_cursor(since, until=None, positions=None):
+    """Opaque cursor token; positions are only kept while a sync is paging"""
+    state = {'s': since and _timestamp(since)}
+    if positions:
+        state['u'] = _timestamp(until)
+        state['p'] = {name: [_timestamp(at), pk] for name, (at, pk) in positions.items()}
+    text = json.dumps(state, separators=(',', ':'))
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(since, until, positions) of a cursor token"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        positions = {
+            name: [_datetime(at), int(pk)] for name, (at, pk) in state.get('p', {}).items()
+        }
+        return _datetime(state['s']), _datetime(state.get('u')), positions
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise SyncError('Invalid sync cursor')
+
+
+def _page(queryset, time_field, fields, after, size):
+    """Next rows of a keyset scan over (time_field, pk)"""
+    if after:
+        queryset = queryset.filter(
+            Q(**{f'{time_field}__gt': after[0]}) | Q(**{time_field: after[0], 'pk__gt': after[1]})
+        )
+    rows = list(queryset.order_by(time_field, 'pk').values(*fields)[:size + 1])
+    more = len(rows) > size
+    rows = rows[:size]
+    position = [rows[-1][time_field], rows[-1]['id']] if rows else after
+    return rows, position, more
+
+
+def pull_changes(user, since=None, until=None, positions=None, page_size=None):
+    """One page of the user's records changed after since.
+
+    until and positions come from the cursor of a sync that is still
+    paging. The returned cursor continues the sync while ``more`` is set;
+    otherwise ``synced_until`` is the time the device is now in sync up to.
+    """
+    page_size = page_size or settings.SYNC_PAGE_SIZE
+    positions = dict(positions or {})
+    reset = False
+    if until is None:
+        now = timezone.now()
+        until = now - CURSOR_LAG
+        if since is not None and since < now - timedelta(days=settings.SYNC_RETENTION_DAYS):
+            # Tombstones this old are gone; the device must start over
+            since, reset = None, True
+
+    page = {'changes': {}, 'deleted': {}, 'more': False, 'reset': reset}
+    for resource in RESOURCES.values():
+        queryset = resource.owned(user).filter(updated_at__lte=until)
+        if since is not None:
+            queryset = queryset.filter(updated_at__gt=since)
+        rows, position, more = _page(
+            queryset, 'updated_at', resource.fields, positions.get(resource.name), page_size
+        )
+        if rows:
+            page['changes'][resource.name] = rows
+        if position:
+            positions[resource.name] = position
+        page['more'] = page['more'] or more
+
+    if since is not None:
+        tombstones = SyncTombstone.objects.filter(
+            user=user, deleted_at__gt=since, deleted_at__lte=until
+        )
+        rows, position, more = _page(
+            tombstones, 'deleted_at', ['id', 'resource', 'object_id', 'deleted_at'],
+            positions.get(DELETED), page_size
+        )
+        for row in rows:
+            page['deleted'].setdefault(row['resource'], []).append(row['object_id'])
+        if position:
+            positions[DELETED] = position
+        page['more'] = page['more'] or more
+
+    if page['more']:
+        page['cursor'] = encode_cursor(since, until, positions)
+    else:
+        page['cursor'] = encode_cursor(until)
+        page['synced_until'] = until
+    return page
+
+
+def _parse_operation(operation):
+    if not isinstance(operation, dict):
+        raise SyncError('Operation must be an object')
+    operation_id = operation.get('id')
+    if not isinstance(operation_id, str) or not 0 < len(operation_id) <= 64:
+        raise SyncError('Operation id must be a string of up to 64 characters')
+    resource = RESOURCES.get(operation.get('resource'))
+    if resource is None:
+        raise SyncError(f"Unknown resource; expected one of {', '.join(RESOURCES)}")
+    action = operation.get('action')
+    if action not in ACTIONS:
+        raise SyncError(f"Unknown action; expected one of {', '.join(ACTIONS)}")
+    data = operation.get('data', {})
+    if not isinstance(data, dict):
+        raise SyncError('Operation data must be an object')
+
+    pk = base = None
+    if action != 'create':
+        pk = operation.get('pk')
+        if not isinstance(pk, int):
+            raise SyncError('Updates and deletes need the record pk')
+        try:
+            base = _datetime(operation.get('base_updated_at'))
+        except (ValueError, TypeError):
+            base = None
+        if base is None:
+            raise SyncError('Updates and deletes need base_updated_at')
+    return operation_id, resource, action, pk, base, data
+
+
+def _resolve_references(resource, data, device):
+    """Replace "@<operation id>" in relation fields with the id it created"""
+    data = dict(data)
+    for name in resource.relations & set(data):
+        value = data[name]
+        if isinstance(value, str) and value.startswith('@'):
+            done = SyncOperation.objects.filter(device=device, operation_id=value[1:]).first()
+            if done is None or done.result.get('status') != 'applied':
+                raise SyncError(f'{name} refers to unknown operation {value[1:]}')
+            data[name] = done.result['pk']
+    return data
+
+
+def _apply(request, device, resource, action, pk, base, data):
+    user = request.user
+    context = {'request': request}
+    if action == 'create':
+        owner = resource.owner_values(user)
+        if owner is None:
+            return {'status': 'invalid', 'errors': {'non_field_errors': ['Create a farmer profile first.']}}
+        serializer = resource.serializer_class(data=data, context=context)
+        if not serializer.is_valid():
+            return {'status': 'invalid', 'errors': serializer.errors}
+        instance = serializer.save(**owner)
+        return {'status': 'applied', 'pk': instance.pk, 'updated_at': _timestamp(instance.updated_at)}
+
+    instance = resource.owned(user).select_for_update().filter(pk=pk).first()
+    if instance is None:
+        return {'status': 'conflict', 'reason': 'deleted', 'pk': pk, 'record': None}
+    if instance.updated_at != base:
+        return {'status': 'conflict', 'reason': 'modified', 'pk': pk, 'record': resource.record(user, pk)}
+
+    if action == 'delete':
+        instance.delete()
+        return {'status': 'applied', 'pk': pk}
+    serializer = resource.serializer_class(instance, data=data, partial=True, context=context)
+    if not serializer.is_valid():
+        return {'status': 'invalid', 'pk': pk, 'errors': serializer.errors}
+    instance = serializer.save()
+    return {'status': 'applied', 'pk': pk, 'updated_at': _timestamp(instance.updated_at)}
+
+
+def apply_operation(request, device, operation):
+    """Apply one offline write; returns its result for the device"""
+    try:
+        operation_id, resource, action, pk, base, data = _parse_operation(operation)
+    except SyncError as exc:
+        operation_id = operation.get('id') if isinstance(operation, dict) else None
+        return {'id': operation_id, 'status': 'invalid', 'errors': {'non_field_errors': [str(exc)]}}
+
+    done = SyncOperation.objects.filter(device=device, operation_id=operation_id).first()
+    if done is not None:
+        return done.result
+
+    try:
+        with transaction.atomic():
+            data = _resolve_references(resource, data, device)
+            result = {'id': operation_id, **_apply(request, device, resource, action, pk, base, data)}
+            if result['status'] == 'applied':
+                # Conflicts and invalid writes are not recorded so a retry is re-evaluated
+                SyncOperation.objects.create(
+                    device=device, operation_id=operation_id, resource=resource.name, result=result
+                )
+    except (SyncError, DatabaseError) as exc:
+        result = {'id': operation_id, 'status': 'invalid', 'errors': {'non_field_errors': [str(exc)]}}
+    return result
+
+
+def push_operations(request, device, operations):
+    """Apply a batch of offline writes in order; returns one result per operation"""
+    if not isinstance(operations, list):
+        raise SyncError('operations must be a list')
+    if len(operations) > settings.SYNC_MAX_OPERATIONS:
+        raise SyncError(f'At most {settings.SYNC_MAX_OPERATIONS} operations per request')
+
+    with transaction.atomic():
+        # Serialise uploads from one device so a retried batch waits for the first
+        UserDevice.objects.select_for_update().filter(pk=device.pk).first()
+        return [apply_operation(request, device, operation) for operation in operations]
+
+
+def prune_sync_log():
+    """Delete tombstones and operation receipts older than SYNC_RETENTION_DAYS"""
+    cutoff = timezone.now() - timedelta(days=settings.SYNC_RETENTION_DAYS)
+    tombstones, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    operations, _ = SyncOperation.objects.filter(created_at__lt=cutoff).delete()
+    return {'tombstones': tombstones, 'operations': operations}
@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from .sync import prune_sync_log
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def prune_sync_log_task():
+    """Drop sync tombstones and operation receipts past their retention"""
+    stats = prune_sync_log()
+    logger.info('Pruned %(tombstones)s sync tombstones and %(operations)s operation receipts', stats)
+    return stats
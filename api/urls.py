@@ -10,13 +10,15 @@ router.register(r'produce', views.ProduceListingViewSet)
 router.register(r'weather', views.WeatherDataViewSet)
 
 urlpatterns = [
-    path('', include(router.urls)),
-    path('auth/', include('rest_framework.urls')),
-    
-    # Custom endpoints
+    # Custom endpoints come first: the router's weather/<pk>/ would match weather/current/
     path('farmer/profile/', views.FarmerProfileAPIView.as_view(), name='farmer_profile'),
     path('farmer/crops/', views.FarmerCropsAPIView.as_view(), name='farmer_crops'),
     path('market/prices/', views.MarketPricesAPIView.as_view(), name='market_prices'),
     path('weather/current/', views.CurrentWeatherAPIView.as_view(), name='current_weather'),
     path('alerts/', views.AlertsAPIView.as_view(), name='alerts'),
+    path('detections/<int:pk>/', views.DetectionStatusAPIView.as_view(), name='detection_status'),
+    path('detections/clusters/', views.DetectionClustersAPIView.as_view(), name='detection_clusters'),
+    path('sync/', views.SyncAPIView.as_view(), name='sync'),
+    
+    path('', include(router.urls)),
 ]
@@ -1,18 +1,57 @@
+import math
+
 from rest_framework import viewsets, generics, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+
+from accounts.models import UserDevice
 
-from crops.models import Crop, FarmerCrop
-from marketplace.models import ProduceListing, MarketPrice
+from crops.hotspots import detection_clusters
+from crops.models import Crop, FarmerCrop, PestDiseaseDetection
+from marketplace.models import ProduceListing
+from marketplace.nearby import listings_near
+from marketplace.price_board import get_price_board
+from marketplace.search import search_listings
+from weather.county_alerts import county_alerts
 from weather.models import WeatherData, ClimateAlert
+from weather.snapshots import get_current_weather, nearest_current_weather
 from farmers.models import FarmerProfile
 from .serializers import (
     CropSerializer, FarmerCropSerializer, ProduceListingSerializer,
-    MarketPriceSerializer, WeatherDataSerializer, FarmerProfileSerializer,
-    ClimateAlertSerializer
+    WeatherDataSerializer, FarmerProfileSerializer,
+    ClimateAlertSerializer, PestDiseaseDetectionSerializer
 )
+from .sync import SyncError, decode_cursor, pull_changes, push_operations
+
+
+def _coordinates(values):
+    """Finite floats parsed from a comma-separated parameter, or None if malformed"""
+    try:
+        numbers = [float(value) for value in values.split(',')]
+    except (AttributeError, ValueError):
+        return None
+    # float() accepts nan and inf, which no index or distance can use
+    return numbers if all(math.isfinite(number) for number in numbers) else None
+
+
+def _on_earth(latitude, longitude):
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+def _point(values):
+    """(lat, lon) parsed from a "lat,lon" parameter, or None if malformed or out of range"""
+    point = _coordinates(values)
+    if point and len(point) == 2 and _on_earth(*point):
+        return point
+    return None
 
 
 class CropViewSet(viewsets.ReadOnlyModelViewSet):
@@ -52,27 +91,46 @@ class FarmerCropsAPIView(APIView):
 
 
 class ProduceListingViewSet(viewsets.ReadOnlyModelViewSet):
-    """API endpoint for produce listings"""
+    """API endpoint for produce listings.
+
+    ?search= ranks by relevance; ?near=lat,lon&radius=km keeps listings from
+    farms within radius km (default 25).
+    """
     queryset = ProduceListing.objects.filter(status='active')
     serializer_class = ProduceListingSerializer
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = search_listings(queryset, search)
+        
+        if 'near' in self.request.query_params:
+            near = _point(self.request.query_params['near'])
+            if near is None:
+                raise ValidationError({'near': 'Expected lat,lon within -90..90 and -180..180'})
+            radius = _coordinates(self.request.query_params.get('radius', '25'))
+            if not radius or len(radius) != 1 or radius[0] <= 0:
+                raise ValidationError({'radius': 'Expected a positive number of km'})
+            queryset = listings_near(queryset, near[0], near[1], radius[0])
+        return queryset
+
+
+def _market_price_board(request):
+    return get_price_board(request.GET.get('market') or None)
 
 
+def _market_prices_etag(request, *args, **kwargs):
+    return _market_price_board(request)['etag']
+
+
+@method_decorator(condition(etag_func=_market_prices_etag), name='get')
 class MarketPricesAPIView(APIView):
-    """API endpoint for market prices"""
+    """API endpoint for market prices, served from the pre-serialized price board"""
     
     def get(self, request):
-        from datetime import date, timedelta
-        recent_date = date.today() - timedelta(days=7)
-        
-        prices = MarketPrice.objects.filter(price_date__gte=recent_date)
-        
-        # Filter by market
-        market = request.GET.get('market')
-        if market:
-            prices = prices.filter(market=market)
-        
-        serializer = MarketPriceSerializer(prices, many=True)
-        return Response(serializer.data)
+        board = _market_price_board(request)
+        return HttpResponse(board['json'], content_type='application/json')
 
 
 class WeatherDataViewSet(viewsets.ReadOnlyModelViewSet):
@@ -86,17 +144,26 @@ class CurrentWeatherAPIView(APIView):
     
     def get(self, request):
         county = request.GET.get('county')
-        if not county:
-            return Response({'error': 'County parameter required'}, status=400)
+        location = _point(request.GET.get('near'))
+        profile = getattr(request.user, 'farmer_profile', None)
         
-        try:
-            weather = WeatherData.objects.filter(
-                county__iexact=county
-            ).latest('timestamp')
-            serializer = WeatherDataSerializer(weather)
-            return Response(serializer.data)
-        except WeatherData.DoesNotExist:
+        if county:
+            weather = get_current_weather(county)
+        elif 'near' in request.GET:
+            if location is None:
+                return Response({'error': 'near=lat,lon must be within -90..90 and -180..180'}, status=400)
+            weather = nearest_current_weather(*location)
+        elif profile is not None and profile.latitude is not None and profile.longitude is not None:
+            # Nearest station to the farmer's own farm
+            weather = nearest_current_weather(profile.latitude, profile.longitude)
+        else:
+            return Response({'error': 'County or near=lat,lon parameter required'}, status=400)
+        
+        if weather is None:
             return Response({'error': 'No weather data available'}, status=404)
+        
+        serializer = WeatherDataSerializer(weather)
+        return Response(serializer.data)
 
 
 class AlertsAPIView(APIView):
@@ -104,15 +171,93 @@ class AlertsAPIView(APIView):
     
     def get(self, request):
         from django.utils import timezone
-        alerts = ClimateAlert.objects.filter(
-            is_active=True,
-            expires_at__gt=timezone.now()
-        )
         
         # Filter by county
         county = request.GET.get('county')
         if county:
-            alerts = alerts.filter(counties__contains=[county])
+            alerts = county_alerts(county)
+        else:
+            alerts = ClimateAlert.objects.filter(
+                is_active=True,
+                expires_at__gt=timezone.now()
+            )
         
         serializer = ClimateAlertSerializer(alerts, many=True)
         return Response(serializer.data)
+
+
+class DetectionStatusAPIView(APIView):
+    """API endpoint to poll the analysis of one of the user's detection uploads"""
+    
+    # Seconds clients should wait before polling an unfinished detection again
+    POLL_INTERVAL = 3
+    
+    def get(self, request, pk):
+        detection = get_object_or_404(
+            PestDiseaseDetection.objects.select_related('detected_pest_disease'),
+            pk=pk, farmer=request.user
+        )
+        response = Response(PestDiseaseDetectionSerializer(detection).data)
+        if detection.status in ('pending', 'processing'):
+            response['Retry-After'] = str(self.POLL_INTERVAL)
+        return response
+
+
+class DetectionClustersAPIView(APIView):
+    """API endpoint for pest/disease detection clusters in ?bbox=min_lon,min_lat,max_lon,max_lat"""
+    
+    def get(self, request):
+        bbox = _coordinates(request.GET.get('bbox'))
+        if not bbox or len(bbox) != 4 or not (_on_earth(bbox[1], bbox[0]) and _on_earth(bbox[3], bbox[2])):
+            return Response({'error': 'bbox=min_lon,min_lat,max_lon,max_lat parameter required'}, status=400)
+        
+        min_lon, min_lat, max_lon, max_lat = bbox
+        cell = _coordinates(request.GET.get('cell', '0.25'))
+        cell_size = min(max(cell[0], 0.01), 5) if cell else 0.25
+        
+        return Response(detection_clusters(min_lat, min_lon, max_lat, max_lon, cell_size))
+
+
+@method_decorator(gzip_page, name='dispatch')
+class SyncAPIView(APIView):
+    """API endpoint for offline clients to exchange changes (see api/sync.py).
+
+    GET ?device=<id>[&cursor=<token>][&full=1] returns one page of the
+    user's changes since the cursor, or since the device's last sync. POST
+    {"device": <id>, "operations": [...]} applies a batch of offline writes.
+    """
+    
+    def _device(self, request, device_id):
+        if not isinstance(device_id, str) or not device_id:
+            raise SyncError('device parameter required')
+        device, _ = UserDevice.objects.get_or_create(
+            user=request.user, device_id=device_id[:255],
+            defaults={'device_type': 'web'}
+        )
+        return device
+    
+    def get(self, request):
+        try:
+            device = self._device(request, request.GET.get('device'))
+            if request.GET.get('cursor'):
+                since, until, positions = decode_cursor(request.GET['cursor'])
+            elif request.GET.get('full'):
+                since, until, positions = None, None, {}
+            else:
+                since, until, positions = device.last_sync, None, {}
+        except SyncError as exc:
+            return Response({'error': str(exc)}, status=400)
+        
+        page = pull_changes(request.user, since, until, positions)
+        if 'synced_until' in page:
+            UserDevice.objects.filter(pk=device.pk).update(last_sync=page['synced_until'])
+        return Response(page)
+    
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        try:
+            device = self._device(request, data.get('device'))
+            results = push_operations(request, device, data.get('operations'))
+        except SyncError as exc:
+            return Response({'error': str(exc)}, status=400)
+        return Response({'results': results})
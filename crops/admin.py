@@ -50,9 +50,9 @@ class PestDiseaseAdmin(admin.ModelAdmin):
 @admin.register(PestDiseaseDetection)
 class PestDiseaseDetectionAdmin(admin.ModelAdmin):
     list_display = [
-        'farmer', 'detected_pest_disease', 'confidence_score', 'is_verified', 'created_at'
+        'farmer', 'status', 'detected_pest_disease', 'confidence_score', 'is_verified', 'created_at'
     ]
-    list_filter = ['is_verified', 'detected_pest_disease__pest_disease_type']
+    list_filter = ['status', 'is_verified', 'detected_pest_disease__pest_disease_type']
     search_fields = ['farmer__username', 'detected_pest_disease__name']
     date_hierarchy = 'created_at'
 
@@ -5,3 +5,11 @@ class CropsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crops'
     verbose_name = 'Crop & Livestock Management'
+
+    def ready(self):
+        from kilimo_guru.cache import catalog_cache
+        from kilimo_guru.images import image_derivatives
+        from .catalog import CATALOG_MODELS
+        from .models import Crop
+        catalog_cache.register(*CATALOG_MODELS)
+        image_derivatives.register(Crop, 'image')
@@ -0,0 +1,52 @@
+"""
+Cached reference data from the crop catalogue.
+"""
+
+from django.db.models import Q
+
+from kilimo_guru.cache import catalog_cache
+from .models import Crop, CropVariety, PestDisease, PlantingCalendar
+
+CATALOG_MODELS = [Crop, CropVariety, PestDisease, PlantingCalendar]
+
+
+def active_crops():
+    """Active crops, ordered by name"""
+    return catalog_cache.get_or_load(
+        'crops:active',
+        lambda: list(Crop.objects.filter(is_active=True)),
+        models=[Crop],
+    )
+
+
+def planting_regions():
+    """Regions with a planting calendar"""
+    return catalog_cache.get_or_load(
+        'crops:calendar-regions',
+        lambda: list(PlantingCalendar.objects.order_by('region').values_list(
+            'region', flat=True
+        ).distinct()),
+        models=[PlantingCalendar],
+    )
+
+
+def planting_activities(month):
+    """Calendars whose short or long rains planting starts in month"""
+    return catalog_cache.get_or_load(
+        f'crops:calendar-month:{month}',
+        lambda: list(PlantingCalendar.objects.filter(
+            Q(short_rains_start=month) | Q(long_rains_start=month)
+        ).select_related('crop')),
+        models=[PlantingCalendar, Crop],
+    )
+
+
+def active_pests_diseases():
+    """Active pests and diseases with their affected crops prefetched"""
+    return catalog_cache.get_or_load(
+        'crops:pests-diseases',
+        lambda: list(PestDisease.objects.filter(
+            is_active=True
+        ).prefetch_related('affected_crops')),
+        models=[PestDisease, Crop],
+    )
@@ -0,0 +1,37 @@
+"""
+Bounding-box queries over pest and disease detections, for outbreak maps.
+"""
+
+from django.db.models import Count, Max
+
+from kilimo_guru.spatial import GridIndex, spatial_cache
+
+from .models import PestDiseaseDetection
+
+
+def _load_detections():
+    return GridIndex.from_points(
+        PestDiseaseDetection.objects.values_list('pk', 'latitude', 'longitude')
+    )
+
+
+def detection_index():
+    """Grid index of located detections, keyed by detection id"""
+    # Detections are not moved once reported, so count and newest id suffice
+    fingerprint = PestDiseaseDetection.objects.aggregate(count=Count('pk'), newest=Max('pk'))
+    return spatial_cache.get('detections', tuple(fingerprint.values()), _load_detections)
+
+
+def detections_in_bbox(min_lat, min_lon, max_lat, max_lon):
+    """Detections located inside the box"""
+    ids = [key for key, _, _ in detection_index().within_bbox(min_lat, min_lon, max_lat, max_lon)]
+    return PestDiseaseDetection.objects.filter(pk__in=ids)
+
+
+def detection_clusters(min_lat, min_lon, max_lat, max_lon, cell_size=0.25):
+    """Detections inside the box grouped into cells, largest cluster first"""
+    clusters = detection_index().clusters(min_lat, min_lon, max_lat, max_lon, cell_size)
+    clusters.sort(key=lambda cluster: -cluster['count'])
+    for cluster in clusters:
+        cluster['detection_ids'] = cluster.pop('keys')
+    return clusters
@@ -0,0 +1,254 @@
+"""
+Pest and disease identification for uploaded detection photos.
+
+Uploads are saved as ``pending`` and classified off the request path by a
+Celery task (crops/tasks.py) that claims up to DETECTION_BATCH_SIZE pending
+detections at a time, so a burst of uploads costs a few batched passes
+rather than a task per image. Each image is decoded at reduced scale,
+resized to the classifier's input size and reduced to a normalised feature
+vector on a small thread pool (Pillow releases the GIL while decoding and
+resizing); the classifier then scores the whole batch at once.
+
+The classifier is chosen by the PEST_CLASSIFIER setting and loaded once per
+worker process. The bundled ``ColourProfileClassifier`` is a CPU stand-in
+for a trained model: it compares colour profiles against the reference
+images of the PestDisease catalogue.
+"""
+
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from PIL import Image, ImageStat, UnidentifiedImageError
+
+from .models import PestDisease, PestDiseaseDetection
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = [
+    'status', 'detected_pest_disease', 'confidence_score', 'ai_suggestions',
+    'classifier_version', 'processed_at',
+]
+
+# Detections left in processing this long are assumed lost with their worker
+STALE_AFTER = timedelta(minutes=15)
+
+TOP_PREDICTIONS = 3
+HUE_BINS = 18
+LEVEL_BINS = 4
+
+# Hue of pixels less saturated than this is noise
+MIN_SATURATION = 40
+
+
+def load_image(image, size):
+    """RGB image resized to size x size; JPEGs are decoded at reduced scale"""
+    image.draft('RGB', (size * 2, size * 2))
+    return image.convert('RGB').resize((size, size), Image.BILINEAR)
+
+
+def _fold(histogram, bins):
+    width = len(histogram) / bins
+    folded = [0] * bins
+    for value, count in enumerate(histogram):
+        folded[int(value / width)] += count
+    total = sum(folded) or 1
+    return [count / total for count in folded]
+
+
+def colour_features(image):
+    """Unit-length vector of hue, saturation and brightness distributions"""
+    hue, saturation, value = image.convert('HSV').split()
+    saturated = saturation.point(lambda level: 255 if level >= MIN_SATURATION else 0)
+    stats = ImageStat.Stat(image)
+    features = (
+        _fold(hue.histogram(mask=saturated), HUE_BINS)
+        + _fold(saturation.histogram(), LEVEL_BINS)
+        + _fold(value.histogram(), LEVEL_BINS)
+        + [mean / 255 for mean in stats.mean]
+        + [deviation / 128 for deviation in stats.stddev]
+    )
+    norm = math.sqrt(sum(feature * feature for feature in features)) or 1
+    return [feature / norm for feature in features]
+
+
+class PestClassifier:
+    """Interface of PEST_CLASSIFIER implementations.
+
+    preprocess() turns one PIL image into model input and predict() scores
+    a batch of inputs, returning (pest_disease_id, probability) pairs per
+    input, most likely first.
+    """
+
+    version = ''
+    input_size = 64
+
+    def preprocess(self, image):
+        raise NotImplementedError
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+
+class ColourProfileClassifier(PestClassifier):
+    """Nearest-prototype classifier over colour profiles of catalogue images"""
+
+    version = 'colour-profile-1'
+    temperature = 0.05
+
+    def __init__(self):
+        self.prototypes = []
+        catalogue = PestDisease.objects.filter(is_active=True).exclude(image='').exclude(image=None)
+        for pest in catalogue.only('pk', 'image'):
+            try:
+                with pest.image.open('rb') as handle:
+                    self.prototypes.append((pest.pk, self.preprocess(Image.open(handle))))
+            except (OSError, ValueError, UnidentifiedImageError):
+                logger.warning('Skipping unreadable reference image for pest %s', pest.pk)
+
+    def preprocess(self, image):
+        return colour_features(load_image(image, self.input_size))
+
+    def predict(self, batch):
+        results = []
+        for features in batch:
+            scores = [
+                (sum(a * b for a, b in zip(features, prototype)) / self.temperature, pest_id)
+                for pest_id, prototype in self.prototypes
+            ]
+            if not scores:
+                results.append([])
+                continue
+            peak = max(score for score, _ in scores)
+            weights = [(math.exp(score - peak), pest_id) for score, pest_id in scores]
+            total = sum(weight for weight, _ in weights)
+            ranked = sorted(((weight / total, pest_id) for weight, pest_id in weights), reverse=True)
+            results.append([(pest_id, probability) for probability, pest_id in ranked[:TOP_PREDICTIONS]])
+        return results
+
+
+_classifier = {}
+
+
+def get_classifier():
+    """The configured classifier, loaded once per process and refreshed hourly"""
+    path = settings.PEST_CLASSIFIER
+    entry = _classifier.get(path)
+    if entry is None or time.monotonic() - entry[0] > settings.PEST_CLASSIFIER_MAX_AGE:
+        entry = _classifier[path] = (time.monotonic(), import_string(path)())
+    return entry[1]
+
+
+def claim_pending(batch_size):
+    """Mark up to batch_size of the oldest pending detections as processing"""
+    with transaction.atomic():
+        ids = list(
+            PestDiseaseDetection.objects.filter(status='pending')
+            .order_by('created_at')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        # processed_at holds the claim time until the result is written
+        PestDiseaseDetection.objects.filter(pk__in=ids).update(
+            status='processing', processed_at=timezone.now()
+        )
+    return list(PestDiseaseDetection.objects.filter(pk__in=ids).only('pk', 'image'))
+
+
+def requeue_stale():
+    """Return detections abandoned by a crashed worker to the queue"""
+    return PestDiseaseDetection.objects.filter(
+        status='processing', processed_at__lt=timezone.now() - STALE_AFTER
+    ).update(status='pending')
+
+
+def _prepare(detection, classifier):
+    try:
+        with detection.image.open('rb') as handle:
+            return classifier.preprocess(Image.open(handle))
+    except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        return exc
+
+
+def _suggestions(predictions, pests):
+    best_id, best = predictions[0]
+    others = ', '.join(
+        f'{pests[pest_id].name} ({probability:.0%})'
+        for pest_id, probability in predictions[1:] if probability >= 0.01
+    )
+    if best * 100 < settings.DETECTION_MIN_CONFIDENCE:
+        text = f'No confident match (best guess: {pests[best_id].name}, {best:.0%}). An expert will review this image.'
+    else:
+        text = f'Most likely {pests[best_id].name} ({best:.0%}).'
+        control = pests[best_id].organic_control or pests[best_id].chemical_control
+        if control:
+            text += f'\n\nRecommended control: {control}'
+    if others:
+        text += f'\n\nAlso possible: {others}'
+    return text
+
+
+def classify_batch(detections, classifier, threads=None):
+    """Classify claimed detections and store their results"""
+    with ThreadPoolExecutor(threads or settings.DETECTION_PREPROCESS_THREADS) as pool:
+        inputs = list(pool.map(lambda detection: _prepare(detection, classifier), detections))
+
+    readable = [
+        (detection, features) for detection, features in zip(detections, inputs)
+        if not isinstance(features, Exception)
+    ]
+    predictions = classifier.predict([features for _, features in readable]) if readable else []
+    pests = PestDisease.objects.in_bulk(
+        {pest_id for ranked in predictions for pest_id, _ in ranked}
+    )
+
+    now = timezone.now()
+    for detection, features in zip(detections, inputs):
+        detection.classifier_version = classifier.version
+        detection.processed_at = now
+        if isinstance(features, Exception):
+            logger.warning('Could not read detection image %s: %s', detection.pk, features)
+            detection.status = 'failed'
+            detection.ai_suggestions = 'The image could not be read. Please upload a clear photo.'
+    for (detection, _), ranked in zip(readable, predictions):
+        detection.status = 'completed'
+        ranked = [(pest_id, probability) for pest_id, probability in ranked if pest_id in pests]
+        if not ranked:
+            detection.ai_suggestions = 'No reference images to compare against yet. An expert will review this image.'
+            continue
+        pest_id, probability = ranked[0]
+        detection.confidence_score = Decimal(probability * 100).quantize(Decimal('0.01'))
+        if probability * 100 >= settings.DETECTION_MIN_CONFIDENCE:
+            detection.detected_pest_disease_id = pest_id
+        detection.ai_suggestions = _suggestions(ranked, pests)
+
+    PestDiseaseDetection.objects.bulk_update(detections, RESULT_FIELDS)
+    return len(readable)
+
+
+def process_pending(batch_size=None, max_batches=None, threads=None):
+    """Classify pending detections batch by batch until none are left"""
+    started = time.monotonic()
+    batch_size = batch_size or settings.DETECTION_BATCH_SIZE
+    classifier = get_classifier()
+    stats = {'batches': 0, 'detections': 0, 'classified': 0}
+
+    while max_batches is None or stats['batches'] < max_batches:
+        detections = claim_pending(batch_size)
+        if not detections:
+            break
+        stats['classified'] += classify_batch(detections, classifier, threads)
+        stats['detections'] += len(detections)
+        stats['batches'] += 1
+
+    stats['failed'] = stats['detections'] - stats['classified']
+    stats['remaining'] = PestDiseaseDetection.objects.filter(status='pending').exists()
+    stats['seconds'] = time.monotonic() - started
+    return stats
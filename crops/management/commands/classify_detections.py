@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from crops.inference import process_pending, requeue_stale
+
+
+class Command(BaseCommand):
+    help = 'Classify pending pest/disease detection images without going through Celery'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Images classified per batch (defaults to DETECTION_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=None,
+            help='Threads decoding images (defaults to DETECTION_PREPROCESS_THREADS)'
+        )
+        parser.add_argument(
+            '--requeue-stale', action='store_true',
+            help='First return detections stuck in processing to the queue'
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_stale']:
+            self.stdout.write(f'Requeued {requeue_stale()} stale detections')
+
+        stats = process_pending(batch_size=options['batch_size'], threads=options['threads'])
+        rate = stats['detections'] / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Classified {stats['classified']} detections ({stats['failed']} unreadable) "
+            f"in {stats['batches']} batches, {stats['seconds']:.2f}s ({rate:.0f} images/s)"
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['is_active', 'category'], name='crop_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farmercrop',
+            index=models.Index(fields=['farmer', '-planting_date'], name='farmercrop_farmer_planted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pestdisease',
+            index=models.Index(fields=['is_active', 'pest_disease_type'], name='pest_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pestdiseasedetection',
+            index=models.Index(fields=['farmer', '-created_at'], name='detection_farmer_created_idx'),
+        ),
+    ]
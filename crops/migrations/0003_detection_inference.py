@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:08
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def mark_resolved_detections(apps, schema_editor):
+    PestDiseaseDetection = apps.get_model('crops', 'PestDiseaseDetection')
+    # Detections an expert already resolved are not sent through the classifier
+    PestDiseaseDetection.objects.filter(
+        Q(is_verified=True) | Q(detected_pest_disease__isnull=False)
+    ).update(status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pestdiseasedetection',
+            name='classifier_version',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='pestdiseasedetection',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pestdiseasedetection',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='pestdiseasedetection',
+            index=models.Index(fields=['status', 'created_at'], name='detection_status_created_idx'),
+        ),
+        migrations.RunPython(mark_resolved_detections, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0003_detection_inference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crop',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
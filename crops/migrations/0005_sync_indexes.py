@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0004_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farmercrop',
+            index=models.Index(fields=['farmer', 'updated_at'], name='farmercrop_farmer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livestock',
+            index=models.Index(fields=['farmer', 'updated_at'], name='livestock_farmer_updated_idx'),
+        ),
+    ]
@@ -70,6 +70,7 @@ class Crop(models.Model):
     
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='crops/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -79,6 +80,9 @@ class Crop(models.Model):
         verbose_name = 'Crop'
         verbose_name_plural = 'Crops'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['is_active', 'category'], name='crop_active_category_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -210,6 +214,10 @@ class FarmerCrop(models.Model):
         verbose_name = 'Farmer Crop'
         verbose_name_plural = 'Farmer Crops'
         ordering = ['-planting_date']
+        indexes = [
+            models.Index(fields=['farmer', '-planting_date'], name='farmercrop_farmer_planted_idx'),
+            models.Index(fields=['farmer', 'updated_at'], name='farmercrop_farmer_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.crop.name} - {self.season} {self.year}"
@@ -259,6 +267,9 @@ class PestDisease(models.Model):
         verbose_name = 'Pest/Disease'
         verbose_name_plural = 'Pests & Diseases'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['is_active', 'pest_disease_type'], name='pest_active_type_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -267,6 +278,13 @@ class PestDisease(models.Model):
 class PestDiseaseDetection(models.Model):
     """AI-based pest/disease detection records"""
     
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
     farmer = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='detections'
     )
@@ -281,6 +299,11 @@ class PestDiseaseDetection(models.Model):
     )
     ai_suggestions = models.TextField(blank=True)
     
+    # Inference pipeline (see crops/inference.py)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    classifier_version = models.CharField(max_length=50, blank=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    
     # Verification
     is_verified = models.BooleanField(default=False)
     verified_by = models.ForeignKey(
@@ -303,6 +326,10 @@ class PestDiseaseDetection(models.Model):
         verbose_name = 'Pest/Disease Detection'
         verbose_name_plural = 'Pest/Disease Detections'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['farmer', '-created_at'], name='detection_farmer_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='detection_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"Detection by {self.farmer.username} on {self.created_at.date()}"
@@ -380,6 +407,9 @@ class Livestock(models.Model):
         verbose_name = 'Livestock'
         verbose_name_plural = 'Livestock'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['farmer', 'updated_at'], name='livestock_farmer_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_species_display()} - {self.name or self.tag_number or 'Unnamed'}"
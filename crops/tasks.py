@@ -0,0 +1,46 @@
+import logging
+
+from celery import shared_task
+from kombu.exceptions import OperationalError
+
+from .inference import process_pending, requeue_stale
+
+logger = logging.getLogger(__name__)
+
+# Batches per task run before handing the rest of the queue to a fresh task
+MAX_BATCHES_PER_TASK = 10
+
+
+@shared_task
+def classify_detections_task():
+    """Classify pending pest/disease detection images in batches"""
+    stats = process_pending(max_batches=MAX_BATCHES_PER_TASK)
+    if stats['detections']:
+        logger.info(
+            'Classified %(classified)s detections (%(failed)s unreadable) '
+            'in %(batches)s batches in %(seconds).2fs', stats
+        )
+    if stats['remaining']:
+        queue_classification()
+    return stats
+
+
+@shared_task
+def requeue_stale_detections_task():
+    """Recover detections stuck in processing and pick up anything left pending"""
+    requeued = requeue_stale()
+    if requeued:
+        logger.warning('Requeued %s stale detections', requeued)
+    return classify_detections_task()
+
+
+def queue_classification():
+    """Ask a worker to drain the pending detections.
+
+    Uploads arriving together are claimed by whichever task runs first, so
+    the later tasks find nothing left and return at once.
+    """
+    try:
+        classify_detections_task.delay()
+    except OperationalError:
+        logger.exception('Could not queue detection classification; the periodic sweep will pick it up')
@@ -6,6 +6,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.http import JsonResponse
+from django.db import transaction
 from django.db.models import Sum, Count
 
 from .models import (
@@ -16,6 +17,10 @@ from .forms import (
     FarmerCropForm, LivestockForm, LivestockProductionForm,
     PestDiseaseDetectionForm
 )
+from .catalog import (
+    active_crops, active_pests_diseases, planting_activities, planting_regions
+)
+from .tasks import queue_classification
 
 
 class CropListView(ListView):
@@ -129,20 +134,14 @@ class PlantingCalendarView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['regions'] = PlantingCalendar.objects.values_list(
-            'region', flat=True
-        ).distinct()
-        context['crops'] = Crop.objects.filter(is_active=True)
+        context['regions'] = planting_regions()
+        context['crops'] = active_crops()
         
         # Current month activities
         from datetime import datetime
         current_month = datetime.now().month
         
-        context['current_month_activities'] = PlantingCalendar.objects.filter(
-            short_rains_start=current_month
-        ) | PlantingCalendar.objects.filter(
-            long_rains_start=current_month
-        )
+        context['current_month_activities'] = planting_activities(current_month)
         
         return context
 
@@ -169,24 +168,29 @@ class PestDiseaseListView(ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        queryset = PestDisease.objects.filter(is_active=True)
+        pests_diseases = active_pests_diseases()
         
         # Filter by type
         pest_type = self.request.GET.get('type')
         if pest_type:
-            queryset = queryset.filter(pest_disease_type=pest_type)
+            pests_diseases = [
+                item for item in pests_diseases if item.pest_disease_type == pest_type
+            ]
         
         # Filter by crop
         crop_id = self.request.GET.get('crop')
         if crop_id:
-            queryset = queryset.filter(affected_crops__id=crop_id)
+            pests_diseases = [
+                item for item in pests_diseases
+                if any(str(crop.pk) == crop_id for crop in item.affected_crops.all())
+            ]
         
-        return queryset
+        return pests_diseases
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['types'] = PestDisease.TYPE_CHOICES
-        context['crops'] = Crop.objects.filter(is_active=True)
+        context['crops'] = active_crops()
         return context
 
 
@@ -206,15 +210,16 @@ class PestDiseaseDetectView(LoginRequiredMixin, CreateView):
     
     def form_valid(self, form):
         form.instance.farmer = self.request.user
+        response = super().form_valid(form)
         
-        # TODO: Integrate with AI model for detection
-        # For now, simulate detection
+        # Classified in the background; the result is polled from the API
+        transaction.on_commit(queue_classification)
         messages.info(
             self.request,
             'Image uploaded for analysis. Our AI is processing your image.'
         )
         
-        return super().form_valid(form)
+        return response
 
 
 class MyDetectionsView(LoginRequiredMixin, ListView):
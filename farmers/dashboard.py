@@ -0,0 +1,190 @@
+"""
+Figures shown on the farmer dashboard.
+
+dashboard_data() assembles them with a fixed number of queries whatever
+the size of the farm: one conditional aggregate each over parcels, farming
+history and credit history (sums and counts per condition with
+``filter=`` and unit conversion with Case/When, computed in the database)
+and the short lists of current crops, recent seasons and active loans read
+as plain values. The result is cached per farmer for
+DASHBOARD_CACHE_TIMEOUT seconds and dropped once a write to the farmer's
+profile, parcels, crops, history or loans commits (see farmers/signals.py).
+"""
+
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When, Window
+from django.utils import timezone
+
+from crops.models import FarmerCrop
+from .models import CreditHistory, FarmerProfile, FarmingHistory, FarmParcel
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'farmers:dashboard'
+
+ACRES_PER_UNIT = {
+    'acres': Decimal('1'),
+    'hectares': Decimal('2.4710538'),
+    'sq_km': Decimal('247.10538'),
+}
+KG_PER_UNIT = {
+    'kg': Decimal('1'),
+    'tonnes': Decimal('1000'),
+    'bags_90kg': Decimal('90'),
+    'bags_50kg': Decimal('50'),
+}
+
+ACTIVE_LOAN_STATUSES = ['active', 'disbursed']
+FINISHED_CROP_STATUSES = ['harvested', 'failed']
+LIST_LENGTH = 5
+
+AMOUNT = DecimalField(max_digits=16, decimal_places=2)
+
+
+def _converted(field, unit_field, factors):
+    """field expressed in a common unit, converting by the unit in unit_field"""
+    return Case(
+        *[When(**{unit_field: unit}, then=F(field) * Value(factor)) for unit, factor in factors.items()],
+        default=F(field),
+        output_field=AMOUNT,
+    )
+
+
+def _cache_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def _parcel_stats(profile_id):
+    return FarmParcel.objects.filter(farmer_profile_id=profile_id, is_active=True).aggregate(
+        total_parcels=Count('pk'),
+        total_farm_area=Sum(_converted('size', 'size_unit', ACRES_PER_UNIT)),
+        mapped_parcels=Count('pk', filter=Q(area_sq_m__isnull=False)),
+    )
+
+
+def _history_stats(profile_id, year):
+    # A season without both revenue and cost has no profit, and SUM skips NULLs
+    return FarmingHistory.objects.filter(farmer_profile_id=profile_id).aggregate(
+        total_yield_this_year=Sum(
+            _converted('actual_yield', 'yield_unit', KG_PER_UNIT), filter=Q(year=year)
+        ),
+        total_profit=Sum(F('total_revenue') - F('total_cost'), output_field=AMOUNT),
+        seasons_recorded=Count('pk'),
+        profitable_seasons=Count('pk', filter=Q(total_revenue__gt=F('total_cost'))),
+    )
+
+
+def _credit_stats(profile_id):
+    active = Q(status__in=ACTIVE_LOAN_STATUSES)
+    return CreditHistory.objects.filter(farmer_profile_id=profile_id).aggregate(
+        active_loan_count=Count('pk', filter=active),
+        total_outstanding=Sum(F('loan_amount') - F('amount_repaid'), filter=active, output_field=AMOUNT),
+        total_repaid=Sum('amount_repaid'),
+        defaulted_loans=Count('pk', filter=Q(status='defaulted')),
+        pending_applications=Count('pk', filter=Q(status='pending')),
+    )
+
+
+def _current_crops(user_id):
+    statuses = dict(FarmerCrop.STATUS_CHOICES)
+    crops = FarmerCrop.objects.filter(farmer_id=user_id).exclude(status__in=FINISHED_CROP_STATUSES)
+    # The window counts every current crop before LIMIT keeps the first few
+    rows = list(
+        crops.annotate(total=Window(Count('pk'))).order_by('-planting_date').values(
+            'id', 'status', 'planting_date', 'total',
+            crop_name=F('crop__name'), parcel_name=F('parcel__parcel_name'),
+        )[:LIST_LENGTH]
+    )
+    for row in rows:
+        row['status_display'] = statuses.get(row.pop('status'), '')
+    return rows, rows[0].pop('total') if rows else 0
+
+
+def _recent_history(profile_id):
+    seasons = dict(FarmingHistory.season.field.choices)
+    rows = list(
+        FarmingHistory.objects.filter(farmer_profile_id=profile_id)
+        .annotate(profit=F('total_revenue') - F('total_cost'))
+        .order_by('-created_at')
+        .values('id', 'crop_name', 'season', 'year', 'actual_yield', 'yield_unit', 'profit')[:LIST_LENGTH]
+    )
+    for row in rows:
+        row['season_display'] = seasons.get(row['season'], row['season'])
+    return rows
+
+
+def _active_loans(profile_id):
+    loan_types = dict(CreditHistory.loan_type.field.choices)
+    rows = list(
+        CreditHistory.objects.filter(farmer_profile_id=profile_id, status__in=ACTIVE_LOAN_STATUSES)
+        .annotate(
+            outstanding=F('loan_amount') - F('amount_repaid'),
+            repaid_percentage=Case(
+                When(loan_amount__gt=0, then=F('amount_repaid') * Value(Decimal(100)) / F('loan_amount')),
+                default=Value(Decimal(0)),
+                output_field=AMOUNT,
+            ),
+        )
+        .order_by('due_date')
+        .values('id', 'loan_type', 'lender_name', 'loan_amount', 'outstanding', 'repaid_percentage', 'due_date')[:LIST_LENGTH]
+    )
+    for row in rows:
+        row['loan_type_display'] = loan_types.get(row['loan_type'], row['loan_type'])
+    return rows
+
+
+def build_dashboard_data(user):
+    """Dashboard figures for a farmer, read from the database"""
+    profile, _ = FarmerProfile.objects.get_or_create(user=user)
+    year = timezone.localdate().year
+
+    data = {
+        'year': year,
+        'credit_score': profile.credit_score,
+        'credit_limit': profile.credit_limit,
+        **_parcel_stats(profile.pk),
+        **_history_stats(profile.pk, year),
+        **_credit_stats(profile.pk),
+    }
+    data['current_crops'], data['current_crop_count'] = _current_crops(user.pk)
+    data['recent_history'] = _recent_history(profile.pk)
+    data['active_loans'] = _active_loans(profile.pk)
+    for name in ('total_farm_area', 'total_yield_this_year', 'total_profit', 'total_outstanding', 'total_repaid'):
+        data[name] = data[name] or 0
+    return data
+
+
+def dashboard_data(user):
+    """Cached dashboard figures for a farmer; built uncached when the cache is down"""
+    key = _cache_key(user.pk)
+    try:
+        data = cache.get(key)
+    except Exception:
+        logger.exception('Dashboard cache read failed for user %s', user.pk)
+        return build_dashboard_data(user)
+
+    if data is None:
+        data = build_dashboard_data(user)
+        try:
+            cache.set(key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+        except Exception:
+            logger.exception('Dashboard cache write failed for user %s', user.pk)
+    return data
+
+
+def _delete_cached(user_id):
+    try:
+        cache.delete(_cache_key(user_id))
+    except Exception:
+        logger.exception('Dashboard cache invalidation failed for user %s', user_id)
+
+
+def invalidate_dashboard(user_id):
+    """Drop a farmer's cached dashboard once the current transaction commits"""
+    if user_id is not None:
+        transaction.on_commit(lambda: _delete_cached(user_id))
@@ -0,0 +1,303 @@
+"""
+Geometry of farm parcel boundaries.
+
+Boundaries are lists of GPS points, either ``[latitude, longitude]`` pairs
+or ``{"lat": ..., "lng": ...}`` objects as produced by web map widgets.
+From a boundary this module derives the geodesic area, centroid, bounding
+box and a simplified outline that FarmParcel stores in columns, and
+rejects outlines that cross themselves.
+
+Area is the spherical polygon area on the mean Earth radius; the other
+measures are computed in a local equirectangular projection around the
+parcel, which is accurate to centimetres at farm scale.
+"""
+
+import math
+import time
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from kilimo_guru.spatial import EARTH_RADIUS_KM
+
+EARTH_RADIUS_M = EARTH_RADIUS_KM * 1000
+
+# Outline points closer than this to the simplified line are dropped
+SIMPLIFY_TOLERANCE_M = 2.0
+
+SQUARE_METRES_PER_UNIT = {
+    'acres': 4046.8564224,
+    'hectares': 10000,
+    'sq_km': 1000000,
+}
+
+GEOMETRY_FIELDS = [
+    'size', 'area_sq_m', 'centroid_latitude', 'centroid_longitude',
+    'min_latitude', 'min_longitude', 'max_latitude', 'max_longitude',
+    'simplified_boundary',
+]
+
+
+class GeometryError(ValueError):
+    """Raised when a parcel boundary is not a valid simple polygon"""
+
+
+def _point(value):
+    if isinstance(value, dict):
+        latitude = value.get('lat', value.get('latitude'))
+        longitude = value.get('lng', value.get('lon', value.get('longitude')))
+    elif isinstance(value, (list, tuple)) and len(value) >= 2:
+        latitude, longitude = value[0], value[1]
+    else:
+        raise GeometryError(f'Invalid boundary point {value!r}')
+
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise GeometryError(f'Invalid boundary point {value!r}')
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise GeometryError(f'Boundary point {value!r} is outside valid coordinates')
+    return latitude, longitude
+
+
+def boundary_ring(coordinates):
+    """(latitude, longitude) vertices of a boundary, without a closing repeat"""
+    if not isinstance(coordinates, (list, tuple)):
+        raise GeometryError('Boundary must be a list of points')
+
+    ring = []
+    for value in coordinates:
+        point = _point(value)
+        if not ring or point != ring[-1]:
+            ring.append(point)
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    if len(ring) < 3:
+        raise GeometryError('Boundary needs at least three distinct points')
+    return ring
+
+
+def _project(ring):
+    """Ring in metres on a plane centred on its mean latitude and longitude"""
+    origin_lat = sum(lat for lat, _ in ring) / len(ring)
+    origin_lon = sum(lon for _, lon in ring) / len(ring)
+    scale = math.radians(1) * EARTH_RADIUS_M
+    cos_lat = math.cos(math.radians(origin_lat))
+    points = [((lon - origin_lon) * scale * cos_lat, (lat - origin_lat) * scale) for lat, lon in ring]
+    return points, (origin_lat, origin_lon, scale, cos_lat)
+
+
+def _unproject(x, y, frame):
+    origin_lat, origin_lon, scale, cos_lat = frame
+    return origin_lat + y / scale, origin_lon + x / (scale * cos_lat)
+
+
+def geodesic_area(ring):
+    """Area in square metres of a spherical polygon"""
+    total = 0.0
+    for index, (lat1, lon1) in enumerate(ring):
+        lat2, lon2 = ring[(index + 1) % len(ring)]
+        total += math.radians(lon2 - lon1) * (
+            2 + math.sin(math.radians(lat1)) + math.sin(math.radians(lat2))
+        )
+    return abs(total) * EARTH_RADIUS_M ** 2 / 2
+
+
+def _orientation(a, b, c):
+    value = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (value > 1e-9) - (value < -1e-9)
+
+
+def _on_segment(a, b, c):
+    return min(a[0], b[0]) - 1e-9 <= c[0] <= max(a[0], b[0]) + 1e-9 and \
+        min(a[1], b[1]) - 1e-9 <= c[1] <= max(a[1], b[1]) + 1e-9
+
+
+def _segments_cross(a, b, c, d):
+    o1, o2, o3, o4 = _orientation(a, b, c), _orientation(a, b, d), _orientation(c, d, a), _orientation(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+    return (
+        (o1 == 0 and _on_segment(a, b, c)) or (o2 == 0 and _on_segment(a, b, d))
+        or (o3 == 0 and _on_segment(c, d, a)) or (o4 == 0 and _on_segment(c, d, b))
+    )
+
+
+def self_intersection(points):
+    """Indexes of the first two non-adjacent edges that touch, or None"""
+    count = len(points)
+    edges = []
+    for index in range(count):
+        a, b = points[index], points[(index + 1) % count]
+        edges.append((a, b, min(a[0], b[0]), max(a[0], b[0]), min(a[1], b[1]), max(a[1], b[1])))
+
+    for first in range(count):
+        a, b, min_x, max_x, min_y, max_y = edges[first]
+        for second in range(first + 2, count):
+            if first == 0 and second == count - 1:
+                continue  # closing edge shares the first vertex
+            c, d, other_min_x, other_max_x, other_min_y, other_max_y = edges[second]
+            if other_min_x > max_x or other_max_x < min_x or other_min_y > max_y or other_max_y < min_y:
+                continue
+            if _segments_cross(a, b, c, d):
+                return first, second
+    return None
+
+
+def _centroid(points):
+    twice_area = cx = cy = 0.0
+    for index, (x1, y1) in enumerate(points):
+        x2, y2 = points[(index + 1) % len(points)]
+        cross = x1 * y2 - x2 * y1
+        twice_area += cross
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+    if abs(twice_area) < 1e-9:
+        return (
+            sum(x for x, _ in points) / len(points),
+            sum(y for _, y in points) / len(points),
+        )
+    return cx / (3 * twice_area), cy / (3 * twice_area)
+
+
+def simplify(points, tolerance=SIMPLIFY_TOLERANCE_M):
+    """Indexes of the vertices kept by Douglas-Peucker simplification of a ring"""
+    count = len(points)
+    if count <= 4:
+        return list(range(count))
+
+    # Split the ring at the vertex furthest from the first one
+    far = max(range(count), key=lambda index: math.dist(points[0], points[index]))
+    keep = {0, far}
+    stack = [(0, far), (far, count)]
+    while stack:
+        start, end = stack.pop()
+        a, b = points[start], points[end % count]
+        length = math.dist(a, b)
+        furthest, distance = None, tolerance
+        for index in range(start + 1, end):
+            p = points[index]
+            if length:
+                offset = abs((b[0] - a[0]) * (a[1] - p[1]) - (a[0] - p[0]) * (b[1] - a[1])) / length
+            else:
+                offset = math.dist(a, p)
+            if offset > distance:
+                furthest, distance = index, offset
+        if furthest is not None:
+            keep.add(furthest)
+            stack.extend([(start, furthest), (furthest, end)])
+
+    kept = sorted(keep)
+    return kept if len(kept) >= 3 else list(range(count))
+
+
+def parcel_geometry(coordinates):
+    """Derived geometry of a boundary; raises GeometryError if it is invalid"""
+    ring = boundary_ring(coordinates)
+    points, frame = _project(ring)
+
+    crossing = self_intersection(points)
+    if crossing is not None:
+        raise GeometryError(
+            f'Boundary crosses itself between edges {crossing[0] + 1} and {crossing[1] + 1}'
+        )
+
+    area = geodesic_area(ring)
+    if area <= 0:
+        raise GeometryError('Boundary encloses no area')
+
+    centroid_lat, centroid_lon = _unproject(*_centroid(points), frame)
+    return {
+        'area_sq_m': area,
+        'centroid_latitude': centroid_lat,
+        'centroid_longitude': centroid_lon,
+        'min_latitude': min(lat for lat, _ in ring),
+        'min_longitude': min(lon for _, lon in ring),
+        'max_latitude': max(lat for lat, _ in ring),
+        'max_longitude': max(lon for _, lon in ring),
+        'simplified_boundary': [list(ring[index]) for index in simplify(points)],
+    }
+
+
+def _decimal(value, places):
+    return Decimal(value).quantize(Decimal(1).scaleb(-places))
+
+
+def apply_geometry(parcel):
+    """Store the derived geometry of parcel.boundary_coordinates on the parcel.
+
+    The parcel size is recomputed from the measured area in its size unit.
+    Parcels without a boundary have their derived columns cleared.
+    """
+    if not parcel.boundary_coordinates:
+        for field in GEOMETRY_FIELDS[1:]:
+            setattr(parcel, field, None)
+        return parcel
+
+    geometry = parcel_geometry(parcel.boundary_coordinates)
+    parcel.area_sq_m = _decimal(geometry['area_sq_m'], 2)
+    for field in GEOMETRY_FIELDS[2:8]:
+        setattr(parcel, field, _decimal(geometry[field], 6))
+    parcel.simplified_boundary = geometry['simplified_boundary']
+    unit_area = SQUARE_METRES_PER_UNIT.get(parcel.size_unit, SQUARE_METRES_PER_UNIT['acres'])
+    parcel.size = _decimal(geometry['area_sq_m'] / unit_area, 2)
+    return parcel
+
+
+def _write_geometry(parcels):
+    """Save the derived columns of parcels with one prepared UPDATE.
+
+    bulk_update builds a CASE expression per column and row, which costs
+    more than computing the geometry itself.
+    """
+    from .models import FarmParcel
+
+    fields = [FarmParcel._meta.get_field(name) for name in GEOMETRY_FIELDS]
+    quote = connection.ops.quote_name
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        quote(FarmParcel._meta.db_table),
+        ', '.join(f'{quote(field.column)} = %s' for field in fields),
+        quote(FarmParcel._meta.pk.column),
+    )
+    rows = [
+        [field.get_db_prep_save(getattr(parcel, field.attname), connection) for field in fields] + [parcel.pk]
+        for parcel in parcels
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def recompute_parcel_geometry(queryset=None, batch_size=1000):
+    """Recompute stored geometry for many parcels with batched updates.
+
+    Returns statistics; parcels with invalid boundaries are counted and
+    left unchanged.
+    """
+    from .models import FarmParcel
+
+    started = time.monotonic()
+    queryset = queryset if queryset is not None else FarmParcel.objects.all()
+    stats = {'parcels': 0, 'updated': 0, 'invalid': 0, 'errors': []}
+
+    batch = []
+    with transaction.atomic():
+        parcels = queryset.order_by('pk').only('pk', 'size_unit', 'boundary_coordinates')
+        for parcel in parcels.iterator(chunk_size=batch_size):
+            stats['parcels'] += 1
+            try:
+                batch.append(apply_geometry(parcel))
+            except GeometryError as exc:
+                stats['invalid'] += 1
+                if len(stats['errors']) < 20:
+                    stats['errors'].append(f'parcel {parcel.pk}: {exc}')
+                continue
+            if len(batch) >= batch_size:
+                _write_geometry(batch)
+                stats['updated'] += len(batch)
+                batch = []
+        if batch:
+            _write_geometry(batch)
+            stats['updated'] += len(batch)
+
+    stats['seconds'] = time.monotonic() - started
+    return stats
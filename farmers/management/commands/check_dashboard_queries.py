@@ -0,0 +1,94 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from crops.models import Crop, FarmerCrop
+from farmers.dashboard import _cache_key, build_dashboard_data, dashboard_data
+from farmers.models import CreditHistory, FarmerProfile, FarmingHistory, FarmParcel
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that the farmer dashboard is built with a fixed number of queries '
+        'whatever the size of the farm, and served from cache afterwards'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-queries', type=int, default=8,
+            help='Most queries allowed to build the dashboard'
+        )
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1, 10, 100],
+            help='Rows of each kind (parcels, crops, seasons, loans) in the sample farms'
+        )
+
+    def make_farmer(self, size, crop):
+        user = get_user_model()(username=f'dashboard-check-{uuid.uuid4().hex[:12]}', user_type='farmer')
+        user.set_unusable_password()
+        user.save()
+        profile, _ = FarmerProfile.objects.get_or_create(user=user)
+        today = datetime.date.today()
+        parcels = FarmParcel.objects.bulk_create([
+            FarmParcel(farmer_profile=profile, parcel_name=f'Parcel {index}', size=Decimal('1.50'),
+                       size_unit=['acres', 'hectares'][index % 2])
+            for index in range(size)
+        ])
+        FarmerCrop.objects.bulk_create([
+            FarmerCrop(farmer=user, crop=crop, parcel=parcels[index], season='long_rains', year=today.year,
+                       planting_date=today, area_planted=1, status=['planted', 'harvested'][index % 2])
+            for index in range(size)
+        ])
+        FarmingHistory.objects.bulk_create([
+            FarmingHistory(farmer_profile=profile, parcel=parcels[index], crop_name=crop.name,
+                           season='long_rains', year=today.year - index % 2, actual_yield=10,
+                           yield_unit=['kg', 'bags_90kg'][index % 2], total_cost=100, total_revenue=150)
+            for index in range(size)
+        ])
+        CreditHistory.objects.bulk_create([
+            CreditHistory(farmer_profile=profile, loan_type='input', lender_name='Lender',
+                          loan_amount=1000, amount_repaid=250, application_date=today, due_date=today,
+                          status=['active', 'repaid'][index % 2])
+            for index in range(size)
+        ])
+        return user
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            crop = Crop.objects.first() or Crop.objects.create(name='Maize', category='cereals')
+            counts = {}
+            for size in options['sizes']:
+                user = self.make_farmer(size, crop)
+                with CaptureQueriesContext(connection) as queries:
+                    data = build_dashboard_data(user)
+                counts[size] = len(queries)
+                self.stdout.write(
+                    f"{size:>5} rows each: {len(queries)} queries "
+                    f"(area {data['total_farm_area']:.1f} acres, {data['current_crop_count']} current crops)"
+                )
+                if len(queries) > options['max_queries']:
+                    failures.append(f'{size} rows: {len(queries)} queries, more than {options["max_queries"]}')
+
+            if len(set(counts.values())) > 1:
+                failures.append(f'Query count grows with the farm: {counts}')
+
+            cache.delete(_cache_key(user.pk))
+            dashboard_data(user)
+            with CaptureQueriesContext(connection) as queries:
+                dashboard_data(user)
+            self.stdout.write(f'Cached dashboard: {len(queries)} queries')
+            if queries:
+                failures.append(f'Cached dashboard ran {len(queries)} queries')
+            cache.delete(_cache_key(user.pk))
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Dashboard query count is bounded'))
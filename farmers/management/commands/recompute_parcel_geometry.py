@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from farmers.geometry import recompute_parcel_geometry
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored area, centroid and bounds of every farm parcel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of parcels written per bulk update'
+        )
+
+    def handle(self, *args, **options):
+        stats = recompute_parcel_geometry(batch_size=options['batch_size'])
+        for error in stats['errors']:
+            self.stderr.write(error)
+        if stats['invalid']:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['invalid']} parcels have invalid boundaries and were left unchanged"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {stats['updated']} of {stats['parcels']} parcels in {stats['seconds']:.2f}s"
+        ))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='credithistory',
+            index=models.Index(fields=['farmer_profile', 'status'], name='credit_profile_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farminghistory',
+            index=models.Index(fields=['farmer_profile', 'year'], name='history_profile_year_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farmparcel',
+            name='area_sq_m',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='farmparcel',
+            name='centroid_latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='farmparcel',
+            name='centroid_longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='farmparcel',
+            name='max_latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='farmparcel',
+            name='max_longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='farmparcel',
+            name='min_latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='farmparcel',
+            name='min_longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='farmparcel',
+            name='simplified_boundary',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
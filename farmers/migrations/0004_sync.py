@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:15
+
+from django.db import migrations, models
+
+
+def backfill_history_updated_at(apps, schema_editor):
+    FarmingHistory = apps.get_model('farmers', 'FarmingHistory')
+    FarmingHistory.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0003_parcel_geometry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farminghistory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_history_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='farminghistory',
+            index=models.Index(fields=['farmer_profile', 'updated_at'], name='history_profile_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farmparcel',
+            index=models.Index(fields=['farmer_profile', 'updated_at'], name='parcel_profile_updated_idx'),
+        ),
+    ]
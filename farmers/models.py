@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
@@ -234,6 +235,30 @@ class FarmParcel(models.Model):
         help_text="GPS coordinates of parcel boundary"
     )
     
+    # Derived from the boundary on save (see farmers/geometry.py)
+    area_sq_m = models.DecimalField(
+        max_digits=14, decimal_places=2, blank=True, null=True, editable=False
+    )
+    centroid_latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True, editable=False
+    )
+    centroid_longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True, editable=False
+    )
+    min_latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True, editable=False
+    )
+    min_longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True, editable=False
+    )
+    max_latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True, editable=False
+    )
+    max_longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True, editable=False
+    )
+    simplified_boundary = models.JSONField(blank=True, null=True, editable=False)
+    
     # Current Status
     current_crop = models.CharField(max_length=100, blank=True, null=True)
     is_active = models.BooleanField(default=True)
@@ -259,9 +284,20 @@ class FarmParcel(models.Model):
         verbose_name = 'Farm Parcel'
         verbose_name_plural = 'Farm Parcels'
         ordering = ['parcel_name']
+        indexes = [
+            models.Index(fields=['farmer_profile', 'updated_at'], name='parcel_profile_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.parcel_name} - {self.size} {self.get_size_unit_display()}"
+    
+    def clean(self):
+        from .geometry import GeometryError, parcel_geometry
+        if self.boundary_coordinates:
+            try:
+                parcel_geometry(self.boundary_coordinates)
+            except GeometryError as exc:
+                raise ValidationError({'boundary_coordinates': str(exc)})
 
 
 class FarmingHistory(models.Model):
@@ -348,11 +384,16 @@ class FarmingHistory(models.Model):
     # Notes
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = 'Farming History'
         verbose_name_plural = 'Farming History'
         ordering = ['-year', '-season']
+        indexes = [
+            models.Index(fields=['farmer_profile', 'year'], name='history_profile_year_idx'),
+            models.Index(fields=['farmer_profile', 'updated_at'], name='history_profile_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.crop_name} - {self.season} {self.year}"
@@ -437,6 +478,9 @@ class CreditHistory(models.Model):
         verbose_name = 'Credit History'
         verbose_name_plural = 'Credit History'
         ordering = ['-application_date']
+        indexes = [
+            models.Index(fields=['farmer_profile', 'status'], name='credit_profile_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.loan_type} - KES {self.loan_amount} ({self.status})"
@@ -0,0 +1,44 @@
+import logging
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from crops.models import FarmerCrop
+from .dashboard import invalidate_dashboard
+from .geometry import GEOMETRY_FIELDS, GeometryError, apply_geometry
+from .models import CreditHistory, FarmerProfile, FarmingHistory, FarmParcel
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(pre_save, sender=FarmParcel)
+def update_parcel_geometry(sender, instance, update_fields=None, **kwargs):
+    """Derive area, centroid, bounds and outline from the parcel boundary"""
+    if update_fields is not None and 'boundary_coordinates' not in update_fields:
+        return
+    try:
+        apply_geometry(instance)
+    except GeometryError as exc:
+        # Forms and the boundary API validate first; keep the save but drop stale geometry
+        logger.warning('Invalid boundary for parcel %s: %s', instance.pk, exc)
+        for field in GEOMETRY_FIELDS[1:]:
+            setattr(instance, field, None)
+
+
+@receiver([post_save, post_delete], sender=FarmerProfile)
+@receiver([post_save, post_delete], sender=FarmerCrop)
+def invalidate_farmer_dashboard(sender, instance, **kwargs):
+    """Drop the cached dashboard of the farmer whose profile or crops changed"""
+    invalidate_dashboard(instance.user_id if sender is FarmerProfile else instance.farmer_id)
+
+
+@receiver([post_save, post_delete], sender=FarmParcel)
+@receiver([post_save, post_delete], sender=FarmingHistory)
+@receiver([post_save, post_delete], sender=CreditHistory)
+def invalidate_profile_dashboard(sender, instance, **kwargs):
+    """Drop the cached dashboard of the farmer owning a parcel, season or loan"""
+    try:
+        invalidate_dashboard(instance.farmer_profile.user_id)
+    except ObjectDoesNotExist:
+        pass
@@ -6,9 +6,11 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.http import JsonResponse
-from django.db.models import Sum, Avg, Count
+from django.db.models import Avg, Count
 import json
 
+from .dashboard import dashboard_data
+from .geometry import GeometryError, parcel_geometry
 from .models import FarmerProfile, FarmParcel, FarmingHistory, CreditHistory
 from .forms import (
     FarmerProfileForm, FarmParcelForm, FarmingHistoryForm,
@@ -32,57 +34,7 @@ class FarmerDashboardView(FarmerRequiredMixin, TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
-        
-        try:
-            profile = user.farmer_profile
-        except FarmerProfile.DoesNotExist:
-            profile = FarmerProfile.objects.create(user=user)
-        
-        # Farm statistics
-        context['profile'] = profile
-        context['total_parcels'] = profile.parcels.filter(is_active=True).count()
-        context['total_farm_area'] = profile.parcels.filter(
-            is_active=True
-        ).aggregate(total=Sum('size'))['total'] or 0
-        
-        # Current crops
-        context['current_crops'] = FarmingHistory.objects.filter(
-            farmer_profile=profile,
-            harvest_date__isnull=True
-        ).select_related('parcel')[:5]
-        
-        # Recent farming history
-        context['recent_history'] = FarmingHistory.objects.filter(
-            farmer_profile=profile
-        ).order_by('-created_at')[:5]
-        
-        # Credit information
-        context['credit_score'] = profile.credit_score
-        context['credit_limit'] = profile.credit_limit
-        context['active_loans'] = CreditHistory.objects.filter(
-            farmer_profile=profile,
-            status__in=['active', 'disbursed']
-        )
-        context['total_outstanding'] = context['active_loans'].aggregate(
-            total=Sum('outstanding_amount')
-        )['total'] or 0
-        
-        # Yield statistics
-        context['total_yield_this_year'] = FarmingHistory.objects.filter(
-            farmer_profile=profile,
-            year=2024,
-            actual_yield__isnull=False
-        ).aggregate(total=Sum('actual_yield'))['total'] or 0
-        
-        # Profit statistics
-        profits = FarmingHistory.objects.filter(
-            farmer_profile=profile,
-            total_revenue__isnull=False,
-            total_cost__isnull=False
-        )
-        context['total_profit'] = sum([h.profit for h in profits if h.profit]) if profits else 0
-        
+        context.update(dashboard_data(self.request.user))
         return context
 
 
@@ -360,6 +312,15 @@ class SaveFarmBoundaryView(FarmerRequiredMixin, View):
                     'error': 'No coordinates provided'
                 })
             
+            # Reject crossing outlines; the parcel size is measured, not taken from the client
+            try:
+                geometry = parcel_geometry(coordinates)
+            except GeometryError as e:
+                return JsonResponse({
+                    'success': False,
+                    'error': str(e)
+                })
+            
             try:
                 profile = request.user.farmer_profile
             except FarmerProfile.DoesNotExist:
@@ -381,13 +342,17 @@ class SaveFarmBoundaryView(FarmerRequiredMixin, View):
                 parcel = FarmParcel.objects.create(
                     farmer_profile=profile,
                     parcel_name=data.get('parcel_name', 'New Parcel'),
-                    size=data.get('size', 0),
+                    size=0,
                     boundary_coordinates=coordinates
                 )
             
             return JsonResponse({
                 'success': True,
-                'parcel_id': parcel.id
+                'parcel_id': parcel.id,
+                'size': float(parcel.size),
+                'size_unit': parcel.size_unit,
+                'area_sq_m': round(geometry['area_sq_m'], 2),
+                'centroid': [parcel.centroid_latitude, parcel.centroid_longitude],
             })
             
         except json.JSONDecodeError:
@@ -5,3 +5,8 @@ class FinanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finance'
     verbose_name = 'Finance & M-Pesa'
+
+    def ready(self):
+        from kilimo_guru.cache import catalog_cache
+        from .models import LoanProduct, InsuranceProduct
+        catalog_cache.register(LoanProduct, InsuranceProduct)
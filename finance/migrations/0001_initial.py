@@ -0,0 +1,210 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsuranceProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('insurance_type', models.CharField(choices=[('crop', 'Crop Insurance'), ('livestock', 'Livestock Insurance'), ('weather_index', 'Weather Index Insurance'), ('multi_peril', 'Multi-Peril Insurance')], max_length=20)),
+                ('description', models.TextField()),
+                ('covered_crops', models.JSONField(blank=True, default=list)),
+                ('covered_livestock', models.JSONField(blank=True, default=list)),
+                ('covered_risks', models.JSONField(default=list)),
+                ('premium_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('min_sum_insured', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('max_sum_insured', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('provider_name', models.CharField(max_length=100)),
+                ('provider_logo', models.ImageField(blank=True, null=True, upload_to='providers/')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Insurance Product',
+                'verbose_name_plural': 'Insurance Products',
+            },
+        ),
+        migrations.CreateModel(
+            name='LoanApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount_requested', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('amount_approved', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('duration_days', models.PositiveIntegerField()),
+                ('purpose', models.TextField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('submitted', 'Submitted'), ('under_review', 'Under Review'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('disbursed', 'Disbursed'), ('active', 'Active'), ('repaid', 'Repaid'), ('defaulted', 'Defaulted')], default='draft', max_length=20)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('rejection_reason', models.TextField(blank=True)),
+                ('disbursed_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('disbursed_at', models.DateTimeField(blank=True, null=True)),
+                ('disbursement_reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('total_repaid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_repayment_date', models.DateTimeField(blank=True, null=True)),
+                ('application_date', models.DateTimeField(auto_now_add=True)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loan_applications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Loan Application',
+                'verbose_name_plural': 'Loan Applications',
+                'ordering': ['-application_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LoanProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('loan_type', models.CharField(choices=[('input', 'Input Financing'), ('seasonal', 'Seasonal Loan'), ('equipment', 'Equipment Loan'), ('emergency', 'Emergency Loan'), ('insurance', 'Insurance Premium Financing')], max_length=20)),
+                ('description', models.TextField()),
+                ('min_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('max_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('interest_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('interest_type', models.CharField(choices=[('flat', 'Flat Rate'), ('reducing_balance', 'Reducing Balance')], default='flat', max_length=20)),
+                ('min_duration_days', models.PositiveIntegerField()),
+                ('max_duration_days', models.PositiveIntegerField()),
+                ('min_credit_score', models.IntegerField(default=0)),
+                ('requires_collateral', models.BooleanField(default=False)),
+                ('collateral_description', models.TextField(blank=True)),
+                ('provider_name', models.CharField(max_length=100)),
+                ('provider_logo', models.ImageField(blank=True, null=True, upload_to='providers/')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Loan Product',
+                'verbose_name_plural': 'Loan Products',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Wallet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('daily_transaction_limit', models.DecimalField(decimal_places=2, default=70000, max_digits=12)),
+                ('monthly_transaction_limit', models.DecimalField(decimal_places=2, default=140000, max_digits=12)),
+                ('daily_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('monthly_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_reset_date', models.DateField(auto_now_add=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='wallet', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Wallet',
+                'verbose_name_plural': 'Wallets',
+            },
+        ),
+        migrations.CreateModel(
+            name='WalletTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('payment', 'Payment'), ('refund', 'Refund'), ('transfer', 'Transfer')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.CharField(max_length=200)),
+                ('reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='finance.wallet')),
+            ],
+            options={
+                'verbose_name': 'Wallet Transaction',
+                'verbose_name_plural': 'Wallet Transactions',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MPesaTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('paybill', 'Paybill'), ('buy_goods', 'Buy Goods'), ('send_money', 'Send Money'), ('receive_money', 'Receive Money'), ('withdraw', 'Withdraw'), ('deposit', 'Deposit')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('mpesa_receipt_number', models.CharField(blank=True, max_length=50, null=True)),
+                ('checkout_request_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('merchant_request_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('phone_number', models.CharField(max_length=15)),
+                ('recipient_phone', models.CharField(blank=True, max_length=15, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], default='pending', max_length=20)),
+                ('result_code', models.CharField(blank=True, max_length=10, null=True)),
+                ('result_description', models.TextField(blank=True)),
+                ('initiated_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('related_listing', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='marketplace.producelisting')),
+                ('related_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='marketplace.transaction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mpesa_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'M-Pesa Transaction',
+                'verbose_name_plural': 'M-Pesa Transactions',
+                'ordering': ['-initiated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LoanRepayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('repayment_date', models.DateTimeField(auto_now_add=True)),
+                ('payment_method', models.CharField(choices=[('mpesa', 'M-Pesa'), ('bank_transfer', 'Bank Transfer'), ('cash', 'Cash'), ('produce', 'Produce Offset')], max_length=20)),
+                ('transaction_reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repayments', to='finance.loanapplication')),
+                ('mpesa_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='finance.mpesatransaction')),
+            ],
+            options={
+                'verbose_name': 'Loan Repayment',
+                'verbose_name_plural': 'Loan Repayments',
+                'ordering': ['-repayment_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='loanapplication',
+            name='loan_product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='finance.loanproduct'),
+        ),
+        migrations.AddField(
+            model_name='loanapplication',
+            name='reviewed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_loans', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='InsurancePolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('policy_number', models.CharField(max_length=50, unique=True)),
+                ('sum_insured', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('premium_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('covered_items', models.JSONField(default=list)),
+                ('coverage_area', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('active', 'Active'), ('expired', 'Expired'), ('claimed', 'Claimed'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('is_paid', models.BooleanField(default=False)),
+                ('payment_date', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='insurance_policies', to=settings.AUTH_USER_MODEL)),
+                ('insurance_product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='policies', to='finance.insuranceproduct')),
+            ],
+            options={
+                'verbose_name': 'Insurance Policy',
+                'verbose_name_plural': 'Insurance Policies',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loanapplication',
+            index=models.Index(fields=['farmer', 'status'], name='loanapp_farmer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mpesatransaction',
+            index=models.Index(fields=['checkout_request_id'], name='mpesa_checkout_request_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mpesatransaction',
+            index=models.Index(fields=['user', '-initiated_at'], name='mpesa_user_initiated_idx'),
+        ),
+    ]
@@ -68,6 +68,10 @@ class MPesaTransaction(models.Model):
         verbose_name = 'M-Pesa Transaction'
         verbose_name_plural = 'M-Pesa Transactions'
         ordering = ['-initiated_at']
+        indexes = [
+            models.Index(fields=['checkout_request_id'], name='mpesa_checkout_request_idx'),
+            models.Index(fields=['user', '-initiated_at'], name='mpesa_user_initiated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_transaction_type_display()} - KES {self.amount} - {self.status}"
@@ -188,6 +192,9 @@ class LoanApplication(models.Model):
         verbose_name = 'Loan Application'
         verbose_name_plural = 'Loan Applications'
         ordering = ['-application_date']
+        indexes = [
+            models.Index(fields=['farmer', 'status'], name='loanapp_farmer_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.farmer.username} - {self.loan_product.name} - KES {self.amount_requested}"
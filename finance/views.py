@@ -9,6 +9,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import json
 
+from kilimo_guru.cache import catalog_cache
 from .models import (
     MPesaTransaction, LoanProduct, LoanApplication,
     LoanRepayment, InsuranceProduct, InsurancePolicy,
@@ -52,10 +53,18 @@ class FinanceDashboardView(LoginRequiredMixin, TemplateView):
         )
         
         # Available loan products
-        context['loan_products'] = LoanProduct.objects.filter(is_active=True)[:3]
+        context['loan_products'] = catalog_cache.get_or_load(
+            'finance:loan-products:featured',
+            lambda: list(LoanProduct.objects.filter(is_active=True)[:3]),
+            models=[LoanProduct],
+        )
         
         # Available insurance products
-        context['insurance_products'] = InsuranceProduct.objects.filter(is_active=True)[:3]
+        context['insurance_products'] = catalog_cache.get_or_load(
+            'finance:insurance-products:featured',
+            lambda: list(InsuranceProduct.objects.filter(is_active=True)[:3]),
+            models=[InsuranceProduct],
+        )
         
         return context
 
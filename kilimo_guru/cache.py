@@ -0,0 +1,201 @@
+"""
+Versioned read-through cache for rarely changing reference catalogues.
+
+Values are stored in the default (Redis) cache under keys that embed a
+version number per model. Saving or deleting an instance of a registered
+model bumps its version once the write commits, so every cached value built
+from that model is skipped from then on and simply expires. A small in-process LRU tier sits in
+front of Redis, holding values and the version numbers themselves, so a
+local hit needs no network round trip; its entries live for at most
+``CATALOG_CACHE_LOCAL_TTL`` seconds, which bounds how stale another
+process's invalidation can leave them. Invalidations in the current
+process clear the local tier at once.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'catalog'
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CatalogCache:
+    """Read-through cache keyed on per-model versions"""
+
+    def __init__(self, timeout=None, local_entries=None, local_ttl=None):
+        self.timeout = timeout or getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60 * 6)
+        self.local = LocalLRU(
+            local_entries or getattr(settings, 'CATALOG_CACHE_LOCAL_ENTRIES', 256),
+            local_ttl or getattr(settings, 'CATALOG_CACHE_LOCAL_TTL', 30),
+        )
+        self.counters = {'local_hits': 0, 'hits': 0, 'misses': 0, 'errors': 0}
+        self.counters_lock = threading.Lock()
+        self.registered = set()
+
+    def _count(self, counter):
+        with self.counters_lock:
+            self.counters[counter] += 1
+
+    def stats(self):
+        """Snapshot of this process's hit/miss counters"""
+        with self.counters_lock:
+            return dict(self.counters)
+
+    @staticmethod
+    def _version_key(model):
+        return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+    def _versions(self, models):
+        version_keys = [self._version_key(model) for model in models]
+        # Versions are held in the local tier too, so a local hit costs no round trip
+        versions = {}
+        for key in version_keys:
+            version = self.local.get(key)
+            if version is not None:
+                versions[key] = version
+        remote = [key for key in version_keys if key not in versions]
+        if remote:
+            fetched = cache.get_many(remote)
+            missing = [key for key in remote if key not in fetched]
+            if missing:
+                # Versions never expire; add() keeps a concurrent bump intact
+                for key in missing:
+                    cache.add(key, 1, timeout=None)
+                fetched.update(cache.get_many(missing))
+            for key in remote:
+                versions[key] = fetched.get(key, 1)
+                self.local.set(key, versions[key])
+        return [str(versions[key]) for key in version_keys]
+
+    def get_or_load(self, name, loader, models):
+        """Return the cached value for name, calling loader on a miss.
+
+        models lists every model the value is built from; a change to any of
+        them invalidates it.
+        """
+        try:
+            versions = self._versions(models)
+        except Exception:
+            logger.exception('Catalog cache unavailable, loading %s directly', name)
+            self._count('errors')
+            return loader()
+
+        key = f"{KEY_PREFIX}:{name}:{'.'.join(versions)}"
+
+        value = self.local.get(key, self)
+        if value is not self:
+            self._count('local_hits')
+            return value
+
+        try:
+            value = cache.get(key, self)
+        except Exception:
+            logger.exception('Catalog cache read failed for %s', name)
+            self._count('errors')
+            value = self
+
+        if value is not self:
+            self._count('hits')
+        else:
+            self._count('misses')
+            value = loader()
+            try:
+                cache.set(key, value, self.timeout)
+            except Exception:
+                logger.exception('Catalog cache write failed for %s', name)
+                self._count('errors')
+
+        self.local.set(key, value)
+        return value
+
+    def invalidate(self, model):
+        """Bump the version of model so values built from it are reloaded.
+
+        Clearing the local tier also drops the version numbers held there.
+        """
+        key = self._version_key(model)
+        try:
+            if not cache.add(key, 2, timeout=None):
+                cache.incr(key)
+        except Exception:
+            logger.exception('Catalog cache invalidation failed for %s', model._meta.label)
+            self._count('errors')
+        self.local.clear()
+
+    def invalidate_on_commit(self, *models):
+        """Invalidate once the current transaction commits.
+
+        Bumping earlier would let a concurrent reader cache the old rows
+        under the new version.
+        """
+        def invalidate():
+            for model in models:
+                self.invalidate(model)
+
+        transaction.on_commit(invalidate)
+
+    def _on_change(self, sender, **kwargs):
+        self.invalidate_on_commit(sender)
+
+    def _on_m2m_change(self, sender, instance, action, model, **kwargs):
+        if action.startswith('post_'):
+            self.invalidate_on_commit(type(instance), model)
+
+    def register(self, *models):
+        """Invalidate cached values whenever instances of models change"""
+        for model in models:
+            if model in self.registered:
+                continue
+            self.registered.add(model)
+
+            post_save.connect(self._on_change, sender=model, weak=False)
+            post_delete.connect(self._on_change, sender=model, weak=False)
+
+            for field in model._meta.local_many_to_many:
+                m2m_changed.connect(
+                    self._on_m2m_change, sender=field.remote_field.through, weak=False
+                )
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,107 @@
+"""
+Buffered popularity counters (view, inquiry and like counts).
+
+Incrementing a counter only adds to an in-process buffer. The buffer is
+written out with one ``UPDATE ... SET field = field + n`` per distinct
+increment once ``COUNTER_FLUSH_INTERVAL`` seconds have passed or
+``COUNTER_FLUSH_THRESHOLD`` rows are pending, after the response that
+triggered it has been sent. Because the updates are relative (``F()``),
+buffers flushed by different worker processes add up correctly and no
+read-modify-write race is possible. Buffered increments are also flushed
+when the process exits; a crash loses at most one interval of counts.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """Accumulates counter increments and flushes them as F() updates"""
+
+    def __init__(self, interval=None, threshold=None):
+        self.interval = interval or getattr(settings, 'COUNTER_FLUSH_INTERVAL', 10)
+        self.threshold = threshold or getattr(settings, 'COUNTER_FLUSH_THRESHOLD', 1000)
+        self.pending = defaultdict(int)
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.counters = set()
+
+    def register(self, model, *fields):
+        """Allow fields of model to be incremented through the buffer"""
+        for field in fields:
+            model._meta.get_field(field)
+            self.counters.add((model, field))
+
+    def increment(self, instance, field, amount=1):
+        """Add amount to instance.field at the next flush"""
+        model = type(instance)._meta.concrete_model
+        if (model, field) not in self.counters:
+            raise ValueError(f'{model._meta.label}.{field} is not a registered counter')
+        with self.lock:
+            self.pending[(model, field, instance.pk)] += amount
+
+    def pending_count(self, instance, field):
+        """Increments of instance.field not yet written to the database"""
+        model = type(instance)._meta.concrete_model
+        with self.lock:
+            return self.pending.get((model, field, instance.pk), 0)
+
+    def due(self):
+        return bool(self.pending) and (
+            len(self.pending) >= self.threshold
+            or time.monotonic() - self.last_flush >= self.interval
+        )
+
+    def flush(self):
+        """Write every buffered increment; returns the number of rows touched"""
+        if not self.flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self.lock:
+                pending, self.pending = self.pending, defaultdict(int)
+                self.last_flush = time.monotonic()
+            if not pending:
+                return 0
+
+            # Rows receiving the same increment share one UPDATE
+            groups = defaultdict(list)
+            for (model, field, pk), amount in pending.items():
+                groups[(model, field, amount)].append(pk)
+
+            try:
+                with transaction.atomic():
+                    for (model, field, amount), pks in groups.items():
+                        model._base_manager.filter(pk__in=pks).update(
+                            **{field: F(field) + amount}
+                        )
+            except Exception:
+                logger.exception('Counter flush failed; keeping %d increments', len(pending))
+                with self.lock:
+                    for key, amount in pending.items():
+                        self.pending[key] += amount
+                return 0
+
+            return len(pending)
+        finally:
+            self.flush_lock.release()
+
+    def flush_if_due(self, **kwargs):
+        if self.due():
+            self.flush()
+
+
+counter_buffer = CounterBuffer()
+
+request_finished.connect(counter_buffer.flush_if_due, weak=False)
+atexit.register(counter_buffer.flush)
@@ -0,0 +1,25 @@
+"""
+Template tags picking resized image variants (see kilimo_guru/images.py).
+
+    {% load image_tags %}
+    <img src="{% image_url listing 'image_1' 'small' %}"
+         srcset="{% image_srcset listing 'image_1' %}" sizes="25vw">
+"""
+
+from django import template
+
+from .images import variant_srcset, variant_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_url(instance, field, variant='medium'):
+    """URL of a variant of instance.field, or of the original until it exists"""
+    return variant_url(instance, field, variant)
+
+
+@register.simple_tag
+def image_srcset(instance, field):
+    """srcset listing every variant width of instance.field"""
+    return variant_srcset(instance, field)
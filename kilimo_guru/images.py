@@ -0,0 +1,194 @@
+"""
+Resized WebP derivatives of uploaded images.
+
+Models register their image fields with ``image_derivatives`` from their
+AppConfig.ready. When a registered field gets a new file, a Celery task
+renders one WebP per size in IMAGE_VARIANTS (longest edge in pixels,
+never upscaled) and records their URLs in the model's ``image_variants``
+JSON column, so templates and serializers pick a variant without touching
+storage. Orientation from EXIF is applied and the metadata itself is not
+copied, so derivatives carry no camera or GPS details.
+
+``image_variants`` maps each field name to::
+
+    {'source': <original file name>, 'variants': {<variant>: {'url', 'name', 'width', 'height', 'bytes'}}}
+
+and an entry whose source differs from the field's current file is stale;
+readers then fall back to the original until the task catches up.
+"""
+
+import io
+import logging
+import posixpath
+
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from kombu.exceptions import OperationalError
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .cache import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'derivatives'
+
+
+def variant_sizes():
+    """(name, longest edge) pairs, largest first"""
+    return sorted(settings.IMAGE_VARIANTS.items(), key=lambda item: -item[1])
+
+
+def _derivative_name(source, variant):
+    stem = posixpath.splitext(source)[0]
+    return posixpath.join(DERIVATIVES_DIR, f'{stem}-{variant}.webp')
+
+
+def render_variants(field_file):
+    """Write the WebP variants of an image file; returns its image_variants entry"""
+    storage = field_file.storage
+    largest = variant_sizes()[0][1]
+    with field_file.open('rb') as handle, Image.open(handle) as original:
+        # Decode JPEGs at the smallest scale still covering the largest variant
+        original.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    entry = {'source': field_file.name, 'variants': {}}
+    rendered = {}
+    for variant, size in variant_sizes():
+        image.thumbnail((size, size), Image.LANCZOS)
+        if image.size in rendered:
+            # The original is smaller than this size; reuse the rendering
+            entry['variants'][variant] = rendered[image.size]
+            continue
+
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=settings.IMAGE_WEBP_QUALITY, method=4)
+        name = _derivative_name(field_file.name, variant)
+        if storage.exists(name):
+            storage.delete(name)
+        name = storage.save(name, ContentFile(buffer.getvalue()))
+        rendered[image.size] = entry['variants'][variant] = {
+            'url': storage.url(name),
+            'name': name,
+            'width': image.width,
+            'height': image.height,
+            'bytes': buffer.tell(),
+        }
+    return entry
+
+
+def delete_variants(entry, storage):
+    for name in {variant['name'] for variant in entry.get('variants', {}).values()}:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete image derivative %s', name)
+
+
+class ImageDerivatives:
+    """Registry of model image fields that get resized variants"""
+
+    def __init__(self):
+        self.fields = {}
+
+    def register(self, model, *fields):
+        if model in self.fields:
+            return
+        self.fields[model] = list(fields)
+        post_save.connect(self._on_save, sender=model, weak=False)
+        post_delete.connect(self._on_delete, sender=model, weak=False)
+
+    def stale_fields(self, instance):
+        """Registered fields whose cached variants do not match the current file"""
+        cached = instance.image_variants or {}
+        return [
+            field for field in self.fields[type(instance)]
+            if (getattr(instance, field).name or None) != cached.get(field, {}).get('source')
+        ]
+
+    def refresh(self, instance, force=False):
+        """Render variants for the stale fields of instance and store their URLs"""
+        fields = self.fields[type(instance)] if force else self.stale_fields(instance)
+        if not fields:
+            return []
+
+        variants = dict(instance.image_variants or {})
+        for field in fields:
+            field_file = getattr(instance, field)
+            previous = variants.pop(field, None)
+            if field_file:
+                try:
+                    variants[field] = render_variants(field_file)
+                except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+                    logger.warning('Could not render variants of %s: %s', field_file.name, exc)
+                    # Remember the failure so the file is not retried on every save
+                    variants[field] = {'source': field_file.name, 'variants': {}}
+            if previous and previous['source'] != variants.get(field, {}).get('source'):
+                delete_variants(previous, field_file.storage)
+
+        model = type(instance)
+        model._base_manager.filter(pk=instance.pk).update(image_variants=variants)
+        instance.image_variants = variants
+        if model in catalog_cache.registered:
+            # update() sends no signals; cached catalogues still hold the old variants
+            catalog_cache.invalidate(model)
+        return fields
+
+    def _on_save(self, sender, instance, **kwargs):
+        if self.stale_fields(instance):
+            transaction.on_commit(lambda: queue_image_variants(instance))
+
+    def _on_delete(self, sender, instance, **kwargs):
+        for field, entry in (instance.image_variants or {}).items():
+            delete_variants(entry, getattr(instance, field).storage)
+
+
+image_derivatives = ImageDerivatives()
+
+
+@shared_task
+def generate_image_variants_task(model_label, pk):
+    """Render the missing image variants of one model instance"""
+    instance = apps.get_model(model_label)._base_manager.filter(pk=pk).first()
+    if instance is None:
+        return []
+    return image_derivatives.refresh(instance)
+
+
+def queue_image_variants(instance):
+    try:
+        generate_image_variants_task.delay(instance._meta.label, instance.pk)
+    except OperationalError:
+        logger.exception(
+            'Could not queue image variants for %s %s; run generate_image_variants',
+            instance._meta.label, instance.pk
+        )
+
+
+def variant_url(instance, field, variant):
+    """URL of a variant of an image field, falling back to the original file"""
+    field_file = getattr(instance, field)
+    if not field_file:
+        return ''
+    if settings.IMAGE_VARIANTS_ENABLED:
+        entry = (instance.image_variants or {}).get(field)
+        if entry and entry['source'] == field_file.name and variant in entry['variants']:
+            return entry['variants'][variant]['url']
+    return field_file.url
+
+
+def variant_srcset(instance, field):
+    """srcset value listing the distinct variants of an image field"""
+    entry = (getattr(instance, 'image_variants', None) or {}).get(field)
+    field_file = getattr(instance, field)
+    if not settings.IMAGE_VARIANTS_ENABLED or not entry or not field_file or entry['source'] != field_file.name:
+        return ''
+    widths = {}
+    for variant in entry['variants'].values():
+        widths[variant['width']] = variant['url']
+    return ', '.join(f'{url} {width}w' for width, url in sorted(widths.items()))
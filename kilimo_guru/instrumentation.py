@@ -0,0 +1,335 @@
+"""
+Per-request timing and SQL instrumentation, exported in Prometheus format.
+
+RequestMetricsMiddleware counts every request by URL name
+(``resolver_match.view_name``), method and status and records its
+duration and response size. A METRICS_SAMPLE_RATE fraction of requests is
+instrumented in depth: every query goes through an execute wrapper
+(count, total time and the slowest statement), top-level template
+rendering is timed, and one JSON line per request is logged to
+``kilimo_guru.requests``. The slowest statement only appears in that log;
+the metrics keep per-view totals.
+
+Each worker process accumulates its figures in memory and, like the
+counter buffer (kilimo_guru/counters.py), adds them to shared totals in the
+default cache once METRICS_FLUSH_INTERVAL seconds have passed, after the
+response has been sent. Totals are integers (times in microseconds) added
+with ``incr``, so workers never overwrite each other, and /metrics renders
+them whichever worker answers the scrape. The catalogue cache hit and miss
+counters (kilimo_guru/cache.py) are exported alongside.
+"""
+
+import atexit
+import contextvars
+import functools
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import Template as DjangoTemplate
+from django.views.decorators.http import require_GET
+
+from .cache import catalog_cache
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger('kilimo_guru.requests')
+
+KEY_PREFIX = 'metrics'
+SERIES_KEY = f'{KEY_PREFIX}:series'
+
+MICROSECONDS = 1_000_000
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+UNRESOLVED = 'unresolved'
+
+# family: (type, help, stored in microseconds)
+FAMILIES = {
+    'kilimo_http_requests_total': (
+        'counter', 'Requests by URL name, method and status', False),
+    'kilimo_http_request_duration_seconds': (
+        'histogram', 'Request duration by URL name', True),
+    'kilimo_http_response_bytes_total': (
+        'counter', 'Response body bytes by URL name', False),
+    'kilimo_http_sampled_requests_total': (
+        'counter', 'Requests instrumented in depth by URL name', False),
+    'kilimo_db_queries_total': (
+        'counter', 'SQL queries run by sampled requests, by URL name', False),
+    'kilimo_db_query_seconds_total': (
+        'counter', 'Time spent in SQL by sampled requests, by URL name', True),
+    'kilimo_template_render_seconds_total': (
+        'counter', 'Template render time of sampled requests, by URL name', True),
+    'kilimo_catalog_cache_events_total': (
+        'counter', 'Catalogue cache lookups by result', False),
+}
+HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Queries and template time of one sampled request; also its execute wrapper"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_sql = ''
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            if elapsed > self.slowest_seconds:
+                self.slowest_seconds, self.slowest_sql = elapsed, sql
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        # Templates rendered from inside another are part of its time
+        if stats is None or stats.template_depth:
+            return render(self, *args, **kwargs)
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            stats.template_seconds += time.perf_counter() - started
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_templates():
+    """Time every top-level render through the Django template backend"""
+    if not getattr(DjangoTemplate.render, 'instrumented', False):
+        DjangoTemplate.render = _timed_render(DjangoTemplate.render)
+
+
+def _series_key(series):
+    name, labels = series
+    digest = hashlib.md5(repr((name, labels)).encode()).hexdigest()
+    return f'{KEY_PREFIX}:{digest}'
+
+
+def _family(name):
+    if name in FAMILIES:
+        return name
+    for suffix in HISTOGRAM_SUFFIXES:
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    raise ValueError(f'Unknown metric {name}')
+
+
+class MetricsBuffer:
+    """Accumulates metric increments and adds them to the totals in the cache"""
+
+    def __init__(self, interval=None):
+        self.interval = interval or getattr(settings, 'METRICS_FLUSH_INTERVAL', 15)
+        self.pending = defaultdict(int)
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.catalog_seen = {}
+        # Every series this process has written, re-registered if a race drops one
+        self.known = {}
+
+    def observe(self, view, method, status, seconds, size, stats=None):
+        """Record one request; stats carries the detail of a sampled one"""
+        view_label = (('view', view),)
+        duration = 'kilimo_http_request_duration_seconds'
+        with self.lock:
+            pending = self.pending
+            pending[('kilimo_http_requests_total', (
+                ('view', view), ('method', method), ('status', str(status))))] += 1
+            # Every bucket is written, so each label set exposes the full histogram
+            for bound in DURATION_BUCKETS:
+                pending[(f'{duration}_bucket', view_label + (('le', str(bound)),))] += seconds <= bound
+            pending[(f'{duration}_bucket', view_label + (('le', '+Inf'),))] += 1
+            pending[(f'{duration}_sum', view_label)] += round(seconds * MICROSECONDS)
+            pending[(f'{duration}_count', view_label)] += 1
+            pending[('kilimo_http_response_bytes_total', view_label)] += size
+            if stats is not None:
+                pending[('kilimo_http_sampled_requests_total', view_label)] += 1
+                pending[('kilimo_db_queries_total', view_label)] += stats.queries
+                pending[('kilimo_db_query_seconds_total', view_label)] += round(
+                    stats.db_seconds * MICROSECONDS)
+                pending[('kilimo_template_render_seconds_total', view_label)] += round(
+                    stats.template_seconds * MICROSECONDS)
+
+    def _add_catalog_stats(self, pending):
+        for result, count in catalog_cache.stats().items():
+            delta = count - self.catalog_seen.get(result, 0)
+            if delta:
+                pending[('kilimo_catalog_cache_events_total', (('result', result),))] += delta
+                self.catalog_seen[result] = count
+
+    def due(self):
+        return bool(self.pending) and time.monotonic() - self.last_flush >= self.interval
+
+    def flush(self):
+        """Add every buffered increment to the shared totals; returns the series touched"""
+        if not self.flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self.lock:
+                pending, self.pending = self.pending, defaultdict(int)
+                self.last_flush = time.monotonic()
+            self._add_catalog_stats(pending)
+            if not pending:
+                return 0
+
+            written = 0
+            try:
+                for series in pending:
+                    self.known.setdefault(_series_key(series), series)
+                registry = cache.get(SERIES_KEY) or {}
+                missing = {key: series for key, series in self.known.items() if key not in registry}
+                if missing:
+                    cache.set(SERIES_KEY, {**registry, **missing}, None)
+                for series in list(pending):
+                    key = _series_key(series)
+                    cache.add(key, 0, None)
+                    cache.incr(key, pending[series])
+                    del pending[series]
+                    written += 1
+            except Exception:
+                logger.exception('Metrics flush failed; keeping %d series', len(pending))
+                with self.lock:
+                    for series, amount in pending.items():
+                        self.pending[series] += amount
+            return written
+        finally:
+            self.flush_lock.release()
+
+    def flush_if_due(self, **kwargs):
+        if self.due():
+            self.flush()
+
+
+metrics_buffer = MetricsBuffer()
+
+request_finished.connect(metrics_buffer.flush_if_due, weak=False)
+atexit.register(metrics_buffer.flush)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample_order(sample):
+    """Label set first, then a histogram's buckets in ascending order, its sum and count"""
+    (name, labels), _ = sample
+    suffix = next((i for i, suffix in enumerate(HISTOGRAM_SUFFIXES) if name.endswith(suffix)), 0)
+    le = dict(labels).get('le')
+    return (tuple(label for label in labels if label[0] != 'le'), suffix, float(le or 0))
+
+
+def render_metrics():
+    """Shared totals in the Prometheus text exposition format"""
+    registry = cache.get(SERIES_KEY) or {}
+    values = cache.get_many(list(registry))
+    families = defaultdict(list)
+    for key, series in registry.items():
+        if key in values:
+            families[_family(series[0])].append((series, values[key]))
+
+    lines = []
+    for family, (kind, help_text, microseconds) in FAMILIES.items():
+        samples = families.get(family)
+        if not samples:
+            continue
+        lines.append(f'# HELP {family} {help_text}')
+        lines.append(f'# TYPE {family} {kind}')
+        for (name, labels), value in sorted(samples, key=_sample_order):
+            if microseconds and not name.endswith(('_bucket', '_count')):
+                value = value / MICROSECONDS
+            rendered = ','.join(f'{label}="{_escape(text)}"' for label, text in labels)
+            lines.append(f'{name}{{{rendered}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class RequestMetricsMiddleware:
+    """Times every request and instruments a sample of them in depth"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        stats = RequestStats() if random.random() < settings.METRICS_SAMPLE_RATE else None
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            if stats is None:
+                response = self.get_response(request)
+            else:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(stats))
+                    response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED
+        method = request.method if request.method in METHODS else 'other'
+        if response.streaming:
+            size = int(response.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+        metrics_buffer.observe(view, method, response.status_code, elapsed, size, stats)
+
+        if stats is not None:
+            request_logger.info(json.dumps({
+                'view': view,
+                'method': method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 2),
+                'queries': stats.queries,
+                'db_ms': round(stats.db_seconds * 1000, 2),
+                'slowest_query_ms': round(stats.slowest_seconds * 1000, 2),
+                'slowest_query': stats.slowest_sql[:500],
+                'template_ms': round(stats.template_seconds * 1000, 2),
+                'bytes': size,
+            }, separators=(',', ':')))
+        return response
+
+
+def _scrape_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        header = request.headers.get('Authorization', '')
+        return hmac.compare_digest(header, f'Bearer {token}')
+    # Without a token only the host itself (or a sidecar in its network namespace) may scrape
+    return request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+
+
+@require_GET
+def metrics(request):
+    """Prometheus scrape endpoint with the totals of every worker"""
+    if not _scrape_allowed(request):
+        return HttpResponseForbidden()
+    metrics_buffer.flush()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,106 @@
+"""
+Service worker and its precache manifest.
+
+collectstatic writes PRECACHE_MANIFEST into STATIC_ROOT (see
+kilimo_guru/storage.py): the hashed URLs of the static files matching
+PWA_PRECACHE and a version derived from them. The worker is served from
+/sw.js, so it controls the whole site, with the manifest prepended to
+static/js/sw.js. Its precache is named after the version, so a deploy that
+changes any precached file rolls clients over to a fresh cache and the
+old one is deleted when the new worker activates.
+
+Without a collected manifest (development) it is built on the fly from the
+static source files.
+"""
+
+import fnmatch
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.base import ContentFile
+from django.http import HttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+PRECACHE_MANIFEST = 'precache-manifest.json'
+SERVICE_WORKER = 'js/sw.js'
+
+# Same defaults as collectstatic
+IGNORE_PATTERNS = ['CVS', '.*', '*~']
+
+_loaded = {}
+
+
+def precache_paths():
+    """Static file paths matching PWA_PRECACHE, from every staticfiles finder"""
+    paths = set()
+    for finder in finders.get_finders():
+        for path, _ in finder.list(IGNORE_PATTERNS):
+            path = path.replace('\\', '/')
+            if path != SERVICE_WORKER and any(
+                fnmatch.fnmatchcase(path, pattern) for pattern in settings.PWA_PRECACHE
+            ):
+                paths.add(path)
+    return sorted(paths)
+
+
+def build_precache_manifest(storage=None, hashed=True):
+    """Precache manifest of the static files, by hashed URL when hashed is set"""
+    storage = storage or staticfiles_storage
+    digest = hashlib.sha256()
+    urls = []
+    for path in precache_paths():
+        url = storage.url(path, force=True) if hashed else storage.url(path)
+        digest.update(url.encode())
+        if not hashed:
+            # Unhashed URLs do not change with the content
+            with open(finders.find(path), 'rb') as handle:
+                digest.update(handle.read())
+        urls.append(url)
+    return {
+        'version': digest.hexdigest()[:12],
+        'urls': urls,
+        'offline': reverse('offline'),
+        'logout': reverse('accounts:logout'),
+    }
+
+
+def write_precache_manifest(storage=None):
+    """Build the manifest from the collected static files and store it in STATIC_ROOT"""
+    storage = storage or staticfiles_storage
+    manifest = build_precache_manifest(storage)
+    if storage.exists(PRECACHE_MANIFEST):
+        storage.delete(PRECACHE_MANIFEST)
+    storage.save(PRECACHE_MANIFEST, ContentFile(json.dumps(manifest, indent=1).encode()))
+    _loaded.clear()
+    return manifest
+
+
+def load_precache_manifest():
+    if staticfiles_storage.exists(PRECACHE_MANIFEST):
+        with staticfiles_storage.open(PRECACHE_MANIFEST) as handle:
+            return json.load(handle)
+    return build_precache_manifest(hashed=False)
+
+
+def service_worker_script():
+    """Source of the service worker with its precache manifest; cached outside DEBUG"""
+    if 'script' in _loaded and not settings.DEBUG:
+        return _loaded['script']
+    with open(finders.find(SERVICE_WORKER), encoding='utf-8') as handle:
+        source = handle.read()
+    manifest = json.dumps(load_precache_manifest(), separators=(',', ':'))
+    _loaded['script'] = f'self.PRECACHE = {manifest};\n{source}'
+    return _loaded['script']
+
+
+@require_GET
+def service_worker(request):
+    """Serve the service worker from the site root so it controls every page"""
+    response = HttpResponse(service_worker_script(), content_type='application/javascript')
+    # Browsers check for a new worker on navigation; never let a stale one be reused
+    response['Cache-Control'] = 'no-cache'
+    return response
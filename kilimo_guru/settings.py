@@ -5,6 +5,8 @@ Django settings for KILIMO GURU project.
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +45,7 @@ LOCAL_APPS = [
     'finance',
     'advisory',
     'analytics',
+    'api',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -51,6 +54,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'kilimo_guru.instrumentation.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -74,6 +78,9 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'farmers.context_processors.farmer_context',
             ],
+            'libraries': {
+                'image_tags': 'kilimo_guru.image_tags',
+            },
         },
     },
 ]
@@ -127,6 +134,25 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Hashed, compressed static files; collectstatic also writes the service
+# worker precache manifest (see kilimo_guru/pwa.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'kilimo_guru.storage.PrecacheManifestStaticFilesStorage',
+    },
+}
+
+# Static files the service worker downloads when it installs
+PWA_PRECACHE = [
+    'css/*',
+    'js/*',
+    'images/logo.png',
+    'images/default-avatar.png',
+]
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -171,6 +197,14 @@ MPESA_CONSUMER_KEY = os.environ.get('MPESA_CONSUMER_KEY', '')
 MPESA_CONSUMER_SECRET = os.environ.get('MPESA_CONSUMER_SECRET', '')
 MPESA_PASSKEY = os.environ.get('MPESA_PASSKEY', '')
 SMS_API_KEY = os.environ.get('SMS_API_KEY', '')
+SMS_USERNAME = os.environ.get('SMS_USERNAME', 'sandbox')
+SMS_SENDER_ID = os.environ.get('SMS_SENDER_ID', '')
+SMS_API_URL = os.environ.get('SMS_API_URL', 'https://api.africastalking.com/version1/messaging')
+PUSH_GATEWAY_URL = os.environ.get('PUSH_GATEWAY_URL', '')
+PUSH_GATEWAY_KEY = os.environ.get('PUSH_GATEWAY_KEY', '')
+
+# Directory where weather provider payloads are dropped for ingestion
+WEATHER_INGEST_DIR = os.environ.get('WEATHER_INGEST_DIR', str(BASE_DIR / 'data' / 'weather'))
 
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
@@ -179,6 +213,42 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Africa/Nairobi'
+CELERY_BEAT_SCHEDULE = {
+    'compute-market-trends': {
+        'task': 'analytics.tasks.compute_market_trends_task',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'ingest-weather': {
+        'task': 'weather.tasks.ingest_weather_task',
+        'schedule': crontab(minute=5),
+    },
+    'rebuild-request-matches': {
+        'task': 'marketplace.tasks.rebuild_request_matches_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'build-recommendations': {
+        'task': 'marketplace.tasks.build_recommendations_task',
+        'schedule': crontab(minute=20, hour='*/6'),
+    },
+    'dispatch-pending-alerts': {
+        'task': 'weather.tasks.dispatch_pending_alerts_task',
+        'schedule': crontab(minute='*/5'),
+    },
+    'requeue-stale-detections': {
+        'task': 'crops.tasks.requeue_stale_detections_task',
+        'schedule': crontab(minute='*/10'),
+    },
+    'prune-sync-log': {
+        'task': 'api.tasks.prune_sync_log_task',
+        'schedule': crontab(hour=4, minute=30),
+    },
+}
+
+# CPU-bound image inference runs on its own worker (see docker-compose.yml)
+CELERY_TASK_ROUTES = {
+    'crops.tasks.classify_detections_task': {'queue': 'inference'},
+    'crops.tasks.requeue_stale_detections_task': {'queue': 'inference'},
+}
 
 # Cache Configuration
 CACHES = {
@@ -188,6 +258,44 @@ CACHES = {
     }
 }
 
+# Reference catalogue cache (see kilimo_guru/cache.py)
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 6
+CATALOG_CACHE_LOCAL_ENTRIES = 256
+CATALOG_CACHE_LOCAL_TTL = 30
+
+# Buffered view/like counters (see kilimo_guru/counters.py)
+COUNTER_FLUSH_INTERVAL = 10
+COUNTER_FLUSH_THRESHOLD = 1000
+
+# Climate alert fan-out (see weather/alerts.py); rate limits are per worker
+ALERT_BATCH_SIZES = {'sms': 500, 'email': 100, 'push': 500}
+ALERT_RATE_LIMITS = {'sms': '60/m', 'email': '30/m', 'push': '120/m'}
+
+# Pest/disease image inference (see crops/inference.py)
+PEST_CLASSIFIER = 'crops.inference.ColourProfileClassifier'
+PEST_CLASSIFIER_MAX_AGE = 60 * 60
+DETECTION_BATCH_SIZE = 32
+DETECTION_PREPROCESS_THREADS = 4
+DETECTION_MIN_CONFIDENCE = 40
+
+# Resized WebP image variants (see kilimo_guru/images.py); sizes are the longest edge
+IMAGE_VARIANTS = {'thumb': 160, 'small': 480, 'medium': 960, 'large': 1600}
+IMAGE_WEBP_QUALITY = 75
+IMAGE_VARIANTS_ENABLED = True
+
+# Farmer dashboard figures are cached per farmer (see farmers/dashboard.py)
+DASHBOARD_CACHE_TIMEOUT = 10 * 60
+
+# Offline sync for PWA clients (see api/sync.py)
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_OPERATIONS = 200
+SYNC_RETENTION_DAYS = 90
+
+# Request metrics (see kilimo_guru/instrumentation.py); scraped from /metrics
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '0.1'))
+METRICS_FLUSH_INTERVAL = 15
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Security Headers
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -218,6 +326,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'kilimo_guru.requests': {
+            'handlers': ['file', 'console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
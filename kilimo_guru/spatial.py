@@ -0,0 +1,227 @@
+"""
+In-memory spatial index for latitude/longitude points.
+
+PostGIS is not required: points are bucketed into a uniform grid of
+``cell_size`` degrees, and nearest-neighbour, radius and bounding-box
+queries only visit the cells that can hold an answer. Distances are
+great-circle (haversine) kilometres. Longitudes do not wrap at 180 degrees,
+which is far from any location served here.
+
+Indexes are built from database rows and kept per process by
+``spatial_cache``, which rebuilds one only when a cheap fingerprint of its
+source rows (count, latest change) differs from the one it was built with.
+"""
+
+import math
+import threading
+from collections import defaultdict
+
+EARTH_RADIUS_KM = 6371.0088
+
+# About 11 km at the equator; suits county-scale data
+DEFAULT_CELL_SIZE = 0.1
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres between two points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Uniform grid of (key, latitude, longitude) points"""
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.size = 0
+        self.bounds = None
+
+    @classmethod
+    def from_points(cls, points, cell_size=DEFAULT_CELL_SIZE):
+        """Build an index from (key, latitude, longitude) tuples; None coordinates are skipped"""
+        index = cls(cell_size)
+        for key, latitude, longitude in points:
+            if latitude is not None and longitude is not None:
+                index.add(key, latitude, longitude)
+        return index
+
+    def _cell(self, latitude, longitude):
+        return (
+            math.floor(latitude / self.cell_size),
+            math.floor(longitude / self.cell_size),
+        )
+
+    def add(self, key, latitude, longitude):
+        latitude, longitude = float(latitude), float(longitude)
+        row, column = self._cell(latitude, longitude)
+        self.cells[row, column].append((key, latitude, longitude))
+        self.size += 1
+        if self.bounds is None:
+            self.bounds = [row, column, row, column]
+        else:
+            self.bounds = [
+                min(self.bounds[0], row), min(self.bounds[1], column),
+                max(self.bounds[2], row), max(self.bounds[3], column),
+            ]
+
+    def _cells_between(self, min_lat, min_lon, max_lat, max_lon):
+        first_row, first_column = self._cell(min_lat, min_lon)
+        last_row, last_column = self._cell(max_lat, max_lon)
+        if self.bounds:
+            first_row, first_column = max(first_row, self.bounds[0]), max(first_column, self.bounds[1])
+            last_row, last_column = min(last_row, self.bounds[2]), min(last_column, self.bounds[3])
+        if (last_row - first_row + 1) * (last_column - first_column + 1) > len(self.cells):
+            # Large boxes: cheaper to walk the occupied cells
+            for (row, column), points in self.cells.items():
+                if first_row <= row <= last_row and first_column <= column <= last_column:
+                    yield points
+            return
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                points = self.cells.get((row, column))
+                if points:
+                    yield points
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """(key, latitude, longitude) of every point inside the box"""
+        return [
+            point
+            for points in self._cells_between(min_lat, min_lon, max_lat, max_lon)
+            for point in points
+            if min_lat <= point[1] <= max_lat and min_lon <= point[2] <= max_lon
+        ]
+
+    def within_radius(self, latitude, longitude, radius_km):
+        """(distance_km, key) of every point within radius_km, nearest first"""
+        latitude, longitude = float(latitude), float(longitude)
+        angle = radius_km / EARTH_RADIUS_KM
+        lat_delta = math.degrees(angle)
+        # Widest longitude span of the circle, reached off its centre line
+        ratio = math.sin(angle) / max(math.cos(math.radians(latitude)), 1e-12)
+        lon_delta = math.degrees(math.asin(ratio)) if ratio < 1 and angle < math.pi / 2 else 180
+
+        found = []
+        for points in self._cells_between(
+            latitude - lat_delta, longitude - lon_delta,
+            latitude + lat_delta, longitude + lon_delta,
+        ):
+            for key, point_lat, point_lon in points:
+                distance = haversine_km(latitude, longitude, point_lat, point_lon)
+                if distance <= radius_km:
+                    found.append((distance, key))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, latitude, longitude, count=1, max_km=None):
+        """(distance_km, key) of the count nearest points, nearest first.
+
+        Rings of cells are searched outwards until no unvisited cell can be
+        closer than the count-th point found so far.
+        """
+        if not self.size:
+            return []
+        latitude, longitude = float(latitude), float(longitude)
+        row, column = self._cell(latitude, longitude)
+        last_ring = max(
+            abs(row - self.bounds[0]), abs(row - self.bounds[2]),
+            abs(column - self.bounds[1]), abs(column - self.bounds[3]),
+        )
+
+        found = []
+        for ring in range(last_ring + 1):
+            if 8 * ring > len(self.cells):
+                # Sparse grid: rings now hold more empty cells than there are
+                # occupied ones, so finish by walking the occupied cells
+                cells = (
+                    points for (cell_row, cell_column), points in self.cells.items()
+                    if max(abs(cell_row - row), abs(cell_column - column)) >= ring
+                )
+            else:
+                cells = (self.cells.get(cell, ()) for cell in self._ring(row, column, ring))
+            for points in cells:
+                for key, point_lat, point_lon in points:
+                    distance = haversine_km(latitude, longitude, point_lat, point_lon)
+                    if max_km is None or distance <= max_km:
+                        found.append((distance, key))
+            found.sort(key=lambda item: item[0])
+            if 8 * ring > len(self.cells):
+                return found[:count]
+            del found[count:]
+
+            # Any point in a ring further out is at least this far away
+            reach = self._ring_clearance(latitude, ring)
+            if len(found) == count and found[-1][0] <= reach:
+                break
+            if max_km is not None and reach > max_km:
+                break
+        return found
+
+    @staticmethod
+    def _ring(row, column, ring):
+        if ring == 0:
+            yield row, column
+            return
+        for offset in range(-ring, ring + 1):
+            yield row - ring, column + offset
+            yield row + ring, column + offset
+        for offset in range(-ring + 1, ring):
+            yield row + offset, column - ring
+            yield row + offset, column + ring
+
+    def _ring_clearance(self, latitude, ring):
+        # Shortest way out of the visited square: across ring cells of longitude,
+        # which is never further than across the same span of latitude
+        degrees = min(90.0, ring * self.cell_size)
+        return EARTH_RADIUS_KM * math.asin(
+            math.cos(math.radians(latitude)) * math.sin(math.radians(degrees))
+        )
+
+    def clusters(self, min_lat, min_lon, max_lat, max_lon, cell_size=None):
+        """Points inside the box grouped into cells of cell_size degrees.
+
+        Returns dicts with the centroid, point count and keys of each cell.
+        """
+        cell_size = cell_size or self.cell_size
+        groups = defaultdict(list)
+        for key, latitude, longitude in self.within_bbox(min_lat, min_lon, max_lat, max_lon):
+            groups[math.floor(latitude / cell_size), math.floor(longitude / cell_size)].append(
+                (key, latitude, longitude)
+            )
+        return [
+            {
+                'latitude': sum(point[1] for point in points) / len(points),
+                'longitude': sum(point[2] for point in points) / len(points),
+                'count': len(points),
+                'keys': [point[0] for point in points],
+            }
+            for points in groups.values()
+        ]
+
+
+class SpatialIndexCache:
+    """Per-process indexes, rebuilt when their source fingerprint changes"""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, name, fingerprint, loader):
+        entry = self.entries.get(name)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+        index = loader()
+        with self.lock:
+            self.entries[name] = (fingerprint, index)
+        return index
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+spatial_cache = SpatialIndexCache()
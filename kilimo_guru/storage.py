@@ -0,0 +1,11 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class PrecacheManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """WhiteNoise manifest storage that also writes the service worker precache manifest"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if not dry_run:
+            from .pwa import write_precache_manifest
+            write_precache_manifest(self)
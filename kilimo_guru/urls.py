@@ -7,9 +7,15 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 
+from .instrumentation import metrics
+from .pwa import service_worker
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', TemplateView.as_view(template_name='home.html'), name='home'),
+    path('sw.js', service_worker, name='service_worker'),
+    path('metrics', metrics, name='metrics'),
+    path('offline/', TemplateView.as_view(template_name='offline.html'), name='offline'),
     path('accounts/', include('accounts.urls')),
     path('farmers/', include('farmers.urls')),
     path('crops/', include('crops.urls')),
@@ -18,6 +24,8 @@ urlpatterns = [
     path('finance/', include('finance.urls')),
     path('advisory/', include('advisory.urls')),
     path('analytics/', include('analytics.urls')),
+    # Outside the api namespace: DRF's login template reverses rest_framework:login
+    path('api/auth/', include('rest_framework.urls')),
     path('api/', include('api.urls')),
 ]
 
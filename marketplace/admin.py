@@ -1,8 +1,14 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect, render
+from django.urls import path
+
 from .models import (
     MarketPrice, ProduceListing, LivestockListing,
-    BuyerInquiry, BuyerRequest, Transaction
+    BuyerInquiry, BuyerRequest, RequestMatch, Transaction
 )
+from .forms import MarketPriceImportForm
+from .price_import import import_market_prices
 
 
 @admin.register(MarketPrice)
@@ -13,6 +19,56 @@ class MarketPriceAdmin(admin.ModelAdmin):
     list_filter = ['market', 'category', 'price_date']
     search_fields = ['product_name']
     date_hierarchy = 'price_date'
+    change_list_template = 'admin/marketplace/marketprice/change_list.html'
+    
+    def get_urls(self):
+        urls = [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='marketplace_marketprice_import'
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def import_view(self, request):
+        """Upload a price sheet and bulk-upsert its rows"""
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            raise PermissionDenied
+        
+        form = MarketPriceImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            price_sheet = form.cleaned_data['price_sheet']
+            try:
+                stats, rejects = import_market_prices(
+                    price_sheet, price_sheet.name,
+                    source=form.cleaned_data['source'] or price_sheet.name.rsplit('.', 1)[0],
+                )
+            except ValueError as exc:
+                form.add_error('price_sheet', str(exc))
+                stats, rejects = None, []
+        else:
+            stats, rejects = None, []
+        
+        if stats is not None:
+            self.message_user(request, (
+                f"Imported {stats['imported']} of {stats['rows']} rows "
+                f"({stats['rejected']} rejected) in {stats['seconds']:.1f}s "
+                f"({stats['rows_per_second']:.0f} rows/s)"
+            ), messages.SUCCESS if not rejects else messages.WARNING)
+            
+            if not rejects:
+                return redirect('admin:marketplace_marketprice_changelist')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import market prices',
+            'form': form,
+            'rejects': rejects[:200],
+            'rejected_count': stats['rejected'] if stats else 0,
+        }
+        return render(request, 'admin/marketplace/marketprice/import.html', context)
 
 
 @admin.register(ProduceListing)
@@ -54,6 +110,13 @@ class BuyerRequestAdmin(admin.ModelAdmin):
     search_fields = ['product_name', 'buyer__username']
 
 
+@admin.register(RequestMatch)
+class RequestMatchAdmin(admin.ModelAdmin):
+    list_display = ['buyer_request', 'listing', 'score', 'created_at']
+    list_select_related = ['buyer_request__buyer', 'listing']
+    raw_id_fields = ['buyer_request', 'listing']
+
+
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = [
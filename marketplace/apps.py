@@ -1,7 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class MarketplaceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'marketplace'
     verbose_name = 'Marketplace'
+
+    def ready(self):
+        import marketplace.signals
+        post_migrate.connect(marketplace.signals.install_listing_search, sender=self)
+        from kilimo_guru.cache import catalog_cache
+        from kilimo_guru.counters import counter_buffer
+        from kilimo_guru.images import image_derivatives
+        from .models import LivestockListing, MarketPrice, ProduceListing
+        catalog_cache.register(MarketPrice)
+        counter_buffer.register(ProduceListing, 'view_count', 'inquiry_count')
+        image_derivatives.register(ProduceListing, 'image_1', 'image_2', 'image_3')
+        image_derivatives.register(LivestockListing, 'image_1', 'image_2', 'image_3')
@@ -219,3 +219,22 @@ class InquiryResponseForm(forms.ModelForm):
                 'placeholder': 'Your response to the buyer...'
             }),
         }
+
+
+class MarketPriceImportForm(forms.Form):
+    """Upload form for CSV/XLSX market price sheets"""
+    
+    price_sheet = forms.FileField(
+        help_text='CSV or XLSX with product_name, category, market, unit, '
+                  'min_price, max_price, average_price and price_date columns'
+    )
+    source = forms.CharField(
+        max_length=100, required=False,
+        help_text='Recorded on rows that do not name a source'
+    )
+    
+    def clean_price_sheet(self):
+        price_sheet = self.cleaned_data['price_sheet']
+        if not price_sheet.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        return price_sheet
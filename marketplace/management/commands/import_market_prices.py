@@ -0,0 +1,71 @@
+import csv
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace.price_board import refresh_price_boards
+from marketplace.price_import import import_market_prices
+
+
+class Command(BaseCommand):
+    help = 'Import a CSV/XLSX market price sheet, upserting on product, market and date'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX price sheet')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Number of rows validated and upserted per chunk'
+        )
+        parser.add_argument(
+            '--source', default='',
+            help='Source recorded on rows that do not name one'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Write rejected rows with their reasons to this CSV file'
+        )
+        parser.add_argument(
+            '--warm-boards', action='store_true',
+            help='Rebuild the cached price boards after importing'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'{path} does not exist')
+
+        try:
+            with path.open('rb') as handle:
+                stats, rejects = import_market_prices(
+                    handle, path.name,
+                    batch_size=options['batch_size'],
+                    source=options['source'] or path.stem,
+                )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if rejects and options['rejects']:
+            fields = list(dict.fromkeys(key for row in rejects for key in row))
+            with open(options['rejects'], 'w', newline='', encoding='utf-8') as handle:
+                writer = csv.DictWriter(handle, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rejects)
+        else:
+            for reject in rejects[:20]:
+                self.stdout.write(self.style.WARNING(
+                    f"Line {reject['line']}: {reject['reason']}"
+                ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['imported']} of {stats['rows']} rows "
+            f"({stats['rejected']} rejected) in {stats['seconds']:.1f}s "
+            f"({stats['rows_per_second']:.0f} rows/s)"
+        ))
+
+        if options['warm_boards'] and stats['imported']:
+            started = time.monotonic()
+            boards = refresh_price_boards()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt {len(boards)} price boards in {time.monotonic() - started:.1f}s'
+            ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from marketplace.matching import rebuild_matches
+
+
+class Command(BaseCommand):
+    help = 'Recompute produce listing matches for every open buyer request'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of matches written per bulk insert'
+        )
+
+    def handle(self, *args, **options):
+        stats = rebuild_matches(batch_size=options['batch_size'])
+        self.stdout.write(
+            f"Indexed {stats['listings']} listings in {stats['index_seconds'] * 1000:.0f} ms, "
+            f"matched {stats['requests']} requests in {stats['match_seconds'] * 1000:.0f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stats['matches']} matches in {stats['seconds']:.2f}s"
+        ))
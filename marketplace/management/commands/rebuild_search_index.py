@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from marketplace.models import ProduceListing
+from marketplace.search import (
+    build_search_document, install_search_index, uninstall_search_index
+)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild produce listing search documents and the full-text index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of listings updated per bulk update'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated = 0
+        batch = []
+
+        # Dropped first so the SQLite triggers do not fire for every update,
+        # and recreated so they survive table rebuilds by later migrations
+        with connection.schema_editor() as schema_editor:
+            uninstall_search_index(schema_editor, ProduceListing)
+
+        with transaction.atomic():
+            listings = ProduceListing.objects.order_by('pk')
+            for listing in listings.iterator(chunk_size=batch_size):
+                listing.search_document = build_search_document(listing)
+                batch.append(listing)
+                if len(batch) >= batch_size:
+                    ProduceListing.objects.bulk_update(batch, ['search_document'])
+                    updated += len(batch)
+                    batch = []
+
+            if batch:
+                ProduceListing.objects.bulk_update(batch, ['search_document'])
+                updated += len(batch)
+
+        with connection.schema_editor() as schema_editor:
+            install_search_index(schema_editor, ProduceListing)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt search documents for {updated} listings and the '
+            f'{connection.vendor} full-text index'
+        ))
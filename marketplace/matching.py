@@ -0,0 +1,361 @@
+"""
+Matching of open buyer requests against active produce listings.
+
+Listings are indexed in memory by (category, normalized product, unit) and
+then by county, cheapest first, so a request only looks at the listings it
+could accept and stops scanning once none of the rest can make its top list.
+Candidates must stay within the request's price (plus a
+margin for negotiable listings), meet its grade and organic requirements,
+be available before it is needed and be in a preferred county, if any.
+They are scored out of 100 on price, quantity, grade and availability, and
+the best ``MAX_MATCHES_PER_REQUEST`` are stored as RequestMatch rows.
+
+``rebuild_matches`` recomputes every request from one index; the signals in
+``marketplace/signals.py`` keep a single request or listing up to date as
+it changes.
+"""
+
+import heapq
+import time
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BuyerRequest, ProduceListing, RequestMatch
+from .search import SYNONYM_GROUPS, SYNONYM_TERMS, tokenize
+
+MAX_MATCHES_PER_REQUEST = 10
+
+# Negotiable listings may be priced this far above the buyer's maximum
+NEGOTIABLE_MARGIN = Decimal('0.10')
+
+GRADE_RANK = {'mixed': 0, 'grade_3': 1, 'grade_2': 2, 'grade_1': 3, 'premium': 4}
+
+# Points available per criterion; they add up to 100
+PRICE_POINTS = 40
+QUANTITY_POINTS = 30
+GRADE_POINTS = 15
+AVAILABILITY_POINTS = 15
+
+LISTING_FIELDS = [
+    'id', 'category', 'product_name', 'county', 'unit', 'price_per_unit',
+    'is_negotiable', 'quantity_available', 'quality_grade', 'is_organic',
+    'available_from', 'available_until',
+]
+REQUEST_FIELDS = [
+    'id', 'category', 'product_name', 'unit', 'max_price_per_unit',
+    'quantity_required', 'quality_grade', 'requires_organic',
+    'preferred_counties', 'required_by_date',
+]
+
+# Listing fields whose change can alter its matches
+MATCH_FIELDS = set(LISTING_FIELDS) | {'status'}
+
+# Index bucket holding the listings of every county
+ALL_COUNTIES = None
+
+Candidate = namedtuple('Candidate', LISTING_FIELDS)
+OpenRequest = namedtuple('OpenRequest', REQUEST_FIELDS)
+
+CANONICAL_PRODUCTS = {term: group[0] for group in SYNONYM_GROUPS for term in group}
+
+
+def normalize_product(name):
+    """Canonical product name, so "Mahindi" and "Maize lot 5" compare equal"""
+    tokens = tokenize(name)
+    text = f" {' '.join(tokens)} "
+    for term in SYNONYM_TERMS:
+        if f' {term} ' in text:
+            return CANONICAL_PRODUCTS[term]
+    return ' '.join(tokens)
+
+
+def _listing_values(queryset):
+    for values in queryset.values_list(*LISTING_FIELDS).iterator(chunk_size=2000):
+        yield Candidate(*values)
+
+
+def _county(name):
+    return (name or '').strip().lower()
+
+
+def _fraction(value):
+    return min(max(value, 0.0), 1.0)
+
+
+class ListingIndex:
+    """Active listings bucketed by (category, product, unit) and county, cheapest first"""
+
+    def __init__(self):
+        self.buckets = defaultdict(lambda: defaultdict(list))
+        self.peaks = {}
+        self.unsorted = set()
+        self.size = 0
+
+    @classmethod
+    def load(cls, queryset):
+        index = cls()
+        for candidate in _listing_values(queryset):
+            index.add(candidate)
+        return index
+
+    def add(self, candidate):
+        key = (candidate.category, normalize_product(candidate.product_name), candidate.unit)
+        entry = (float(candidate.price_per_unit), candidate.id, candidate)
+        counties = self.buckets[key]
+        counties[_county(candidate.county)].append(entry)
+        counties[ALL_COUNTIES].append(entry)
+        self.unsorted.add(key)
+        self.size += 1
+
+    def candidates(self, buyer_request):
+        """Listings of buyer_request's product in its preferred counties.
+
+        Returns the (price, listing id, candidate) entries, cheapest first,
+        with the largest quantity and grade rank among them.
+        """
+        key = (
+            buyer_request.category,
+            normalize_product(buyer_request.product_name),
+            buyer_request.unit,
+        )
+        counties = self.buckets.get(key)
+        if not counties:
+            return [], 0, 0
+        if key in self.unsorted:
+            for county, entries in counties.items():
+                entries.sort()
+                self.peaks[key, county] = (
+                    max(float(entry[2].quantity_available) for entry in entries),
+                    max(GRADE_RANK.get(entry[2].quality_grade, 0) for entry in entries),
+                )
+            self.unsorted.discard(key)
+
+        preferred = {_county(county) for county in buyer_request.preferred_counties or []}
+        if not preferred:
+            return (counties[ALL_COUNTIES], *self.peaks[key, ALL_COUNTIES])
+
+        preferred = [county for county in preferred if county in counties]
+        if not preferred:
+            return [], 0, 0
+        peaks = [self.peaks[key, county] for county in preferred]
+        return (
+            list(heapq.merge(*(counties[county] for county in preferred))),
+            max(quantity for quantity, _ in peaks),
+            max(grade for _, grade in peaks),
+        )
+
+
+def _price_points(price, max_price, margin):
+    # Full points at half the buyer's maximum, none at the limit
+    return PRICE_POINTS * _fraction((1 + margin - price / max_price) / (0.5 + margin))
+
+
+def _scorer(buyer_request, today):
+    """Function scoring a candidate against buyer_request, None if it does not qualify"""
+    max_price = float(buyer_request.max_price_per_unit)
+    quantity = float(buyer_request.quantity_required)
+    min_grade = GRADE_RANK.get(buyer_request.quality_grade, 0)
+    required_by = buyer_request.required_by_date
+    window = (required_by - today).days
+    negotiable_margin = float(NEGOTIABLE_MARGIN)
+
+    def score(price, candidate):
+        if buyer_request.requires_organic and not candidate.is_organic:
+            return None
+        grade = GRADE_RANK.get(candidate.quality_grade, 0)
+        if grade < min_grade:
+            return None
+        if candidate.available_until < today or candidate.available_from > required_by:
+            return None
+        margin = negotiable_margin if candidate.is_negotiable else 0.0
+        if price > max_price * (1 + margin):
+            return None
+
+        points = _price_points(price, max_price, margin)
+        if quantity > 0:
+            points += QUANTITY_POINTS * _fraction(float(candidate.quantity_available) / quantity)
+        else:
+            points += QUANTITY_POINTS
+        points += GRADE_POINTS * grade / GRADE_RANK['premium']
+
+        # Available now scores full points; later availability scores less
+        if candidate.available_from <= today or window <= 0:
+            points += AVAILABILITY_POINTS
+        else:
+            points += AVAILABILITY_POINTS * _fraction(
+                (required_by - candidate.available_from).days / window
+            )
+        return points
+
+    return score
+
+
+def match_request(buyer_request, index, today=None):
+    """Best (listing_id, score) pairs for buyer_request, highest score first.
+
+    Candidates come cheapest first, so the scan stops as soon as even a
+    candidate scoring as well as the best in the bucket on every other
+    criterion could no longer displace the current top matches.
+    """
+    if buyer_request.max_price_per_unit <= 0:
+        return []
+    today = today or timezone.localdate()
+    score = _scorer(buyer_request, today)
+    max_price = float(buyer_request.max_price_per_unit)
+    margin = float(NEGOTIABLE_MARGIN)
+    limit = max_price * (1 + margin)
+
+    candidates, best_quantity, best_grade = index.candidates(buyer_request)
+    quantity = float(buyer_request.quantity_required)
+    # Most any remaining candidate can score on everything but price
+    other_points = AVAILABILITY_POINTS + GRADE_POINTS * best_grade / GRADE_RANK['premium']
+    other_points += QUANTITY_POINTS * (_fraction(best_quantity / quantity) if quantity > 0 else 1)
+
+    best = []
+    for position, (price, listing_id, candidate) in enumerate(candidates):
+        if price > limit:
+            break
+        if len(best) == MAX_MATCHES_PER_REQUEST:
+            ceiling = other_points + max(
+                _price_points(price, max_price, margin),
+                _price_points(price, max_price, 0.0),
+            )
+            if best[0][0] >= ceiling - 1e-9:
+                break
+        points = score(price, candidate)
+        if points is None:
+            continue
+        # Ties go to the cheaper listing, so the lowest score scanned last is evicted first
+        entry = (points, -position, listing_id)
+        if len(best) < MAX_MATCHES_PER_REQUEST:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+
+    return [(listing_id, round(points)) for points, _, listing_id in sorted(best, reverse=True)]
+
+
+def open_listings(today=None):
+    today = today or timezone.localdate()
+    return ProduceListing.objects.filter(status='active', available_until__gte=today)
+
+
+def open_requests(today=None):
+    today = today or timezone.localdate()
+    return BuyerRequest.objects.filter(status='active', required_by_date__gte=today)
+
+
+def _request_values(queryset):
+    for values in queryset.values_list(*REQUEST_FIELDS).iterator(chunk_size=2000):
+        yield OpenRequest(*values)
+
+
+def rebuild_matches(batch_size=1000):
+    """Recompute the matches of every open buyer request"""
+    started = time.monotonic()
+    today = timezone.localdate()
+    index = ListingIndex.load(open_listings(today))
+    loaded = time.monotonic()
+
+    matches = []
+    requests = 0
+    for buyer_request in _request_values(open_requests(today)):
+        requests += 1
+        matches.extend(
+            RequestMatch(buyer_request_id=buyer_request.id, listing_id=listing_id, score=points)
+            for listing_id, points in match_request(buyer_request, index, today)
+        )
+    matched = time.monotonic()
+
+    with transaction.atomic():
+        RequestMatch.objects.all().delete()
+        RequestMatch.objects.bulk_create(matches, batch_size=batch_size)
+
+    return {
+        'listings': index.size,
+        'requests': requests,
+        'matches': len(matches),
+        'index_seconds': loaded - started,
+        'match_seconds': matched - loaded,
+        'seconds': time.monotonic() - started,
+    }
+
+
+def update_request_matches(request_id):
+    """Recompute the matches of one buyer request"""
+    today = timezone.localdate()
+    buyer_request = next(_request_values(open_requests(today).filter(pk=request_id)), None)
+
+    matches = []
+    if buyer_request is not None:
+        index = ListingIndex.load(open_listings(today).filter(
+            category=buyer_request.category,
+            unit=buyer_request.unit,
+            price_per_unit__lte=buyer_request.max_price_per_unit * (1 + NEGOTIABLE_MARGIN),
+        ))
+        matches = [
+            RequestMatch(buyer_request_id=request_id, listing_id=listing_id, score=points)
+            for listing_id, points in match_request(buyer_request, index, today)
+        ]
+
+    with transaction.atomic():
+        RequestMatch.objects.filter(buyer_request_id=request_id).delete()
+        RequestMatch.objects.bulk_create(matches)
+    return len(matches)
+
+
+def update_listing_matches(listing_id):
+    """Add, rescore or remove one listing in the matches of open requests"""
+    today = timezone.localdate()
+    listing = next(_listing_values(open_listings(today).filter(pk=listing_id)), None)
+
+    scores = {}
+    if listing is not None:
+        index = ListingIndex()
+        index.add(listing)
+        requests = open_requests(today).filter(
+            category=listing.category,
+            unit=listing.unit,
+            max_price_per_unit__gte=listing.price_per_unit / (1 + NEGOTIABLE_MARGIN),
+        )
+        for buyer_request in _request_values(requests):
+            for _, points in match_request(buyer_request, index, today):
+                scores[buyer_request.id] = points
+
+    with transaction.atomic():
+        RequestMatch.objects.filter(listing_id=listing_id).delete()
+        if not scores:
+            return 0
+
+        # Only keep the listing where it makes a request's top matches
+        kept = defaultdict(list)
+        for request_id, points in RequestMatch.objects.filter(
+            buyer_request_id__in=scores
+        ).values_list('buyer_request_id', 'score'):
+            kept[request_id].append(points)
+
+        matches = [
+            RequestMatch(buyer_request_id=request_id, listing_id=listing_id, score=points)
+            for request_id, points in scores.items()
+            if len(kept[request_id]) < MAX_MATCHES_PER_REQUEST or points > min(kept[request_id])
+        ]
+        RequestMatch.objects.bulk_create(matches)
+
+        # Drop the matches the listing pushed out of a full top list
+        crowded = [
+            match.buyer_request_id for match in matches
+            if len(kept[match.buyer_request_id]) >= MAX_MATCHES_PER_REQUEST
+        ]
+        weakest = {}
+        for pk, request_id in RequestMatch.objects.filter(
+            buyer_request_id__in=crowded
+        ).order_by('-score', 'listing__price_per_unit', 'listing_id').values_list(
+            'pk', 'buyer_request_id'
+        ):
+            weakest[request_id] = pk
+        RequestMatch.objects.filter(pk__in=weakest.values()).delete()
+
+    return len(matches)
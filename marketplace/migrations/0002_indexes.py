@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='buyerrequest',
+            index=models.Index(fields=['status', '-created_at'], name='buyreq_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketprice',
+            index=models.Index(fields=['price_date', 'market', 'category'], name='mktprice_date_market_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketprice',
+            index=models.Index(fields=['market', 'price_date'], name='mktprice_market_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producelisting',
+            index=models.Index(fields=['status', 'category', 'county'], name='listing_status_cat_county_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producelisting',
+            index=models.Index(fields=['status', '-created_at'], name='listing_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:27
+
+from django.db import migrations, models
+
+# Documents are built and the index is reinstalled after every migrate (see
+# marketplace/signals.py); the SQL here is frozen as it was at this migration.
+LISTING_TABLE = 'marketplace_producelisting'
+FTS_TABLE = 'marketplace_producelisting_fts'
+GIN_INDEX = 'listing_search_gin'
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"search_document, content='{LISTING_TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {LISTING_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_document) "
+    f"VALUES (new.id, new.search_document); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {LISTING_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+    f"VALUES ('delete', old.id, old.search_document); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_document ON {LISTING_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+    f"VALUES ('delete', old.id, old.search_document); "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_document) "
+    f"VALUES (new.id, new.search_document); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        schema_editor.add_index(
+            apps.get_model('marketplace', 'ProduceListing'),
+            GinIndex(SearchVector('search_document', config='simple'), name=GIN_INDEX),
+        )
+    elif vendor == 'sqlite':
+        for statement in SQLITE_INSTALL:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+    elif vendor == 'sqlite':
+        for statement in SQLITE_UNINSTALL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producelisting',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
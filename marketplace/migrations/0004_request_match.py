@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0003_listing_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('buyer_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='marketplace.buyerrequest')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='request_matches', to='marketplace.producelisting')),
+            ],
+            options={
+                'verbose_name': 'Request Match',
+                'verbose_name_plural': 'Request Matches',
+                'ordering': ['-score'],
+                'unique_together': {('buyer_request', 'listing')},
+            },
+        ),
+    ]
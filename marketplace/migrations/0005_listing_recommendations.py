@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('marketplace', '0004_request_match'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarListing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField()),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='marketplace.producelisting')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='marketplace.producelisting')),
+            ],
+            options={
+                'verbose_name': 'Similar Listing',
+                'verbose_name_plural': 'Similar Listings',
+                'ordering': ['-score'],
+                'unique_together': {('listing', 'similar')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ListingRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField()),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listing_recommendations', to=settings.AUTH_USER_MODEL)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='marketplace.producelisting')),
+            ],
+            options={
+                'verbose_name': 'Listing Recommendation',
+                'verbose_name_plural': 'Listing Recommendations',
+                'ordering': ['-score'],
+                'unique_together': {('buyer', 'listing')},
+            },
+        ),
+    ]
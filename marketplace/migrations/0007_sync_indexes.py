@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producelisting',
+            index=models.Index(fields=['farmer', 'updated_at'], name='listing_farmer_updated_idx'),
+        ),
+    ]
@@ -70,6 +70,13 @@ class MarketPrice(models.Model):
         verbose_name_plural = 'Market Prices'
         ordering = ['-price_date', 'product_name']
         unique_together = ['product_name', 'market', 'price_date']
+        indexes = [
+            models.Index(
+                fields=['price_date', 'market', 'category'],
+                name='mktprice_date_market_cat_idx'
+            ),
+            models.Index(fields=['market', 'price_date'], name='mktprice_market_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.product_name} - {self.get_market_display()} - KES {self.average_price}"
@@ -123,6 +130,7 @@ class ProduceListing(models.Model):
     image_1 = models.ImageField(upload_to='produce/', blank=True, null=True)
     image_2 = models.ImageField(upload_to='produce/', blank=True, null=True)
     image_3 = models.ImageField(upload_to='produce/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Location
     county = models.CharField(max_length=50)
@@ -142,6 +150,9 @@ class ProduceListing(models.Model):
     view_count = models.PositiveIntegerField(default=0)
     inquiry_count = models.PositiveIntegerField(default=0)
     
+    # Normalized text indexed for full-text search (see marketplace/search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -149,6 +160,14 @@ class ProduceListing(models.Model):
         verbose_name = 'Produce Listing'
         verbose_name_plural = 'Produce Listings'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['status', 'category', 'county'],
+                name='listing_status_cat_county_idx'
+            ),
+            models.Index(fields=['status', '-created_at'], name='listing_status_created_idx'),
+            models.Index(fields=['farmer', 'updated_at'], name='listing_farmer_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.product_name} - {self.quantity_available} {self.get_unit_display()}"
@@ -206,6 +225,7 @@ class LivestockListing(models.Model):
     image_1 = models.ImageField(upload_to='livestock/', blank=True, null=True)
     image_2 = models.ImageField(upload_to='livestock/', blank=True, null=True)
     image_3 = models.ImageField(upload_to='livestock/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Location
     county = models.CharField(max_length=50)
@@ -329,11 +349,79 @@ class BuyerRequest(models.Model):
         verbose_name = 'Buyer Request'
         verbose_name_plural = 'Buyer Requests'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='buyreq_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.buyer.username} wants {self.quantity_required} {self.unit} of {self.product_name}"
 
 
+class RequestMatch(models.Model):
+    """Produce listing matched to an open buyer request (see marketplace/matching.py)"""
+
+    buyer_request = models.ForeignKey(
+        BuyerRequest, on_delete=models.CASCADE, related_name='matches'
+    )
+    listing = models.ForeignKey(
+        ProduceListing, on_delete=models.CASCADE, related_name='request_matches'
+    )
+    score = models.PositiveSmallIntegerField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Request Match'
+        verbose_name_plural = 'Request Matches'
+        ordering = ['-score']
+        unique_together = ['buyer_request', 'listing']
+
+    def __str__(self):
+        return f"{self.listing} for {self.buyer_request} ({self.score})"
+
+
+class SimilarListing(models.Model):
+    """Precomputed neighbour of a produce listing (see marketplace/recommendations.py)"""
+
+    listing = models.ForeignKey(
+        ProduceListing, on_delete=models.CASCADE, related_name='similar_entries'
+    )
+    similar = models.ForeignKey(
+        ProduceListing, on_delete=models.CASCADE, related_name='+'
+    )
+    score = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = 'Similar Listing'
+        verbose_name_plural = 'Similar Listings'
+        ordering = ['-score']
+        unique_together = ['listing', 'similar']
+
+    def __str__(self):
+        return f"{self.similar} like {self.listing} ({self.score})"
+
+
+class ListingRecommendation(models.Model):
+    """Precomputed listing recommended to a buyer from their inquiry history"""
+
+    buyer = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='listing_recommendations'
+    )
+    listing = models.ForeignKey(
+        ProduceListing, on_delete=models.CASCADE, related_name='+'
+    )
+    score = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = 'Listing Recommendation'
+        verbose_name_plural = 'Listing Recommendations'
+        ordering = ['-score']
+        unique_together = ['buyer', 'listing']
+
+    def __str__(self):
+        return f"{self.listing} for {self.buyer.username} ({self.score})"
+
+
 class Transaction(models.Model):
     """Completed transactions"""
     
@@ -0,0 +1,36 @@
+"""
+Radius search for produce listings.
+
+Listings carry no coordinates of their own; a listing is located at its
+farmer's farm (FarmerProfile latitude/longitude), indexed in memory with
+``kilimo_guru.spatial``.
+"""
+
+from django.db.models import Count, Max
+
+from farmers.models import FarmerProfile
+from kilimo_guru.spatial import GridIndex, spatial_cache
+
+# Largest radius accepted from clients
+MAX_RADIUS_KM = 200
+
+
+def _located_farms():
+    return FarmerProfile.objects.filter(latitude__isnull=False, longitude__isnull=False)
+
+
+def _load_farms():
+    return GridIndex.from_points(_located_farms().values_list('user_id', 'latitude', 'longitude'))
+
+
+def farms_near(latitude, longitude, radius_km):
+    """(distance_km, farmer user id) of farms within radius_km, nearest first"""
+    fingerprint = _located_farms().aggregate(count=Count('pk'), changed=Max('updated_at'))
+    farms = spatial_cache.get('farms', tuple(fingerprint.values()), _load_farms)
+    return farms.within_radius(latitude, longitude, min(radius_km, MAX_RADIUS_KM))
+
+
+def listings_near(queryset, latitude, longitude, radius_km):
+    """Restrict a ProduceListing queryset to farms within radius_km of a point"""
+    farmer_ids = [farmer_id for _, farmer_id in farms_near(latitude, longitude, radius_km)]
+    return queryset.filter(farmer_id__in=farmer_ids)
@@ -0,0 +1,97 @@
+"""
+Pre-serialized market price boards.
+
+A board holds the last seven days of prices for one market (or all markets)
+and optionally one category. It is built once, stored in the catalogue cache
+as JSON, and rebuilt only after market prices change. The ETag of a board
+(a hash of its JSON) lets the price pages and API answer conditional
+requests without touching the database. There is no Last-Modified: a price
+deleted or aged out of the window would leave the newest update unchanged.
+"""
+
+import hashlib
+import json
+from datetime import date, timedelta
+
+from kilimo_guru.cache import catalog_cache
+from .models import MarketPrice
+
+BOARD_DAYS = 7
+
+BOARD_FIELDS = [
+    'id', 'product_name', 'category', 'market', 'unit',
+    'min_price', 'max_price', 'average_price', 'price_date',
+]
+
+
+def _serialize(price):
+    return {
+        'id': price['id'],
+        'product_name': price['product_name'],
+        'category': price['category'],
+        'market': price['market'],
+        'unit': price['unit'],
+        'min_price': str(price['min_price']),
+        'max_price': str(price['max_price']),
+        'average_price': str(price['average_price']),
+        'price_date': price['price_date'].isoformat(),
+    }
+
+
+def build_price_board(market=None, category=None, day=None):
+    """Build the board for prices reported since a week before day"""
+    day = day or date.today()
+
+    prices = MarketPrice.objects.filter(price_date__gte=day - timedelta(days=BOARD_DAYS))
+    if market:
+        prices = prices.filter(market=market)
+    if category:
+        prices = prices.filter(category=category)
+
+    rows = list(prices.order_by('-price_date', 'product_name').values(*BOARD_FIELDS))
+
+    market_names = dict(MarketPrice.MARKET_CHOICES)
+    category_names = dict(MarketPrice._meta.get_field('category').choices)
+    unit_names = dict(MarketPrice._meta.get_field('unit').choices)
+    for row in rows:
+        row['market_display'] = market_names.get(row['market'], row['market'])
+        row['category_display'] = category_names.get(row['category'], row['category'])
+        row['unit_display'] = unit_names.get(row['unit'], row['unit'])
+
+    payload = json.dumps([_serialize(row) for row in rows]).encode()
+
+    return {
+        'market': market,
+        'category': category,
+        'date': day,
+        'rows': rows,
+        'json': payload,
+        'etag': hashlib.md5(payload).hexdigest(),
+    }
+
+
+def get_price_board(market=None, category=None, day=None):
+    """Return the cached board, building it on first use"""
+    day = day or date.today()
+
+    if (market and market not in dict(MarketPrice.MARKET_CHOICES)) or (
+        category and category not in dict(MarketPrice._meta.get_field('category').choices)
+    ):
+        # Unknown filters match nothing; building them keeps junk out of the cache
+        return build_price_board(market, category, day)
+
+    name = f"marketplace:price-board:{market or 'all'}:{category or 'all'}:{day.isoformat()}"
+    return catalog_cache.get_or_load(
+        name,
+        lambda: build_price_board(market, category, day),
+        models=[MarketPrice],
+    )
+
+
+def refresh_price_boards(day=None):
+    """Invalidate and rebuild the per-market and all-market boards after an ingest"""
+    catalog_cache.invalidate(MarketPrice)
+    boards = [get_price_board(None, None, day)]
+    for market, _ in MarketPrice.MARKET_CHOICES:
+        boards.append(get_price_board(market, None, day))
+    return boards
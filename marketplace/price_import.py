@@ -0,0 +1,348 @@
+"""
+Bulk import of daily market price sheets.
+
+Sheets arrive as CSV or XLSX files with one price report per row. Rows are
+streamed from the file in chunks; each chunk is turned into columns and
+validated column-wise with boolean masks (price ordering, positive prices,
+known markets, categories and units), and the valid rows are upserted on
+MarketPrice's (product_name, market, price_date) key with one statement per
+chunk. XLSX files are read with the standard library so no spreadsheet
+dependency is needed.
+"""
+
+import csv
+import io
+import re
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from xml.etree.ElementTree import iterparse
+
+from django.db import transaction
+
+from kilimo_guru.cache import catalog_cache
+from .models import MarketPrice
+
+COLUMNS = [
+    'product_name', 'category', 'market', 'unit',
+    'min_price', 'max_price', 'average_price', 'price_date', 'source',
+]
+
+UPDATE_FIELDS = [
+    'category', 'unit', 'min_price', 'max_price', 'average_price', 'source', 'updated_at',
+]
+
+# Header spellings seen on market sheets
+HEADER_ALIASES = {
+    'product': 'product_name',
+    'commodity': 'product_name',
+    'item': 'product_name',
+    'min': 'min_price',
+    'minimum': 'min_price',
+    'minimum_price': 'min_price',
+    'max': 'max_price',
+    'maximum': 'max_price',
+    'maximum_price': 'max_price',
+    'avg': 'average_price',
+    'avg_price': 'average_price',
+    'average': 'average_price',
+    'date': 'price_date',
+}
+
+# Unit spellings, compared with spaces, underscores, dots and brackets removed
+UNIT_ALIASES = {
+    'kg': 'kg', 'kgs': 'kg', 'kilo': 'kg', 'kilogram': 'kg', 'kilograms': 'kg', 'perkg': 'kg',
+    'tonne': 'tonne', 'tonnes': 'tonne', 'ton': 'tonne', 'tons': 'tonne', 't': 'tonne',
+    'bag90kg': 'bag_90kg', '90kgbag': 'bag_90kg', '90kg': 'bag_90kg',
+    'bag50kg': 'bag_50kg', '50kgbag': 'bag_50kg', '50kg': 'bag_50kg',
+    'piece': 'piece', 'pieces': 'piece', 'pc': 'piece', 'pcs': 'piece', 'each': 'piece',
+    'liter': 'liter', 'litre': 'liter', 'liters': 'liter', 'litres': 'liter', 'l': 'liter', 'ltr': 'liter',
+    'crate': 'crate', 'crates': 'crate',
+    'dozen': 'dozen', 'doz': 'dozen',
+}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y']
+
+# Excel stores dates as days since 1899-12-30; larger numbers are not serials
+EXCEL_EPOCH = date(1899, 12, 30)
+MAX_EXCEL_SERIAL = 100000
+
+MAX_REPORTED_REJECTS = 1000
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+def _squash(value):
+    return re.sub(r'[\s_.()\-/]', '', str(value or '').lower())
+
+
+def _choice_lookup(choices):
+    lookup = {}
+    for value, label in choices:
+        lookup[_squash(value)] = value
+        lookup[_squash(label)] = value
+    return lookup
+
+
+MARKETS = _choice_lookup(MarketPrice.MARKET_CHOICES)
+CATEGORIES = _choice_lookup(MarketPrice._meta.get_field('category').choices)
+UNITS = {**_choice_lookup(MarketPrice._meta.get_field('unit').choices), **UNIT_ALIASES}
+
+
+def normalize_header(header):
+    key = re.sub(r'[^a-z0-9]+', '_', str(header or '').strip().lower()).strip('_')
+    return HEADER_ALIASES.get(key, key)
+
+
+def read_csv(handle):
+    """Yield row dicts from a binary or text CSV file object"""
+    if not isinstance(handle, io.TextIOBase):
+        handle = io.TextIOWrapper(handle, encoding='utf-8-sig', newline='')
+    reader = csv.reader(handle)
+    headers = [normalize_header(header) for header in next(reader, [])]
+    for values in reader:
+        if any(value.strip() for value in values):
+            yield dict(zip(headers, values))
+
+
+def _xlsx_shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as handle:
+        for _, element in iterparse(handle):
+            if element.tag == f'{XLSX_NS}si':
+                strings.append(''.join(text.text or '' for text in element.iter(f'{XLSX_NS}t')))
+                element.clear()
+    return strings
+
+
+def _xlsx_first_sheet(archive):
+    with archive.open('xl/workbook.xml') as handle:
+        for _, element in iterparse(handle):
+            if element.tag == f'{XLSX_NS}sheet':
+                relation = element.get(f'{XLSX_REL_NS}id')
+                break
+        else:
+            raise ValueError('workbook has no sheets')
+
+    with archive.open('xl/_rels/workbook.xml.rels') as handle:
+        for _, element in iterparse(handle):
+            if element.get('Id') == relation:
+                target = element.get('Target').lstrip('/')
+                return target if target.startswith('xl/') else f'xl/{target}'
+    raise ValueError('sheet relationship not found')
+
+
+def _xlsx_column(reference):
+    index = 0
+    for letter in re.match(r'[A-Z]+', reference).group():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def _xlsx_rows(archive, sheet, strings):
+    with archive.open(sheet) as handle:
+        for _, element in iterparse(handle):
+            if element.tag != f'{XLSX_NS}row':
+                continue
+            row = {}
+            for cell in element.iter(f'{XLSX_NS}c'):
+                kind = cell.get('t')
+                if kind == 'inlineStr':
+                    value = ''.join(text.text or '' for text in cell.iter(f'{XLSX_NS}t'))
+                else:
+                    raw = cell.find(f'{XLSX_NS}v')
+                    value = raw.text if raw is not None else ''
+                    if kind == 's' and value:
+                        value = strings[int(value)]
+                row[_xlsx_column(cell.get('r'))] = value
+            element.clear()
+            if row:
+                yield [row.get(index, '') for index in range(max(row) + 1)]
+
+
+def read_xlsx(handle):
+    """Yield row dicts from the first worksheet of an XLSX file object"""
+    try:
+        archive = zipfile.ZipFile(handle)
+        strings = _xlsx_shared_strings(archive)
+        sheet = _xlsx_first_sheet(archive)
+    except (zipfile.BadZipFile, KeyError) as exc:
+        raise ValueError(f'not a readable XLSX workbook ({exc})')
+
+    with archive:
+        rows = _xlsx_rows(archive, sheet, strings)
+        headers = [normalize_header(header) for header in next(rows, [])]
+        for values in rows:
+            if any(str(value).strip() for value in values):
+                yield dict(zip(headers, values))
+
+
+def read_price_sheet(handle, name):
+    """Yield row dicts from a CSV or XLSX price sheet"""
+    if name.lower().endswith('.xlsx'):
+        return read_xlsx(handle)
+    if name.lower().endswith('.csv'):
+        return read_csv(handle)
+    raise ValueError(f'{name}: price sheets must be .csv or .xlsx files')
+
+
+def _decimal(value):
+    try:
+        value = Decimal(str(value).replace(',', '').strip())
+        return value.quantize(Decimal('0.01')) if value.is_finite() else None
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _date(value):
+    value = str(value or '').strip()
+    try:
+        if re.fullmatch(r'\d{8}', value):
+            return datetime.strptime(value, '%Y%m%d').date()
+        if re.fullmatch(r'\d+(\.0+)?', value):
+            serial = int(float(value))
+            return EXCEL_EPOCH + timedelta(days=serial) if serial < MAX_EXCEL_SERIAL else None
+    except (ValueError, OverflowError):
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value[:10], date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _reject(errors, mask, reason):
+    for index, bad in enumerate(mask):
+        if bad and errors[index] is None:
+            errors[index] = reason
+
+
+def validate_chunk(rows):
+    """Validate a chunk of row dicts column-wise.
+
+    Returns the parsed columns and a per-row list holding the rejection
+    reason, or None for valid rows.
+    """
+    raw = {column: [row.get(column, '') for row in rows] for column in COLUMNS}
+
+    columns = {
+        'product_name': [str(value or '').strip() for value in raw['product_name']],
+        'market': [MARKETS.get(_squash(value)) for value in raw['market']],
+        'category': [CATEGORIES.get(_squash(value)) for value in raw['category']],
+        'unit': [UNITS.get(_squash(value)) for value in raw['unit']],
+        'min_price': list(map(_decimal, raw['min_price'])),
+        'max_price': list(map(_decimal, raw['max_price'])),
+        'average_price': list(map(_decimal, raw['average_price'])),
+        'price_date': list(map(_date, raw['price_date'])),
+        'source': [str(value or '').strip()[:100] for value in raw['source']],
+    }
+
+    # A missing average is taken as the midpoint of the range
+    columns['average_price'] = [
+        average if average is not None or low is None or high is None
+        else ((low + high) / 2).quantize(Decimal('0.01'))
+        for average, low, high in zip(
+            columns['average_price'], columns['min_price'], columns['max_price']
+        )
+    ]
+
+    errors = [None] * len(rows)
+    product_length = MarketPrice._meta.get_field('product_name').max_length
+    _reject(errors, [not name for name in columns['product_name']], 'missing product name')
+    _reject(errors, [len(name) > product_length for name in columns['product_name']], 'product name too long')
+    _reject(errors, [market is None for market in columns['market']], 'unknown market')
+    _reject(errors, [category is None for category in columns['category']], 'unknown category')
+    _reject(errors, [unit is None for unit in columns['unit']], 'unknown unit')
+    for column in ('min_price', 'max_price', 'average_price'):
+        _reject(errors, [value is None for value in columns[column]], f'invalid {column}')
+        _reject(errors, [value is not None and value <= 0 for value in columns[column]], f'{column} must be positive')
+        _reject(errors, [value is not None and value >= Decimal('1e8') for value in columns[column]], f'{column} too large')
+    _reject(errors, [
+        low is not None and average is not None and high is not None
+        and not low <= average <= high
+        for low, average, high in zip(
+            columns['min_price'], columns['average_price'], columns['max_price']
+        )
+    ], 'prices must satisfy min <= average <= max')
+    _reject(errors, [day is None for day in columns['price_date']], 'invalid price date')
+
+    return columns, errors
+
+
+class PriceImport:
+    """Streams price sheet rows into chunked, validated bulk upserts"""
+
+    def __init__(self, batch_size=2000, source=''):
+        self.batch_size = batch_size
+        self.source = source[:MarketPrice._meta.get_field('source').max_length]
+        self.rejects = []
+        self.stats = {'rows': 0, 'imported': 0, 'rejected': 0, 'dates': set()}
+
+    def import_rows(self, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.batch_size:
+                self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+
+    def _import_chunk(self, rows):
+        first_line = self.stats['rows'] + 2  # 1-based, after the header row
+        self.stats['rows'] += len(rows)
+        columns, errors = validate_chunk(rows)
+
+        prices = {}
+        for index, error in enumerate(errors):
+            if error is not None:
+                self.stats['rejected'] += 1
+                if len(self.rejects) < MAX_REPORTED_REJECTS:
+                    self.rejects.append({'line': first_line + index, 'reason': error, **rows[index]})
+                continue
+
+            values = {column: columns[column][index] for column in COLUMNS}
+            values['source'] = values['source'] or self.source
+            # Later rows for the same key replace earlier ones in the sheet
+            key = (values['product_name'], values['market'], values['price_date'])
+            prices[key] = MarketPrice(**values)
+
+        if prices:
+            MarketPrice.objects.bulk_create(
+                list(prices.values()),
+                update_conflicts=True,
+                unique_fields=['product_name', 'market', 'price_date'],
+                update_fields=UPDATE_FIELDS,
+            )
+            self.stats['imported'] += len(prices)
+            self.stats['dates'].update(day for _, _, day in prices)
+
+
+def import_market_prices(handle, name, batch_size=2000, source=''):
+    """Import a CSV/XLSX price sheet.
+
+    The sheet is imported in one transaction. Bulk upserts fire no signals,
+    so the cached price boards are invalidated here. Returns the statistics and the rejected rows with their reasons.
+    """
+    started = time.monotonic()
+    price_import = PriceImport(batch_size=batch_size, source=source)
+    # A sheet failing part way (e.g. a corrupt XLSX) leaves no chunk behind
+    with transaction.atomic():
+        price_import.import_rows(read_price_sheet(handle, name))
+
+    if price_import.stats['imported']:
+        catalog_cache.invalidate(MarketPrice)
+
+    stats = price_import.stats
+    seconds = time.monotonic() - started
+    stats.update({
+        'dates': sorted(stats['dates']),
+        'seconds': seconds,
+        'rows_per_second': stats['rows'] / seconds if seconds else 0,
+    })
+    return stats, price_import.rejects
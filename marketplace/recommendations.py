@@ -0,0 +1,234 @@
+"""
+Precomputed "similar listings" and buyer recommendations.
+
+Every active listing is reduced to a profile: category, canonical product
+(see ``matching.normalize_product``), county and a price band measured
+against the median price of the same product. Listings sharing a profile
+are interchangeable, so similarity is scored between the few distinct
+profiles of a category rather than between every pair of listings, and
+each listing's neighbours are then taken newest first from the best
+scoring profiles.
+
+Buyers are profiled from their recent inquiries; the listings closest to
+any profile they asked about are recommended, leaving out listings they
+already inquired about and their own.
+
+``build_recommendations`` rewrites both stores and runs periodically;
+listings created and buyers first seen since the last build fall back to a
+category query (buyers without inquiries get the most viewed listings).
+"""
+
+import math
+import time
+from collections import defaultdict, namedtuple
+from statistics import median
+
+from django.db import transaction
+
+from .matching import normalize_product
+from .models import BuyerInquiry, ListingRecommendation, ProduceListing, SimilarListing
+
+SIMILAR_PER_LISTING = 8
+RECOMMENDATIONS_PER_BUYER = 8
+
+# Most recent inquiries per buyer used to build their profile
+INQUIRY_HISTORY = 50
+
+# Points per matching feature; they add up to 100
+PRODUCT_POINTS = 50
+COUNTY_POINTS = 30
+PRICE_POINTS = 20
+
+# Price bands are powers of two around the median; this many apart scores nothing
+PRICE_BAND_SPAN = 3
+
+Profile = namedtuple('Profile', ['category', 'product', 'county', 'band'])
+
+
+def price_band(price, median_price):
+    """Distance of price from the product's median in powers of two"""
+    if not price or not median_price:
+        return 0
+    band = round(math.log2(float(price) / float(median_price)))
+    return max(-PRICE_BAND_SPAN, min(PRICE_BAND_SPAN, band))
+
+
+def profile_score(a, b):
+    """Similarity out of 100 between two profiles of the same category"""
+    points = PRICE_POINTS * max(0, 1 - abs(a.band - b.band) / PRICE_BAND_SPAN)
+    if a.product == b.product:
+        points += PRODUCT_POINTS
+    if a.county == b.county:
+        points += COUNTY_POINTS
+    return round(points)
+
+
+class SimilarityIndex:
+    """Active listings grouped by profile, newest first"""
+
+    def __init__(self, rows):
+        """rows are (id, farmer_id, category, product_name, county, price) tuples"""
+        products = {}
+        prices = defaultdict(list)
+        for listing_id, _, category, product_name, _, price in rows:
+            product = products.setdefault(product_name, normalize_product(product_name))
+            prices[category, product].append(price)
+        self.medians = {key: median(values) for key, values in prices.items()}
+        self.products = products
+
+        self.groups = defaultdict(list)
+        self.categories = defaultdict(set)
+        self.profiles = {}
+        self.farmer_listings = defaultdict(set)
+        for listing_id, farmer_id, category, product_name, county, price in rows:
+            profile = self.profile(category, product_name, county, price)
+            self.groups[profile].append(listing_id)
+            self.categories[category].add(profile)
+            self.profiles[listing_id] = profile
+            self.farmer_listings[farmer_id].add(listing_id)
+        self.ranked = {}
+
+    @classmethod
+    def load(cls, queryset):
+        return cls(list(queryset.order_by('-created_at', '-pk').values_list(
+            'id', 'farmer_id', 'category', 'product_name', 'county', 'price_per_unit'
+        )))
+
+    def profile(self, category, product_name, county, price):
+        product = self.products.get(product_name) or normalize_product(product_name)
+        return Profile(
+            category,
+            product,
+            (county or '').strip().lower(),
+            price_band(price, self.medians.get((category, product))),
+        )
+
+    def ranked_profiles(self, profile):
+        """(score, profile) pairs of profile's category, most similar first"""
+        if profile not in self.ranked:
+            self.ranked[profile] = sorted(
+                ((profile_score(profile, other), other) for other in self.categories[profile.category]),
+                key=lambda item: (-item[0], item[1]),
+            )
+        return self.ranked[profile]
+
+    def _collect(self, ranked, exclude, limit):
+        found = []
+        for points, profile in ranked:
+            for listing_id in self.groups[profile]:
+                if listing_id not in exclude:
+                    found.append((listing_id, points))
+                    if len(found) == limit:
+                        return found
+        return found
+
+    def similar(self, listing_id, limit=SIMILAR_PER_LISTING):
+        """(listing_id, score) neighbours of an indexed listing"""
+        return self._collect(
+            self.ranked_profiles(self.profiles[listing_id]), {listing_id}, limit
+        )
+
+    def recommend(self, profiles, exclude, limit=RECOMMENDATIONS_PER_BUYER):
+        """(listing_id, score) pairs closest to any of profiles"""
+        best = {}
+        for profile in profiles:
+            for points, other in self.ranked_profiles(profile):
+                if points > best.get(other, -1):
+                    best[other] = points
+        ranked = sorted(
+            ((points, other) for other, points in best.items()),
+            key=lambda item: (-item[0], item[1]),
+        )
+        return self._collect(ranked, exclude, limit)
+
+
+def _buyer_histories(index):
+    """Profiles and inquired listing ids per buyer, from recent inquiries"""
+    profiles = defaultdict(set)
+    inquired = defaultdict(set)
+    counts = defaultdict(int)
+    inquiries = BuyerInquiry.objects.order_by('buyer_id', '-created_at').values_list(
+        'buyer_id', 'listing_id', 'listing__category', 'listing__product_name',
+        'listing__county', 'listing__price_per_unit',
+    )
+    for buyer_id, listing_id, category, product_name, county, price in inquiries.iterator(chunk_size=2000):
+        inquired[buyer_id].add(listing_id)
+        if counts[buyer_id] < INQUIRY_HISTORY:
+            counts[buyer_id] += 1
+            profiles[buyer_id].add(index.profile(category, product_name, county, price))
+    return profiles, inquired
+
+
+def build_recommendations(batch_size=1000):
+    """Rebuild the similar-listing and buyer recommendation stores"""
+    started = time.monotonic()
+    index = SimilarityIndex.load(ProduceListing.objects.filter(status='active'))
+
+    similar = [
+        SimilarListing(listing_id=listing_id, similar_id=similar_id, score=points)
+        for listing_id in index.profiles
+        for similar_id, points in index.similar(listing_id)
+    ]
+
+    profiles, inquired = _buyer_histories(index)
+    recommendations = []
+    for buyer_id, buyer_profiles in profiles.items():
+        exclude = inquired[buyer_id] | index.farmer_listings.get(buyer_id, set())
+        recommendations.extend(
+            ListingRecommendation(buyer_id=buyer_id, listing_id=listing_id, score=points)
+            for listing_id, points in index.recommend(buyer_profiles, exclude)
+        )
+    computed = time.monotonic()
+
+    with transaction.atomic():
+        SimilarListing.objects.all().delete()
+        SimilarListing.objects.bulk_create(similar, batch_size=batch_size)
+        ListingRecommendation.objects.all().delete()
+        ListingRecommendation.objects.bulk_create(recommendations, batch_size=batch_size)
+
+    return {
+        'listings': len(index.profiles),
+        'profiles': len(index.groups),
+        'buyers': len(profiles),
+        'similar': len(similar),
+        'recommendations': len(recommendations),
+        'compute_seconds': computed - started,
+        'seconds': time.monotonic() - started,
+    }
+
+
+def similar_listings(listing, limit=4):
+    """Active listings similar to listing, from the store when it has them"""
+    stored = [
+        entry.similar for entry in SimilarListing.objects.filter(
+            listing=listing, similar__status='active'
+        ).select_related('similar')[:limit]
+    ]
+    if stored:
+        return stored
+    return list(ProduceListing.objects.filter(
+        category=listing.category, status='active'
+    ).exclude(pk=listing.pk).order_by('-created_at')[:limit])
+
+
+def recommended_listings(user, limit=4):
+    """Active listings recommended to a buyer, from the store when it has them"""
+    stored = [
+        entry.listing for entry in ListingRecommendation.objects.filter(
+            buyer=user, listing__status='active'
+        ).select_related('listing')[:limit]
+    ]
+    if stored:
+        return stored
+
+    # Buyers new since the last build: listings in the categories they asked about
+    active = ProduceListing.objects.filter(status='active')
+    categories = BuyerInquiry.objects.filter(buyer=user).values_list('listing__category', flat=True)
+    listings = list(
+        active.filter(category__in=categories).exclude(inquiries__buyer=user)
+        .order_by('-created_at').distinct()[:limit]
+    )
+    if listings:
+        return listings
+    # or, without any inquiries yet, the most viewed
+    return list(active.exclude(farmer=user).order_by('-view_count', '-created_at')[:limit])
@@ -0,0 +1,288 @@
+"""
+Full-text search over produce listings.
+
+Every listing stores a normalized ``search_document`` built from its name,
+variety, description, category and location, expanded with Swahili/English
+product synonyms so that "mahindi" finds maize and "tomato" finds nyanya.
+The document is indexed by the database:
+
+* PostgreSQL: a GIN index on ``to_tsvector('simple', search_document)``,
+  queried with SearchVector/SearchQuery and ranked with SearchRank.
+* SQLite: an external-content FTS5 table kept in sync by triggers and
+  ranked with bm25.
+
+Migrations that rebuild the listing table drop the SQLite triggers, so the
+index is (re)installed after every migrate (see marketplace/signals.py),
+together with the documents of listings that have none yet. Other
+databases, and SQLite while the triggers are missing, fall back to
+substring matching on the document. Every query term is matched as a
+prefix. Documents are rebuilt on save; run ``rebuild_search_index`` after
+changing the synonym list.
+"""
+
+import re
+
+from django.db import OperationalError, connection
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.expressions import RawSQL
+
+# Groups of interchangeable product names; phrases are matched as a whole
+SYNONYMS = [
+    ['maize', 'mahindi', 'corn'],
+    ['beans', 'bean', 'maharagwe', 'maharage'],
+    ['potatoes', 'potato', 'viazi', 'irish potatoes', 'viazi mviringo'],
+    ['sweet potatoes', 'sweet potato', 'viazi vitamu'],
+    ['tomatoes', 'tomato', 'nyanya'],
+    ['kale', 'sukuma wiki', 'sukuma'],
+    ['cabbage', 'cabbages', 'kabichi'],
+    ['onions', 'onion', 'vitunguu'],
+    ['bananas', 'banana', 'ndizi', 'matoke'],
+    ['milk', 'maziwa'],
+    ['eggs', 'egg', 'mayai'],
+    ['meat', 'nyama'],
+    ['chicken', 'kuku', 'poultry'],
+    ['rice', 'mchele', 'mpunga'],
+    ['wheat', 'ngano'],
+    ['sorghum', 'mtama'],
+    ['millet', 'wimbi', 'mawele'],
+    ['mangoes', 'mango', 'maembe', 'embe'],
+    ['avocados', 'avocado', 'parachichi'],
+    ['pineapples', 'pineapple', 'nanasi', 'mananasi'],
+    ['oranges', 'orange', 'machungwa', 'chungwa'],
+    ['watermelons', 'watermelon', 'tikiti', 'tikiti maji'],
+    ['carrots', 'carrot', 'karoti'],
+    ['cassava', 'mihogo', 'muhogo'],
+    ['groundnuts', 'groundnut', 'peanuts', 'njugu', 'karanga'],
+    ['green grams', 'ndengu', 'pojo', 'mung beans'],
+    ['cowpeas', 'cowpea', 'kunde'],
+    ['pigeon peas', 'mbaazi'],
+    ['sugarcane', 'miwa'],
+    ['tea', 'chai', 'majani chai'],
+    ['coffee', 'kahawa'],
+    ['honey', 'asali'],
+    ['fish', 'samaki'],
+    ['goats', 'goat', 'mbuzi'],
+    ['cattle', 'cow', 'cows', 'ngombe'],
+    ['sheep', 'kondoo'],
+    ['spinach', 'spinachi', 'mchicha'],
+    ['coriander', 'dhania', 'dania'],
+    ['pepper', 'peppers', 'pilipili', 'capsicum', 'pilipili hoho'],
+]
+
+FTS_TABLE = 'marketplace_producelisting_fts'
+FTS_TRIGGERS = ('ai', 'ad', 'au')
+
+# Matches ranked by bm25 on SQLite; the rest follow, newest first
+MAX_RANKED_RESULTS = 200
+
+
+def tokenize(text):
+    """Lower-cased word tokens, with apostrophes dropped (ng'ombe -> ngombe)"""
+    return re.findall(r'\w+', (text or '').lower().replace("'", '').replace('’', ''))
+
+
+def _normalized(phrase):
+    return ' '.join(tokenize(phrase))
+
+
+SYNONYM_GROUPS = [[_normalized(term) for term in group] for group in SYNONYMS]
+SYNONYM_TERMS = sorted(
+    {term for group in SYNONYM_GROUPS for term in group},
+    key=lambda term: (-len(term.split()), term),
+)
+
+
+def expand_synonyms(tokens):
+    """Synonyms of every product name found in the token sequence.
+
+    Longer names are matched first and consumed, so "viazi vitamu" expands to
+    sweet potatoes only, not to potatoes as well.
+    """
+    text = f" {' '.join(tokens)} "
+    present = set()
+    for term in SYNONYM_TERMS:
+        if f' {term} ' in text:
+            present.add(term)
+            text = text.replace(f' {term} ', ' | ')
+
+    expansions = []
+    for group in SYNONYM_GROUPS:
+        if present.intersection(group):
+            expansions.extend(term for term in group if term not in present)
+    return expansions
+
+
+# Listing fields the search document is built from
+SEARCH_DOCUMENT_FIELDS = {
+    'product_name', 'variety', 'category', 'description', 'county', 'sub_county',
+}
+
+
+def build_search_document(listing):
+    """Normalized, synonym-expanded text indexed for a produce listing"""
+    tokens = tokenize(' '.join(filter(None, [
+        listing.product_name,
+        listing.variety,
+        listing.get_category_display(),
+        listing.description,
+        listing.county,
+        listing.sub_county,
+    ])))
+    return ' '.join(tokens + expand_synonyms(tokens))
+
+
+def _fts_query(terms):
+    return ' AND '.join(f'"{term}"*' for term in terms)
+
+
+def _tsquery(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def _search_postgresql(queryset, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    vector = SearchVector('search_document', config='simple')
+    query = SearchQuery(_tsquery(terms), config='simple', search_type='raw')
+    return queryset.annotate(
+        search=vector,
+        rank=SearchRank(vector, query),
+    ).filter(search=query).order_by('-rank', '-created_at')
+
+
+def _search_sqlite(queryset, terms):
+    match = _fts_query(terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY rank LIMIT {MAX_RANKED_RESULTS}',
+            [match]
+        )
+        ranked = ',' + ','.join(str(row[0]) for row in cursor.fetchall()) + ','
+
+    table = queryset.model._meta.db_table
+    # Position in the ranked id list; cheaper to sort on than a CASE per id
+    rank = RawSQL(f"instr(%s, ',' || {table}.id || ',')", [ranked], output_field=IntegerField())
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    ).annotate(rank=rank).order_by(
+        Case(When(rank=0, then=Value(1)), default=Value(0)), 'rank', '-created_at'
+    )
+
+
+def _search_substring(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    return queryset
+
+
+def search_listings(queryset, query):
+    """Filter a ProduceListing queryset by query, best matches first"""
+    terms = tokenize(query)
+    if not terms:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(queryset, terms)
+    # Without its sync triggers the FTS5 table misses new and changed listings
+    if connection.vendor == 'sqlite' and search_index_installed(connection, queryset.model._meta.db_table):
+        try:
+            return _search_sqlite(queryset, terms)
+        except OperationalError:
+            # FTS5 not compiled into this SQLite
+            pass
+    return _search_substring(queryset, terms)
+
+
+def search_index():
+    """GIN index used by PostgreSQL searches"""
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(
+        SearchVector('search_document', config='simple'),
+        name='listing_search_gin',
+    )
+
+
+def search_index_installed(connection, table):
+    """Whether the full-text index for table is fully in place on connection"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            return search_index().name in connection.introspection.get_constraints(cursor, table)
+        if connection.vendor == 'sqlite':
+            names = [FTS_TABLE] + [f'{FTS_TABLE}_{suffix}' for suffix in FTS_TRIGGERS]
+            cursor.execute(
+                f"SELECT count(*) FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})",
+                names
+            )
+            return cursor.fetchone()[0] == len(names)
+    return True
+
+
+def install_search_index(schema_editor, model):
+    """Create the database-specific full-text index for model unless it exists.
+
+    Returns whether anything was installed. SQLite drops the triggers when a
+    later migration rebuilds the table, so this runs after every migrate.
+    """
+    vendor = schema_editor.connection.vendor
+    table = model._meta.db_table
+    if search_index_installed(schema_editor.connection, table):
+        return False
+
+    if vendor == 'postgresql':
+        schema_editor.add_index(model, search_index())
+
+    elif vendor == 'sqlite':
+        for statement in [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"search_document, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, search_document) "
+            f"VALUES (new.id, new.search_document); END",
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+            f"VALUES ('delete', old.id, old.search_document); END",
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_document ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+            f"VALUES ('delete', old.id, old.search_document); "
+            f"INSERT INTO {FTS_TABLE}(rowid, search_document) "
+            f"VALUES (new.id, new.search_document); END",
+            # Writes made while the triggers were missing are picked up here
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+        ]:
+            schema_editor.execute(statement)
+    return True
+
+
+def build_missing_search_documents(manager, batch_size=1000):
+    """Fill in search documents of the manager's listings that have none; returns the count"""
+    updated = 0
+    batch = []
+    for listing in manager.filter(search_document='').order_by('pk').iterator(chunk_size=batch_size):
+        listing.search_document = build_search_document(listing)
+        if listing.search_document:
+            batch.append(listing)
+        if len(batch) >= batch_size:
+            manager.bulk_update(batch, ['search_document'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        manager.bulk_update(batch, ['search_document'])
+        updated += len(batch)
+    return updated
+
+
+def uninstall_search_index(schema_editor, model):
+    """Drop the database-specific full-text index for model"""
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {search_index().name}')
+
+    elif vendor == 'sqlite':
+        for suffix in FTS_TRIGGERS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
@@ -0,0 +1,52 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .matching import MATCH_FIELDS, update_listing_matches, update_request_matches
+from .models import BuyerRequest, ProduceListing
+from .search import (
+    SEARCH_DOCUMENT_FIELDS, build_missing_search_documents, build_search_document,
+    install_search_index,
+)
+
+
+@receiver(pre_save, sender=ProduceListing)
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    """Keep the indexed search text in step with the listing"""
+    if update_fields is None or (SEARCH_DOCUMENT_FIELDS | {'search_document'}).intersection(update_fields):
+        instance.search_document = build_search_document(instance)
+
+
+@receiver(post_save, sender=ProduceListing)
+def save_search_document(sender, instance, update_fields=None, **kwargs):
+    """Write the document rebuilt for a save whose update_fields left it out"""
+    if (update_fields is not None and 'search_document' not in update_fields
+            and SEARCH_DOCUMENT_FIELDS.intersection(update_fields)):
+        sender.objects.filter(pk=instance.pk).update(search_document=instance.search_document)
+
+
+@receiver(post_save, sender=ProduceListing)
+def rematch_listing(sender, instance, update_fields=None, **kwargs):
+    """Refresh the buyer request matches of a changed listing"""
+    if update_fields is None or MATCH_FIELDS.intersection(update_fields):
+        transaction.on_commit(lambda: update_listing_matches(instance.pk))
+
+
+@receiver(post_save, sender=BuyerRequest)
+def rematch_request(sender, instance, **kwargs):
+    """Refresh the matches of a changed buyer request"""
+    transaction.on_commit(lambda: update_request_matches(instance.pk))
+
+
+def install_listing_search(sender, apps, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Build missing search documents and (re)install the full-text index after migrate"""
+    try:
+        model = apps.get_model('marketplace', 'ProduceListing')
+        model._meta.get_field('search_document')
+    except (LookupError, FieldDoesNotExist):
+        # Migrated back past 0003_listing_search
+        return
+    build_missing_search_documents(model._default_manager.db_manager(using))
+    with connections[using].schema_editor() as schema_editor:
+        install_search_index(schema_editor, model)
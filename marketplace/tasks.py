@@ -0,0 +1,30 @@
+import logging
+
+from celery import shared_task
+
+from .matching import rebuild_matches
+from .recommendations import build_recommendations
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rebuild_request_matches_task(batch_size=1000):
+    """Nightly rematch of open buyer requests, dropping expired listings and requests"""
+    stats = rebuild_matches(batch_size=batch_size)
+    logger.info(
+        'Matched %(requests)s buyer requests against %(listings)s listings: '
+        '%(matches)s matches in %(seconds).2fs', stats
+    )
+    return stats
+
+
+@shared_task
+def build_recommendations_task(batch_size=1000):
+    """Periodic rebuild of similar listings and buyer recommendations"""
+    stats = build_recommendations(batch_size=batch_size)
+    logger.info(
+        'Built %(similar)s similar listings and %(recommendations)s recommendations '
+        'for %(listings)s listings and %(buyers)s buyers in %(seconds).2fs', stats
+    )
+    return stats
@@ -1,3 +1,5 @@
+import hashlib
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import (
     View, ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
@@ -6,17 +8,37 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.db.models import Q, Avg
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
+from kilimo_guru.counters import counter_buffer
 from .models import (
     MarketPrice, ProduceListing, LivestockListing,
-    BuyerInquiry, BuyerRequest, Transaction
+    BuyerInquiry, BuyerRequest, RequestMatch, Transaction
 )
 from .forms import (
     ProduceListingForm, LivestockListingForm, BuyerInquiryForm,
     BuyerRequestForm, InquiryResponseForm
 )
+from .price_board import get_price_board
+from .recommendations import recommended_listings, similar_listings
+from .search import search_listings
+
+
+def _price_board_for(request, *args, **kwargs):
+    market = kwargs.get('market') or request.GET.get('market') or None
+    category = request.GET.get('category') or None
+    return get_price_board(market, category)
+
 
+def _price_page_etag(request, *args, **kwargs):
+    # The page also depends on the query string and on who is logged in
+    board = _price_board_for(request, *args, **kwargs)
+    query = hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:8]
+    return f"{board['etag']}-{request.user.pk or 0}-{query}"
 
+
+@method_decorator(condition(etag_func=_price_page_etag), name='get')
 class MarketPriceListView(ListView):
     """List current market prices"""
     model = MarketPrice
@@ -25,27 +47,16 @@ class MarketPriceListView(ListView):
     paginate_by = 30
     
     def get_queryset(self):
-        from datetime import date, timedelta
-        # Get prices from last 7 days
-        recent_date = date.today() - timedelta(days=7)
-        queryset = MarketPrice.objects.filter(price_date__gte=recent_date)
-        
-        # Filter by market
-        market = self.request.GET.get('market')
-        if market:
-            queryset = queryset.filter(market=market)
-        
-        # Filter by category
-        category = self.request.GET.get('category')
-        if category:
-            queryset = queryset.filter(category=category)
+        # Prices from the last 7 days, filtered by market and category
+        prices = _price_board_for(self.request)['rows']
         
         # Search
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(product_name__icontains=search)
+            search = search.lower()
+            prices = [price for price in prices if search in price['product_name'].lower()]
         
-        return queryset.order_by('-price_date')
+        return prices
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -57,13 +68,14 @@ class MarketPriceListView(ListView):
         # Price trends
         from datetime import date
         today = date.today()
-        context['trending_up'] = self.get_queryset().filter(
-            price_date=today
-        )[:5]
+        context['trending_up'] = [
+            price for price in self.object_list if price['price_date'] == today
+        ][:5]
         
         return context
 
 
+@method_decorator(condition(etag_func=_price_page_etag), name='get')
 class MarketPriceByMarketView(ListView):
     """Prices by specific market"""
     model = MarketPrice
@@ -71,13 +83,8 @@ class MarketPriceByMarketView(ListView):
     context_object_name = 'prices'
     
     def get_queryset(self):
-        market = self.kwargs.get('market')
-        from datetime import date, timedelta
-        recent_date = date.today() - timedelta(days=7)
-        return MarketPrice.objects.filter(
-            market=market,
-            price_date__gte=recent_date
-        ).order_by('product_name')
+        board = _price_board_for(self.request, **self.kwargs)
+        return sorted(board['rows'], key=lambda price: price['product_name'])
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -104,9 +111,9 @@ class ProduceListingListView(ListView):
             queryset = queryset.filter(category=category)
         
         # Filter by county
-        county = self.request.GET.get('county')
+        county = self.request.GET.get('county', '').strip()
         if county:
-            queryset = queryset.filter(county__icontains=county)
+            queryset = queryset.filter(county__iexact=county)
         
         # Filter by price range
         min_price = self.request.GET.get('min_price')
@@ -116,14 +123,10 @@ class ProduceListingListView(ListView):
         if max_price:
             queryset = queryset.filter(price_per_unit__lte=max_price)
         
-        # Search
+        # Search, best matches first
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(product_name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(variety__icontains=search)
-            )
+            queryset = search_listings(queryset, search)
         
         return queryset.select_related('farmer')
     
@@ -144,15 +147,12 @@ class ProduceListingDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Increment view count
-        self.object.view_count += 1
-        self.object.save(update_fields=['view_count'])
+        # Increment view count (written by the next counter flush)
+        counter_buffer.increment(self.object, 'view_count')
+        self.object.view_count += counter_buffer.pending_count(self.object, 'view_count')
         
         # Similar listings
-        context['similar_listings'] = ProduceListing.objects.filter(
-            category=self.object.category,
-            status='active'
-        ).exclude(id=self.object.id)[:4]
+        context['similar_listings'] = similar_listings(self.object)
         
         return context
 
@@ -260,8 +260,7 @@ class BuyerInquiryCreateView(LoginRequiredMixin, CreateView):
         
         # Update listing inquiry count
         listing = self.get_listing()
-        listing.inquiry_count += 1
-        listing.save(update_fields=['inquiry_count'])
+        counter_buffer.increment(listing, 'inquiry_count')
         
         messages.success(self.request, 'Inquiry sent successfully!')
         return redirect('marketplace:produce_detail', pk=listing.pk)
@@ -386,16 +385,14 @@ class BuyerDashboardView(LoginRequiredMixin, TemplateView):
             buyer=user
         )[:5]
         
-        # Recommended listings based on inquiries
-        inquiry_products = BuyerInquiry.objects.filter(
-            buyer=user
-        ).values_list('listing__category', flat=True).distinct()
+        # Listings matched to the buyer's open requests
+        context['matches'] = RequestMatch.objects.filter(
+            buyer_request__buyer=user,
+            buyer_request__status='active',
+            listing__status='active',
+        ).select_related('listing', 'buyer_request')[:8]
         
-        context['recommended'] = ProduceListing.objects.filter(
-            category__in=inquiry_products,
-            status='active'
-        ).exclude(
-            inquiries__buyer=user
-        )[:4]
+        # Recommended listings based on inquiries
+        context['recommended'] = recommended_listings(user)
         
         return context
@@ -1,101 +1,190 @@
 // KILIMO GURU Service Worker for Offline Support
+//
+// Served from /sw.js (kilimo_guru/pwa.py), which prepends the precache
+// manifest written by collectstatic as self.PRECACHE.
 
-const CACHE_NAME = 'kilimo-guru-v1';
-const STATIC_ASSETS = [
-    '/',
-    '/static/css/main.css',
-    '/static/js/main.js',
-    '/static/images/logo.png',
-    '/static/images/default-avatar.png',
+const PRECACHE = self.PRECACHE || { version: 'dev', urls: [], offline: '/offline/', logout: '/accounts/logout/' };
+
+const CACHE_PREFIX = 'kilimo-guru-';
+const PRECACHE_NAME = `${CACHE_PREFIX}precache-${PRECACHE.version}`;
+const PRECACHED = new Set(PRECACHE.urls.map((url) => new URL(url, self.location).href));
+
+// Runtime caches are least-recently-used and capped at maxEntries.
+// Bump a cache's suffix when what it stores changes shape.
+const RUNTIME = {
+    pages: { name: `${CACHE_PREFIX}pages-v2`, maxEntries: 25 },
+    static: { name: `${CACHE_PREFIX}static-v2`, maxEntries: 60 },
+    media: { name: `${CACHE_PREFIX}media-v2`, maxEntries: 80 },
+    api: { name: `${CACHE_PREFIX}api-v2`, maxEntries: 30 },
+};
+
+// Read-only API endpoints answered from cache while a fresh copy is fetched
+const STALE_WHILE_REVALIDATE_API = [
+    '/api/market/prices/',
+    '/api/alerts/',
+    '/api/weather/current/',
+    '/api/crops/',
 ];
 
-// Install event - cache static assets
+// Third-party stylesheets and scripts used by every page
+const CDN_HOSTS = ['cdn.tailwindcss.com', 'cdnjs.cloudflare.com'];
+
+// collectstatic names files like app.3f2a1b9c0d4e.css; those never change
+const HASHED_STATIC = /\.[0-9a-f]{12}\.[^/.]+$/;
+
+// Install event - precache the static assets of this version
 self.addEventListener('install', (event) => {
     event.waitUntil(
-        caches.open(CACHE_NAME)
-            .then((cache) => {
-                console.log('Caching static assets');
-                return cache.addAll(STATIC_ASSETS);
-            })
-            .catch((error) => {
-                console.error('Error caching assets:', error);
-            })
+        caches.open(PRECACHE_NAME)
+            .then((cache) => cache.addAll(
+                [...PRECACHE.urls, PRECACHE.offline].map((url) => new Request(url, { cache: 'reload' }))
+            ))
+            .then(() => self.skipWaiting())
     );
-    self.skipWaiting();
 });
 
-// Activate event - clean up old caches
+// Activate event - delete caches of previous versions
 self.addEventListener('activate', (event) => {
+    const current = new Set([PRECACHE_NAME, ...Object.values(RUNTIME).map((runtime) => runtime.name)]);
     event.waitUntil(
-        caches.keys().then((cacheNames) => {
-            return Promise.all(
+        caches.keys()
+            .then((cacheNames) => Promise.all(
                 cacheNames
-                    .filter((name) => name !== CACHE_NAME)
+                    .filter((name) => name.startsWith(CACHE_PREFIX) && !current.has(name))
                     .map((name) => caches.delete(name))
-            );
-        })
+            ))
+            .then(() => self.clients.claim())
     );
-    self.clients.claim();
 });
 
-// Fetch event - serve from cache or network
+// Fetch event - pick a strategy per kind of request
 self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    
     // Skip non-GET requests
-    if (event.request.method !== 'GET') {
+    if (request.method !== 'GET') {
         return;
     }
     
-    // Skip API requests
-    if (event.request.url.includes('/api/')) {
+    const url = new URL(request.url);
+    
+    if (url.origin !== self.location.origin) {
+        if (CDN_HOSTS.includes(url.hostname)) {
+            event.respondWith(staleWhileRevalidate(event, RUNTIME.static));
+        }
         return;
     }
     
     // Skip admin requests
-    if (event.request.url.includes('/admin/')) {
+    if (url.pathname.startsWith('/admin/')) {
         return;
     }
     
-    event.respondWith(
-        caches.match(event.request)
-            .then((response) => {
-                // Return cached response if found
-                if (response) {
-                    return response;
-                }
-                
-                // Fetch from network
-                return fetch(event.request)
-                    .then((networkResponse) => {
-                        // Don't cache non-successful responses
-                        if (!networkResponse || networkResponse.status !== 200) {
-                            return networkResponse;
-                        }
-                        
-                        // Clone response for caching
-                        const responseToCache = networkResponse.clone();
-                        
-                        // Cache the response
-                        caches.open(CACHE_NAME)
-                            .then((cache) => {
-                                cache.put(event.request, responseToCache);
-                            });
-                        
-                        return networkResponse;
-                    })
-                    .catch((error) => {
-                        console.error('Fetch failed:', error);
-                        
-                        // Return offline page for HTML requests
-                        if (event.request.headers.get('accept').includes('text/html')) {
-                            return caches.match('/offline/');
-                        }
-                        
-                        throw error;
-                    });
-            })
-    );
+    // Other API requests (writes, sync, per-user data) always go to the network
+    if (url.pathname.startsWith('/api/')) {
+        if (STALE_WHILE_REVALIDATE_API.includes(url.pathname)) {
+            event.respondWith(staleWhileRevalidate(event, RUNTIME.api));
+        }
+        return;
+    }
+    
+    if (PRECACHED.has(url.href)) {
+        event.respondWith(
+            caches.match(request, { cacheName: PRECACHE_NAME })
+                .then((response) => response || fetch(request))
+        );
+        return;
+    }
+    
+    if (url.pathname.startsWith('/static/')) {
+        event.respondWith(HASHED_STATIC.test(url.pathname)
+            ? cacheFirst(event, RUNTIME.static)
+            : staleWhileRevalidate(event, RUNTIME.static));
+        return;
+    }
+    
+    if (url.pathname.startsWith('/media/')) {
+        event.respondWith(cacheFirst(event, RUNTIME.media));
+        return;
+    }
+    
+    if (request.mode === 'navigate') {
+        if (url.pathname === PRECACHE.logout) {
+            // Do not leave the previous user's pages and data on a shared phone
+            event.waitUntil(Promise.all([caches.delete(RUNTIME.pages.name), caches.delete(RUNTIME.api.name)]));
+            return;
+        }
+        event.respondWith(networkFirst(event, RUNTIME.pages));
+    }
 });
 
+// Store a response as the most recently used entry and evict the oldest.
+// Cache keys are kept in insertion order and put() re-inserts at the end.
+async function store(runtime, request, response) {
+    const cache = await caches.open(runtime.name);
+    await cache.put(request, response);
+    const keys = await cache.keys();
+    const excess = keys.length - runtime.maxEntries;
+    if (excess > 0) {
+        await Promise.all(keys.slice(0, excess).map((key) => cache.delete(key)));
+    }
+}
+
+function cacheable(response) {
+    return response.ok || response.type === 'opaque';
+}
+
+async function cacheFirst(event, runtime) {
+    const cache = await caches.open(runtime.name);
+    const cached = await cache.match(event.request);
+    if (cached) {
+        // Re-insert so the entry counts as recently used
+        event.waitUntil(cache.put(event.request, cached.clone()));
+        return cached;
+    }
+    
+    const response = await fetch(event.request);
+    if (response.ok) {
+        event.waitUntil(store(runtime, event.request, response.clone()));
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event, runtime) {
+    const cache = await caches.open(runtime.name);
+    const cached = await cache.match(event.request);
+    const network = fetch(event.request).then(async (response) => {
+        if (cacheable(response)) {
+            await store(runtime, event.request, response.clone());
+        }
+        return response;
+    });
+    
+    if (cached) {
+        event.waitUntil(network.catch(() => undefined));
+        return cached;
+    }
+    return network;
+}
+
+async function networkFirst(event, runtime) {
+    try {
+        const response = await fetch(event.request);
+        // Redirected responses cannot answer a later navigation
+        if (response.ok && !response.redirected) {
+            event.waitUntil(store(runtime, event.request, response.clone()));
+        }
+        return response;
+    } catch (error) {
+        const cached = await caches.match(event.request, { cacheName: runtime.name });
+        if (cached) {
+            return cached;
+        }
+        const offline = await caches.match(PRECACHE.offline, { cacheName: PRECACHE_NAME });
+        return offline || Response.error();
+    }
+}
+
 // Background sync for form submissions
 self.addEventListener('sync', (event) => {
     if (event.tag === 'sync-forms') {
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    WeatherData, WeatherForecast, ClimateAlert,
+    WeatherData, CurrentWeather, WeatherForecast, ClimateAlert,
     UserWeatherSubscription, IrrigationAdvice
 )
 
@@ -12,6 +12,13 @@ class WeatherDataAdmin(admin.ModelAdmin):
     date_hierarchy = 'timestamp'
 
 
+@admin.register(CurrentWeather)
+class CurrentWeatherAdmin(admin.ModelAdmin):
+    list_display = ['county', 'sub_county', 'timestamp', 'updated_at']
+    search_fields = ['county', 'sub_county']
+    raw_id_fields = ['weather']
+
+
 @admin.register(WeatherForecast)
 class WeatherForecastAdmin(admin.ModelAdmin):
     list_display = ['county', 'forecast_date', 'temperature_min', 'temperature_max', 'precipitation_probability']
@@ -21,8 +28,9 @@ class WeatherForecastAdmin(admin.ModelAdmin):
 
 @admin.register(ClimateAlert)
 class ClimateAlertAdmin(admin.ModelAdmin):
-    list_display = ['alert_type', 'severity', 'title', 'issued_at', 'is_active']
+    list_display = ['alert_type', 'severity', 'title', 'issued_at', 'is_active', 'notified_at', 'recipients_notified']
     list_filter = ['alert_type', 'severity', 'is_active']
+    readonly_fields = ['notified_at', 'recipients_notified']
     date_hierarchy = 'issued_at'
 
 
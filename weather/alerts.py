@@ -0,0 +1,171 @@
+"""
+Fan-out of climate alerts to weather subscribers.
+
+Subscribers are resolved through ``SubscriptionAlertType``, one row per
+active subscription and alert type carrying the normalised county and the
+subscription's minimum severity as a rank, so an alert is matched with a
+single index range scan on (alert type, county, severity) instead of
+loading every subscription. Matches are streamed, de-duplicated per user
+and cut into per-channel batches that Celery tasks deliver (see
+weather/tasks.py); a national alert therefore never holds more than one
+batch per channel in memory besides the set of users already reached.
+
+An alert is claimed by setting ``notified_at`` before fan-out, so saving it
+again or running the periodic sweep never notifies subscribers twice.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .county_alerts import county_key
+from .models import ClimateAlert, SubscriptionAlertType
+
+SEVERITY_RANK = {code: rank for rank, (code, _) in enumerate(ClimateAlert.SEVERITY_LEVELS)}
+ALERT_TYPE_CODES = [code for code, _ in ClimateAlert.ALERT_TYPES]
+CHANNELS = ('sms', 'email', 'push')
+
+SMS_MAX_LENGTH = 306  # two SMS segments
+
+
+def subscription_rows(subscription):
+    """SubscriptionAlertType rows for a subscription; none when it is inactive"""
+    if not subscription.is_active:
+        return []
+    alert_types = [code for code in subscription.alert_types or [] if code in ALERT_TYPE_CODES]
+    return [
+        SubscriptionAlertType(
+            subscription=subscription,
+            alert_type=alert_type,
+            county_key=county_key(subscription.county),
+            severity_rank=SEVERITY_RANK.get(subscription.min_severity, 0),
+        )
+        for alert_type in alert_types or ALERT_TYPE_CODES
+    ]
+
+
+def sync_subscription(subscription):
+    """Rewrite the lookup rows of one subscription"""
+    with transaction.atomic():
+        SubscriptionAlertType.objects.filter(subscription=subscription).delete()
+        SubscriptionAlertType.objects.bulk_create(subscription_rows(subscription))
+
+
+def _wants_crops(subscription_crops, alert_crops):
+    if not alert_crops or not isinstance(subscription_crops, list) or not subscription_crops:
+        return True
+    return any(str(crop).strip().lower() in alert_crops for crop in subscription_crops)
+
+
+def matching_subscribers(alert, chunk_size=5000):
+    """Stream (user_id, phone, email, channels) for every subscriber of an alert"""
+    counties = [county_key(county) for county in alert.counties or []]
+    if not counties:
+        return
+    alert_crops = {str(crop).strip().lower() for crop in alert.crops_affected or []}
+
+    rows = SubscriptionAlertType.objects.filter(
+        alert_type=alert.alert_type,
+        county_key__in=counties,
+        severity_rank__lte=SEVERITY_RANK[alert.severity],
+    ).order_by().values_list(
+        'subscription__user_id',
+        'subscription__crops',
+        'subscription__sms_alerts',
+        'subscription__email_alerts',
+        'subscription__push_alerts',
+        'subscription__user__phone_number',
+        'subscription__user__email',
+        'subscription__user__sms_notifications',
+        'subscription__user__email_notifications',
+    )
+    for (
+        user_id, crops, sms, email, push, phone_number, address, sms_allowed, email_allowed
+    ) in rows.iterator(chunk_size=chunk_size):
+        if not _wants_crops(crops, alert_crops):
+            continue
+        channels = set()
+        if sms and sms_allowed and phone_number:
+            channels.add('sms')
+        if email and email_allowed and address:
+            channels.add('email')
+        if push:
+            channels.add('push')
+        if channels:
+            yield user_id, phone_number, address, channels
+
+
+def fan_out(alert, send, batch_sizes=None):
+    """Resolve an alert's subscribers and pass them to send(channel, recipients) in batches.
+
+    SMS batches hold phone numbers, email batches addresses and push batches
+    user ids. Returns recipient and batch counts per channel.
+    """
+    started = time.monotonic()
+    batch_sizes = batch_sizes or settings.ALERT_BATCH_SIZES
+    reached = {channel: set() for channel in CHANNELS}
+    batches = {channel: [] for channel in CHANNELS}
+    stats = {'subscribers': 0, 'recipients': {channel: 0 for channel in CHANNELS}, 'batches': 0}
+
+    def flush(channel):
+        if batches[channel]:
+            send(channel, batches[channel])
+            stats['batches'] += 1
+            batches[channel] = []
+
+    for user_id, phone_number, address, channels in matching_subscribers(alert):
+        stats['subscribers'] += 1
+        for channel in channels:
+            # Users subscribed in several affected counties are notified once
+            if user_id in reached[channel]:
+                continue
+            reached[channel].add(user_id)
+            recipient = {'sms': phone_number, 'email': address, 'push': user_id}[channel]
+            batches[channel].append(recipient)
+            stats['recipients'][channel] += 1
+            if len(batches[channel]) >= batch_sizes[channel]:
+                flush(channel)
+    for channel in CHANNELS:
+        flush(channel)
+
+    stats['seconds'] = time.monotonic() - started
+    return stats
+
+
+def claim_alert(alert_id, force=False):
+    """Mark an alert as notified; returns it, or None if it is not due"""
+    alerts = ClimateAlert.objects.filter(pk=alert_id, is_active=True, expires_at__gt=timezone.now())
+    if not force:
+        alerts = alerts.filter(notified_at__isnull=True)
+    if not alerts.update(notified_at=timezone.now()):
+        return None
+    return ClimateAlert.objects.get(pk=alert_id)
+
+
+def pending_alerts():
+    """Active, unexpired alerts whose subscribers have not been notified"""
+    return ClimateAlert.objects.filter(
+        is_active=True, notified_at__isnull=True, expires_at__gt=timezone.now()
+    )
+
+
+def sms_text(alert):
+    text = (
+        f"KILIMO GURU {alert.get_severity_display()} {alert.get_alert_type_display()}: "
+        f"{alert.title}. {alert.recommended_actions}"
+    )
+    return text if len(text) <= SMS_MAX_LENGTH else text[:SMS_MAX_LENGTH - 3].rstrip() + '...'
+
+
+def email_content(alert):
+    subject = f"{alert.get_alert_type_display()}: {alert.title}"
+    body = (
+        f"{alert.description}\n\n"
+        f"Affected counties: {', '.join(alert.counties)}\n"
+        f"Effective: {alert.effective_from:%d %b %Y %H:%M} to {alert.expires_at:%d %b %Y %H:%M}\n\n"
+        f"Recommended actions:\n{alert.recommended_actions}\n\n"
+        f"Source: {alert.source}"
+    )
+    return subject, body
@@ -5,3 +5,9 @@ class WeatherConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'weather'
     verbose_name = 'Weather & Climate'
+
+    def ready(self):
+        import weather.signals
+        from kilimo_guru.cache import catalog_cache
+        from .models import ClimateAlert
+        catalog_cache.register(ClimateAlert)
@@ -0,0 +1,64 @@
+"""
+Active climate alerts per county.
+
+``ClimateAlertCounty`` mirrors each alert's ``counties`` list as indexed
+rows, so "alerts for county X" is an index lookup rather than a scan of a
+JSON column. On top of it, the map of every county to its active alerts is
+kept in the catalog cache: saving or deleting an alert bumps its version,
+and the map is rebuilt once the earliest alert in it expires.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from kilimo_guru.cache import catalog_cache
+
+from .models import ClimateAlert, ClimateAlertCounty
+
+
+def county_key(county):
+    return (county or '').strip().lower()
+
+
+def sync_alert_counties(alert):
+    """Rewrite the county rows of one alert from its counties list"""
+    keys = {county_key(county) for county in alert.counties or [] if county_key(county)}
+    with transaction.atomic():
+        ClimateAlertCounty.objects.filter(alert=alert).exclude(county_key__in=keys).delete()
+        ClimateAlertCounty.objects.bulk_create(
+            [ClimateAlertCounty(alert=alert, county_key=key) for key in keys],
+            ignore_conflicts=True,
+        )
+
+
+def _load_alert_map():
+    now = timezone.now()
+    alerts = {}
+    counties = defaultdict(list)
+    rows = ClimateAlertCounty.objects.filter(
+        alert__is_active=True, alert__expires_at__gt=now
+    ).select_related('alert').order_by('-alert__issued_at', '-alert_id')
+    for row in rows:
+        alert = alerts.setdefault(row.alert_id, row.alert)
+        counties[row.county_key].append(alert)
+    return {
+        'expires_at': min((alert.expires_at for alert in alerts.values()), default=None),
+        'counties': dict(counties),
+    }
+
+
+def active_alert_map():
+    """{county_key: [active alerts, newest first]}"""
+    alert_map = catalog_cache.get_or_load('weather:active_alerts', _load_alert_map, [ClimateAlert])
+    if alert_map['expires_at'] is not None and alert_map['expires_at'] <= timezone.now():
+        # An alert in the map has expired since it was built
+        catalog_cache.invalidate(ClimateAlert)
+        alert_map = catalog_cache.get_or_load('weather:active_alerts', _load_alert_map, [ClimateAlert])
+    return alert_map['counties']
+
+
+def county_alerts(county):
+    """Active, unexpired alerts covering a county, newest first"""
+    return active_alert_map().get(county_key(county), [])
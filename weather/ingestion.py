@@ -0,0 +1,367 @@
+"""
+Bulk ingestion of weather observations and forecasts from provider payloads.
+
+Payloads are JSON or CSV files in a directory standing in for the provider
+API. A JSON file holds either a list of records or an object with
+``observations`` and/or ``forecasts`` lists; a CSV file holds one kind of
+record, forecasts being recognised by their ``forecast_date`` column.
+Observation records may be flat (model field names) or in the nested
+OpenWeatherMap current-weather shape.
+
+Valid records are written with batched upserts on the models' natural keys,
+so re-ingesting a payload is idempotent and no query is issued per row.
+"""
+
+import csv
+import json
+import shutil
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from functools import reduce
+from operator import or_
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+from .models import WeatherData, WeatherForecast
+from .snapshots import update_current_weather
+
+OBSERVATION_KEY = ['county', 'sub_county', 'timestamp']
+FORECAST_KEY = ['county', 'sub_county', 'forecast_date', 'forecast_time']
+
+OBSERVATION_FIELDS = [
+    'county', 'sub_county', 'latitude', 'longitude', 'temperature', 'feels_like',
+    'humidity', 'pressure', 'weather_condition', 'weather_description',
+    'weather_icon', 'wind_speed', 'wind_direction', 'visibility',
+    'cloud_coverage', 'rain_1h', 'rain_3h', 'timestamp',
+]
+FORECAST_FIELDS = [
+    'county', 'sub_county', 'latitude', 'longitude', 'forecast_date',
+    'forecast_time', 'temperature_min', 'temperature_max', 'humidity',
+    'weather_condition', 'weather_description', 'weather_icon',
+    'precipitation_probability', 'precipitation_amount', 'wind_speed',
+]
+
+# Plausible ranges; values outside them are rejected rather than stored
+RANGES = {
+    'latitude': (-90, 90),
+    'longitude': (-180, 180),
+    'temperature': (-60, 70),
+    'feels_like': (-60, 70),
+    'temperature_min': (-60, 70),
+    'temperature_max': (-60, 70),
+    'humidity': (0, 100),
+    'cloud_coverage': (0, 100),
+    'precipitation_probability': (0, 100),
+    'wind_direction': (0, 360),
+    'pressure': (0, 1100),
+    'visibility': (0, 100000),
+}
+
+# Number of invalid records whose errors are kept for reporting
+MAX_REPORTED_ERRORS = 20
+
+# Snapshot rows resolved per query after the observations are stored
+SNAPSHOT_LOOKUP_CHUNK = 100
+
+
+class PayloadError(ValueError):
+    """Raised when a provider record fails validation"""
+
+
+def _flatten_openweather(record):
+    """Map an OpenWeatherMap current-weather record onto WeatherData fields"""
+    main = record.get('main', {})
+    wind = record.get('wind', {})
+    rain = record.get('rain', {})
+    coord = record.get('coord', {})
+    conditions = (record.get('weather') or [{}])[0]
+
+    return {
+        'county': record.get('county') or record.get('name'),
+        'sub_county': record.get('sub_county'),
+        'latitude': coord.get('lat'),
+        'longitude': coord.get('lon'),
+        'temperature': main.get('temp'),
+        'feels_like': main.get('feels_like'),
+        'humidity': main.get('humidity'),
+        'pressure': main.get('pressure'),
+        'weather_condition': conditions.get('main'),
+        'weather_description': conditions.get('description'),
+        'weather_icon': conditions.get('icon'),
+        'wind_speed': wind.get('speed'),
+        'wind_direction': wind.get('deg'),
+        'visibility': record.get('visibility'),
+        'cloud_coverage': record.get('clouds', {}).get('all'),
+        'rain_1h': rain.get('1h'),
+        'rain_3h': rain.get('3h'),
+        'timestamp': record.get('dt'),
+    }
+
+
+def _parse_timestamp(value):
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        return datetime.fromtimestamp(int(value), tz=dt_timezone.utc)
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise ValueError('not a datetime')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _coerce(field, value):
+    """Convert a raw payload value to the Python type stored in field"""
+    if isinstance(value, str):
+        value = value.strip()
+
+    if value is None or value == '':
+        if field.name == 'sub_county':
+            # Stored as '' rather than NULL so the unique key can match on upsert
+            return ''
+        if field.null:
+            return None
+        if field.has_default():
+            return field.get_default()
+        raise PayloadError(f'{field.name} is required')
+
+    kind = field.get_internal_type()
+    try:
+        if kind == 'DecimalField':
+            value = Decimal(str(value)).quantize(Decimal(1).scaleb(-field.decimal_places))
+            if abs(value) >= Decimal(10) ** (field.max_digits - field.decimal_places):
+                raise PayloadError(f'{field.name} is out of range')
+        elif kind in ('PositiveIntegerField', 'IntegerField'):
+            value = int(Decimal(str(value)))
+            # A negative value would fail the column's CHECK and the whole batch with it
+            if kind == 'PositiveIntegerField' and value < 0:
+                raise PayloadError(f'{field.name} is negative')
+        elif kind == 'DateTimeField':
+            value = _parse_timestamp(value)
+        elif kind == 'DateField':
+            value = parse_date(str(value))
+        elif kind == 'TimeField':
+            value = parse_time(str(value))
+        else:
+            value = str(value)
+            if field.max_length and len(value) > field.max_length:
+                raise PayloadError(f'{field.name} is longer than {field.max_length} characters')
+    except PayloadError:
+        raise
+    except (InvalidOperation, ValueError, TypeError, OverflowError, OSError):
+        # OverflowError/OSError: timestamps or integers beyond what datetime and int allow
+        raise PayloadError(f'{field.name} has an invalid value {value!r}')
+
+    if value is None:
+        raise PayloadError(f'{field.name} has an invalid value')
+
+    if field.name in RANGES:
+        low, high = RANGES[field.name]
+        if not low <= value <= high:
+            raise PayloadError(f'{field.name} {value} is outside {low}..{high}')
+
+    return value
+
+
+def _clean(model, field_names, record):
+    values = {
+        name: _coerce(model._meta.get_field(name), record.get(name))
+        for name in field_names
+    }
+    if values.get('temperature_min', 0) > values.get('temperature_max', 0):
+        raise PayloadError('temperature_min is above temperature_max')
+    return model(**values)
+
+
+def _require_object(record):
+    # JSON payloads can hold anything: null, strings, numbers
+    if not isinstance(record, dict):
+        raise PayloadError(f'record is not an object: {record!r:.40}')
+
+
+def clean_observation(record):
+    """Validate a provider observation record into an unsaved WeatherData"""
+    _require_object(record)
+    if 'main' in record:
+        try:
+            record = _flatten_openweather(record)
+        except (AttributeError, IndexError, TypeError):
+            raise PayloadError('malformed OpenWeatherMap record')
+    return _clean(WeatherData, OBSERVATION_FIELDS, record)
+
+
+def clean_forecast(record):
+    """Validate a provider forecast record into an unsaved WeatherForecast"""
+    _require_object(record)
+    return _clean(WeatherForecast, FORECAST_FIELDS, record)
+
+
+def read_payload(path):
+    """Yield (kind, record) pairs from a JSON or CSV payload file"""
+    path = Path(path)
+
+    if path.suffix.lower() == '.csv':
+        with path.open(newline='', encoding='utf-8') as handle:
+            reader = csv.DictReader(handle)
+            kind = 'forecast' if 'forecast_date' in (reader.fieldnames or []) else 'observation'
+            for record in reader:
+                yield kind, record
+        return
+
+    with path.open(encoding='utf-8') as handle:
+        payload = json.load(handle)
+
+    if isinstance(payload, list):
+        payload = {'observations': payload}
+    if not isinstance(payload, dict):
+        raise ValueError('expected a JSON object or list')
+    for record in payload.get('observations', []):
+        yield 'observation', record
+    for record in payload.get('forecasts', []):
+        yield 'forecast', record
+
+
+class WeatherIngestion:
+    """Streams payload records into batched upserts and keeps statistics"""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.batches = {'observation': {}, 'forecast': {}}
+        self.latest = {}
+        self.stats = {
+            'files': 0,
+            'observations': 0,
+            'forecasts': 0,
+            'invalid': 0,
+            'queries': 0,
+            'errors': [],
+        }
+
+    def add(self, kind, record, source=''):
+        try:
+            if kind == 'forecast':
+                instance = clean_forecast(record)
+                key = tuple(getattr(instance, name) for name in FORECAST_KEY)
+            else:
+                instance = clean_observation(record)
+                key = tuple(getattr(instance, name) for name in OBSERVATION_KEY)
+                self._track_latest(instance)
+        except PayloadError as exc:
+            self.stats['invalid'] += 1
+            if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+                self.stats['errors'].append(f'{source}: {exc}')
+            return
+
+        # Duplicate keys within one statement would make the upsert fail
+        batch = self.batches[kind]
+        batch[key] = instance
+        if len(batch) >= self.batch_size:
+            self.flush(kind)
+
+    def _track_latest(self, observation):
+        key = (observation.county, observation.sub_county)
+        if key not in self.latest or observation.timestamp > self.latest[key]:
+            self.latest[key] = observation.timestamp
+
+    def flush(self, kind):
+        batch = self.batches[kind]
+        if not batch:
+            return
+
+        if kind == 'forecast':
+            model, unique_fields, fields = WeatherForecast, FORECAST_KEY, FORECAST_FIELDS
+            counter = 'forecasts'
+        else:
+            model, unique_fields, fields = WeatherData, OBSERVATION_KEY, OBSERVATION_FIELDS
+            counter = 'observations'
+
+        model.objects.bulk_create(
+            list(batch.values()),
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=[name for name in fields if name not in unique_fields],
+        )
+        self.stats[counter] += len(batch)
+        self.stats['queries'] += 1
+        self.batches[kind] = {}
+
+    def update_snapshots(self):
+        """Point the current weather snapshots at the newest ingested observations"""
+        keys = list(self.latest.items())
+        observations = []
+        for start in range(0, len(keys), SNAPSHOT_LOOKUP_CHUNK):
+            chunk = keys[start:start + SNAPSHOT_LOOKUP_CHUNK]
+            lookup = reduce(or_, (
+                Q(county=county, sub_county=sub_county, timestamp=timestamp)
+                for (county, sub_county), timestamp in chunk
+            ))
+            observations.extend(WeatherData.objects.filter(lookup).only(
+                'id', 'county', 'sub_county', 'timestamp'
+            ))
+            self.stats['queries'] += 1
+
+        update_current_weather(observations)
+        self.stats['queries'] += 2
+
+    def ingest_file(self, path):
+        source = Path(path).name
+        try:
+            for kind, record in read_payload(path):
+                self.add(kind, record, source=source)
+        except (ValueError, csv.Error) as exc:
+            # Unreadable payload; records added before the error are kept
+            self.stats['invalid'] += 1
+            self.stats['errors'].append(f'{source}: unreadable payload ({exc})')
+        self.stats['files'] += 1
+
+    def finish(self):
+        self.flush('observation')
+        self.flush('forecast')
+        if self.latest:
+            self.update_snapshots()
+
+
+def payload_files(directory):
+    """Payload files in directory, oldest name first"""
+    directory = Path(directory)
+    return sorted(
+        path for path in directory.iterdir()
+        if path.is_file() and path.suffix.lower() in ('.json', '.csv')
+    )
+
+
+def ingest_weather(directory, batch_size=1000, archive=False):
+    """Ingest every payload file in directory.
+
+    Returns throughput statistics; with archive, ingested files are moved to
+    a ``processed`` subdirectory once their rows are committed.
+    """
+    started = time.monotonic()
+    ingestion = WeatherIngestion(batch_size=batch_size)
+    files = payload_files(directory)
+
+    with transaction.atomic():
+        for path in files:
+            ingestion.ingest_file(path)
+        ingestion.finish()
+
+    if archive and files:
+        processed = Path(directory) / 'processed'
+        processed.mkdir(exist_ok=True)
+        for path in files:
+            shutil.move(str(path), str(processed / path.name))
+
+    stats = ingestion.stats
+    rows = stats['observations'] + stats['forecasts']
+    seconds = time.monotonic() - started
+    stats.update({
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0,
+    })
+
+    return stats
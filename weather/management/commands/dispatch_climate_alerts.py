@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from weather.alerts import fan_out, pending_alerts
+from weather.models import ClimateAlert
+from weather.tasks import dispatch_alert
+
+
+class Command(BaseCommand):
+    help = 'Queue subscriber notifications for climate alerts (pending alerts by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('alert_ids', nargs='*', type=int, help='Alerts to dispatch')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Notify subscribers again even if the alert was already sent'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Resolve subscribers and batches without queueing anything'
+        )
+
+    def handle(self, *args, **options):
+        alert_ids = options['alert_ids'] or list(pending_alerts().values_list('pk', flat=True))
+        if not alert_ids:
+            self.stdout.write('No pending alerts')
+            return
+
+        for alert_id in alert_ids:
+            if options['dry_run']:
+                alert = ClimateAlert.objects.filter(pk=alert_id).first()
+                if alert is None:
+                    raise CommandError(f'Alert {alert_id} does not exist')
+                stats = fan_out(alert, lambda channel, recipients: None)
+            else:
+                stats = dispatch_alert(alert_id, force=options['force'])
+                if stats is None:
+                    self.stdout.write(self.style.WARNING(
+                        f'Alert {alert_id} skipped: inactive, expired or already sent (use --force)'
+                    ))
+                    continue
+            recipients = ', '.join(f'{count} {channel}' for channel, count in stats['recipients'].items())
+            self.stdout.write(self.style.SUCCESS(
+                f"Alert {alert_id}: {stats['subscribers']} subscriptions matched, {recipients} "
+                f"in {stats['batches']} batches ({stats['seconds']:.2f}s)"
+            ))
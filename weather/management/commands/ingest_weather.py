@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from weather.ingestion import ingest_weather
+
+
+class Command(BaseCommand):
+    help = 'Ingest weather observations and forecasts from JSON/CSV provider payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory', nargs='?',
+            help='Directory holding payload files (defaults to WEATHER_INGEST_DIR)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows written per bulk upsert'
+        )
+        parser.add_argument(
+            '--archive', action='store_true',
+            help='Move ingested files to a processed/ subdirectory'
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory'] or settings.WEATHER_INGEST_DIR)
+        if not directory.is_dir():
+            raise CommandError(f'{directory} is not a directory')
+
+        stats = ingest_weather(
+            directory,
+            batch_size=options['batch_size'],
+            archive=options['archive'],
+        )
+
+        for error in stats['errors']:
+            self.stdout.write(self.style.WARNING(f'Rejected {error}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {stats['observations']} observations and "
+            f"{stats['forecasts']} forecasts from {stats['files']} files "
+            f"({stats['invalid']} rejected) in {stats['seconds']:.1f}s "
+            f"({stats['rows_per_second']:.0f} rows/s, {stats['queries']} write queries)"
+        ))
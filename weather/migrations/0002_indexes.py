@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='climatealert',
+            index=models.Index(fields=['is_active', 'expires_at'], name='alert_active_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(fields=['county', '-timestamp'], name='weather_county_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherforecast',
+            index=models.Index(fields=['county', 'forecast_date', 'forecast_time'], name='forecast_county_date_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_current_weather(apps, schema_editor):
+    WeatherData = apps.get_model('weather', 'WeatherData')
+    CurrentWeather = apps.get_model('weather', 'CurrentWeather')
+
+    latest = {}
+    observations = WeatherData.objects.order_by('-timestamp').values(
+        'id', 'county', 'sub_county', 'timestamp'
+    )
+    for observation in observations.iterator(chunk_size=2000):
+        county_key = observation['county'].strip().lower()
+        sub_county_key = (observation['sub_county'] or '').strip().lower()
+        keys = [(county_key, '')]
+        if sub_county_key:
+            keys.append((county_key, sub_county_key))
+        for key in keys:
+            latest.setdefault(key, observation)
+
+    CurrentWeather.objects.bulk_create([
+        CurrentWeather(
+            county_key=county_key,
+            sub_county_key=sub_county_key,
+            county=observation['county'],
+            sub_county=observation['sub_county'] if sub_county_key else None,
+            weather_id=observation['id'],
+            timestamp=observation['timestamp'],
+        )
+        for (county_key, sub_county_key), observation in latest.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrentWeather',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('county_key', models.CharField(max_length=50)),
+                ('sub_county_key', models.CharField(blank=True, default='', max_length=50)),
+                ('county', models.CharField(max_length=50)),
+                ('sub_county', models.CharField(blank=True, max_length=50, null=True)),
+                ('timestamp', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('weather', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='weather.weatherdata')),
+            ],
+            options={
+                'verbose_name': 'Current Weather',
+                'verbose_name_plural': 'Current Weather',
+                'ordering': ['county', 'sub_county_key'],
+                'unique_together': {('county_key', 'sub_county_key')},
+            },
+        ),
+        migrations.RunPython(backfill_current_weather, migrations.RunPython.noop),
+    ]
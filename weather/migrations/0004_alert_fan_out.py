@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F
+
+SEVERITY_RANK = {'low': 0, 'moderate': 1, 'high': 2, 'severe': 3, 'extreme': 4}
+ALERT_TYPES = [
+    'drought', 'flood', 'heavy_rain', 'frost', 'heatwave', 'strong_wind',
+    'pest_outbreak', 'disease_outbreak', 'planting', 'harvest',
+]
+
+
+def backfill_alert_lookup(apps, schema_editor):
+    UserWeatherSubscription = apps.get_model('weather', 'UserWeatherSubscription')
+    SubscriptionAlertType = apps.get_model('weather', 'SubscriptionAlertType')
+    ClimateAlert = apps.get_model('weather', 'ClimateAlert')
+
+    # Alerts issued before fan-out existed are not sent retroactively
+    ClimateAlert.objects.update(notified_at=F('issued_at'))
+
+    rows = []
+    subscriptions = UserWeatherSubscription.objects.filter(is_active=True).values_list(
+        'id', 'county', 'alert_types', 'min_severity'
+    )
+    for subscription_id, county, alert_types, min_severity in subscriptions.iterator(chunk_size=2000):
+        types = [code for code in alert_types or [] if code in ALERT_TYPES] or ALERT_TYPES
+        rows.extend(
+            SubscriptionAlertType(
+                subscription_id=subscription_id,
+                alert_type=alert_type,
+                county_key=(county or '').strip().lower(),
+                severity_rank=SEVERITY_RANK.get(min_severity, 0),
+            )
+            for alert_type in types
+        )
+        if len(rows) >= 5000:
+            SubscriptionAlertType.objects.bulk_create(rows)
+            rows = []
+    SubscriptionAlertType.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0003_current_weather'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='climatealert',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='climatealert',
+            name='recipients_notified',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='SubscriptionAlertType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alert_type', models.CharField(choices=[('drought', 'Drought Warning'), ('flood', 'Flood Warning'), ('heavy_rain', 'Heavy Rain Warning'), ('frost', 'Frost Warning'), ('heatwave', 'Heatwave Warning'), ('strong_wind', 'Strong Wind Warning'), ('pest_outbreak', 'Pest Outbreak Alert'), ('disease_outbreak', 'Disease Outbreak Alert'), ('planting', 'Planting Advisory'), ('harvest', 'Harvest Advisory')], max_length=20)),
+                ('county_key', models.CharField(max_length=50)),
+                ('severity_rank', models.PositiveSmallIntegerField()),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_type_rows', to='weather.userweathersubscription')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['alert_type', 'county_key', 'severity_rank'], name='subscription_alert_lookup_idx')],
+                'unique_together': {('subscription', 'alert_type')},
+            },
+        ),
+        migrations.RunPython(backfill_alert_lookup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_alert_counties(apps, schema_editor):
+    ClimateAlert = apps.get_model('weather', 'ClimateAlert')
+    ClimateAlertCounty = apps.get_model('weather', 'ClimateAlertCounty')
+
+    rows = []
+    for alert_id, counties in ClimateAlert.objects.values_list('id', 'counties').iterator(chunk_size=2000):
+        keys = {(county or '').strip().lower() for county in counties or []}
+        rows.extend(ClimateAlertCounty(alert_id=alert_id, county_key=key) for key in keys if key)
+    ClimateAlertCounty.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0004_alert_fan_out'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClimateAlertCounty',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('county_key', models.CharField(max_length=50)),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='county_rows', to='weather.climatealert')),
+            ],
+            options={
+                'unique_together': {('county_key', 'alert')},
+            },
+        ),
+        migrations.RunPython(backfill_alert_counties, migrations.RunPython.noop),
+    ]
@@ -49,11 +49,48 @@ class WeatherData(models.Model):
         verbose_name_plural = 'Weather Data'
         ordering = ['-timestamp']
         unique_together = ['county', 'sub_county', 'timestamp']
+        indexes = [
+            models.Index(fields=['county', '-timestamp'], name='weather_county_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.county} - {self.temperature}°C - {self.timestamp}"
 
 
+class CurrentWeather(models.Model):
+    """Latest weather observation per county and sub-county.
+
+    One row per (county, sub-county) points at the newest WeatherData
+    observation; the county-wide row has an empty sub-county key and tracks
+    the newest observation anywhere in the county. Keys are lower-cased so
+    lookups are case-insensitive unique-index hits.
+    """
+    
+    county_key = models.CharField(max_length=50)
+    sub_county_key = models.CharField(max_length=50, blank=True, default='')
+    
+    county = models.CharField(max_length=50)
+    sub_county = models.CharField(max_length=50, blank=True, null=True)
+    
+    weather = models.ForeignKey(
+        WeatherData, on_delete=models.CASCADE, related_name='+'
+    )
+    timestamp = models.DateTimeField()
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Current Weather'
+        verbose_name_plural = 'Current Weather'
+        ordering = ['county', 'sub_county_key']
+        unique_together = ['county_key', 'sub_county_key']
+    
+    def __str__(self):
+        if self.sub_county:
+            return f"{self.county} / {self.sub_county} - {self.timestamp}"
+        return f"{self.county} - {self.timestamp}"
+
+
 class WeatherForecast(models.Model):
     """Weather forecasts"""
     
@@ -92,6 +129,12 @@ class WeatherForecast(models.Model):
         verbose_name_plural = 'Weather Forecasts'
         ordering = ['forecast_date', 'forecast_time']
         unique_together = ['county', 'sub_county', 'forecast_date', 'forecast_time']
+        indexes = [
+            models.Index(
+                fields=['county', 'forecast_date', 'forecast_time'],
+                name='forecast_county_date_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.county} - {self.forecast_date} - {self.weather_condition}"
@@ -147,15 +190,35 @@ class ClimateAlert(models.Model):
     # Status
     is_active = models.BooleanField(default=True)
     
+    # Subscriber notification (see weather/alerts.py)
+    notified_at = models.DateTimeField(null=True, blank=True, editable=False)
+    recipients_notified = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         verbose_name = 'Climate Alert'
         verbose_name_plural = 'Climate Alerts'
         ordering = ['-issued_at']
+        indexes = [
+            models.Index(fields=['is_active', 'expires_at'], name='alert_active_expires_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_alert_type_display()} - {self.title}"
 
 
+class ClimateAlertCounty(models.Model):
+    """Indexed county membership of an alert, mirroring ClimateAlert.counties"""
+    
+    alert = models.ForeignKey(ClimateAlert, on_delete=models.CASCADE, related_name='county_rows')
+    county_key = models.CharField(max_length=50)
+    
+    class Meta:
+        unique_together = ['county_key', 'alert']
+    
+    def __str__(self):
+        return f"{self.alert_id} - {self.county_key}"
+
+
 class UserWeatherSubscription(models.Model):
     """User weather alert subscriptions"""
     
@@ -195,6 +258,34 @@ class UserWeatherSubscription(models.Model):
         return f"{self.user.username} - {self.county}"
 
 
+class SubscriptionAlertType(models.Model):
+    """Indexed lookup of the alerts an active subscription receives.
+
+    One row per subscription and alert type, kept in step with the
+    subscription by weather/signals.py; an empty alert_types list on the
+    subscription means every type.
+    """
+    
+    subscription = models.ForeignKey(
+        UserWeatherSubscription, on_delete=models.CASCADE, related_name='alert_type_rows'
+    )
+    alert_type = models.CharField(max_length=20, choices=ClimateAlert.ALERT_TYPES)
+    county_key = models.CharField(max_length=50)
+    severity_rank = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        unique_together = ['subscription', 'alert_type']
+        indexes = [
+            models.Index(
+                fields=['alert_type', 'county_key', 'severity_rank'],
+                name='subscription_alert_lookup_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.subscription} - {self.alert_type}"
+
+
 class IrrigationAdvice(models.Model):
     """Irrigation advice based on weather"""
     
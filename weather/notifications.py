@@ -0,0 +1,77 @@
+"""
+Delivery of alert messages over SMS, email and push.
+
+Each sender takes a whole batch of recipients and makes as few gateway
+calls as it can: one bulk SMS request, one SMTP connection and one push
+gateway request per batch. Gateway failures raise so the calling Celery
+task can retry the batch.
+"""
+
+import logging
+
+import requests
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_TIMEOUT = 30
+
+
+class DeliveryError(Exception):
+    """Raised when a gateway rejects a batch"""
+
+
+def send_sms_batch(phone_numbers, message):
+    """Send one message to many phone numbers through Africa's Talking"""
+    if not settings.SMS_API_KEY:
+        logger.info('SMS gateway not configured; skipped %s messages', len(phone_numbers))
+        return 0
+
+    data = {
+        'username': settings.SMS_USERNAME,
+        'to': ','.join(phone_numbers),
+        'message': message,
+    }
+    if settings.SMS_SENDER_ID:
+        data['from'] = settings.SMS_SENDER_ID
+    response = requests.post(
+        settings.SMS_API_URL,
+        data=data,
+        headers={'apiKey': settings.SMS_API_KEY, 'Accept': 'application/json'},
+        timeout=GATEWAY_TIMEOUT,
+    )
+    if response.status_code >= 500:
+        raise DeliveryError(f'SMS gateway returned {response.status_code}')
+    response.raise_for_status()
+
+    recipients = response.json().get('SMSMessageData', {}).get('Recipients', [])
+    sent = sum(1 for recipient in recipients if recipient.get('statusCode') in (100, 101, 102))
+    if sent < len(phone_numbers):
+        logger.warning('SMS gateway accepted %s of %s messages', sent, len(phone_numbers))
+    return sent
+
+
+def send_email_batch(addresses, subject, body):
+    """Send one message to many addresses over a single SMTP connection"""
+    messages = [EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [address]) for address in addresses]
+    with get_connection() as connection:
+        return connection.send_messages(messages) or 0
+
+
+def send_push_batch(tokens, title, body, data=None):
+    """Send one notification to many device tokens through the push gateway"""
+    if not settings.PUSH_GATEWAY_URL:
+        logger.info('Push gateway not configured; skipped %s notifications', len(tokens))
+        return 0
+
+    response = requests.post(
+        settings.PUSH_GATEWAY_URL,
+        json={'tokens': tokens, 'title': title, 'body': body, 'data': data or {}},
+        headers={'Authorization': f'Bearer {settings.PUSH_GATEWAY_KEY}'},
+        timeout=GATEWAY_TIMEOUT,
+    )
+    if response.status_code >= 500:
+        raise DeliveryError(f'Push gateway returned {response.status_code}')
+    response.raise_for_status()
+    return len(tokens)
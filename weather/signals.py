@@ -0,0 +1,56 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from kombu.exceptions import OperationalError
+
+from .alerts import sync_subscription
+from .county_alerts import sync_alert_counties
+from .models import ClimateAlert, UserWeatherSubscription, WeatherData
+from .snapshots import rebuild_current_weather_key, update_current_weather
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=WeatherData)
+def update_current_weather_on_save(sender, instance, **kwargs):
+    """Keep the current weather snapshot in step with new observations"""
+    update_current_weather([instance])
+
+
+@receiver(post_delete, sender=WeatherData)
+def update_current_weather_on_delete(sender, instance, **kwargs):
+    """Fall back to the previous observation when the current one is removed"""
+    rebuild_current_weather_key(instance.county)
+    if instance.sub_county:
+        rebuild_current_weather_key(instance.county, instance.sub_county)
+
+
+@receiver(post_save, sender=UserWeatherSubscription)
+def sync_subscription_alert_types(sender, instance, **kwargs):
+    """Keep the indexed alert lookup rows in step with the subscription"""
+    sync_subscription(instance)
+
+
+def _queue_alert(alert_id):
+    from .tasks import dispatch_climate_alert_task
+
+    try:
+        dispatch_climate_alert_task.delay(alert_id)
+    except OperationalError:
+        logger.exception('Could not queue alert %s; the pending alert sweep will send it', alert_id)
+
+
+@receiver(post_save, sender=ClimateAlert)
+def sync_climate_alert_counties(sender, instance, update_fields=None, **kwargs):
+    """Keep the indexed county rows in step with the alert's counties"""
+    if update_fields is None or 'counties' in update_fields:
+        sync_alert_counties(instance)
+
+
+@receiver(post_save, sender=ClimateAlert)
+def dispatch_new_alert(sender, instance, **kwargs):
+    """Notify subscribers once an alert is issued or activated"""
+    if instance.is_active and instance.notified_at is None:
+        transaction.on_commit(lambda: _queue_alert(instance.pk))
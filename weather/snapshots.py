@@ -0,0 +1,117 @@
+"""
+Maintenance of the CurrentWeather snapshot table.
+"""
+
+from django.db.models import Count, Max
+
+from kilimo_guru.spatial import GridIndex, spatial_cache
+
+from .models import CurrentWeather, WeatherData
+
+SNAPSHOT_UPDATE_FIELDS = ['county', 'sub_county', 'weather', 'timestamp', 'updated_at']
+
+# Stations are sparse, so coarse cells keep nearest-station searches short
+STATION_CELL_SIZE = 0.5
+
+
+def snapshot_key(county, sub_county=None):
+    """Normalized (county_key, sub_county_key) for a location"""
+    return ((county or '').strip().lower(), (sub_county or '').strip().lower())
+
+
+def _snapshot_keys(observation):
+    county_key, sub_county_key = snapshot_key(observation.county, observation.sub_county)
+    keys = [(county_key, '')]
+    if sub_county_key:
+        keys.append((county_key, sub_county_key))
+    return keys
+
+
+def update_current_weather(observations):
+    """Fold stored WeatherData observations into the snapshot table.
+
+    Only the newest observation per key is written, and snapshots already
+    pointing at something newer are left alone, so a batch of readings costs
+    one read and one bulk upsert however many rows it holds.
+    """
+    latest = {}
+    for observation in observations:
+        for key in _snapshot_keys(observation):
+            if key not in latest or observation.timestamp > latest[key].timestamp:
+                latest[key] = observation
+
+    if not latest:
+        return 0
+
+    stored = CurrentWeather.objects.filter(
+        county_key__in={county_key for county_key, _ in latest}
+    ).values_list('county_key', 'sub_county_key', 'timestamp')
+    current = {
+        (county_key, sub_county_key): timestamp
+        for county_key, sub_county_key, timestamp in stored
+    }
+
+    snapshots = [
+        CurrentWeather(
+            county_key=county_key,
+            sub_county_key=sub_county_key,
+            county=observation.county,
+            sub_county=observation.sub_county if sub_county_key else None,
+            weather_id=observation.pk,
+            timestamp=observation.timestamp,
+        )
+        for (county_key, sub_county_key), observation in latest.items()
+        if (county_key, sub_county_key) not in current
+        or current[(county_key, sub_county_key)] <= observation.timestamp
+    ]
+
+    CurrentWeather.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['county_key', 'sub_county_key'],
+        update_fields=SNAPSHOT_UPDATE_FIELDS,
+    )
+    return len(snapshots)
+
+
+def rebuild_current_weather_key(county, sub_county=None):
+    """Recompute one snapshot from the newest remaining observation"""
+    county_key, sub_county_key = snapshot_key(county, sub_county)
+    observations = WeatherData.objects.filter(county__iexact=county)
+    if sub_county_key:
+        observations = observations.filter(sub_county__iexact=sub_county)
+
+    observation = observations.order_by('-timestamp').first()
+
+    CurrentWeather.objects.filter(
+        county_key=county_key, sub_county_key=sub_county_key
+    ).delete()
+    if observation is not None:
+        update_current_weather([observation])
+
+
+def get_current_weather(county, sub_county=None):
+    """Latest WeatherData for a county (or sub-county), or None"""
+    county_key, sub_county_key = snapshot_key(county, sub_county)
+    snapshot = CurrentWeather.objects.select_related('weather').filter(
+        county_key=county_key, sub_county_key=sub_county_key
+    ).first()
+    return snapshot.weather if snapshot else None
+
+
+def _load_stations():
+    points = CurrentWeather.objects.values_list('pk', 'weather__latitude', 'weather__longitude')
+    return GridIndex.from_points(points, cell_size=STATION_CELL_SIZE)
+
+
+def nearest_current_weather(latitude, longitude, max_km=None):
+    """Latest WeatherData of the station nearest a point (e.g. a farm), or None"""
+    fingerprint = CurrentWeather.objects.aggregate(count=Count('pk'), changed=Max('updated_at'))
+    stations = spatial_cache.get(
+        'weather-stations', tuple(fingerprint.values()), _load_stations
+    )
+    found = stations.nearest(latitude, longitude, max_km=max_km)
+    if not found:
+        return None
+    snapshot = CurrentWeather.objects.select_related('weather').filter(pk=found[0][1]).first()
+    return snapshot.weather if snapshot else None
@@ -0,0 +1,118 @@
+import logging
+from pathlib import Path
+from smtplib import SMTPException
+
+import requests
+from celery import shared_task
+from django.conf import settings
+
+from accounts.models import UserDevice
+
+from .alerts import claim_alert, email_content, fan_out, pending_alerts, sms_text
+from .ingestion import ingest_weather
+from .models import ClimateAlert
+from .notifications import DeliveryError, send_email_batch, send_push_batch, send_sms_batch
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def ingest_weather_task(batch_size=1000):
+    """Hourly ingestion of provider payloads dropped in WEATHER_INGEST_DIR"""
+    directory = Path(settings.WEATHER_INGEST_DIR)
+    if not directory.is_dir():
+        logger.warning('Weather ingest directory %s does not exist', directory)
+        return None
+
+    stats = ingest_weather(directory, batch_size=batch_size, archive=True)
+    for error in stats['errors']:
+        logger.warning('Rejected weather payload %s', error)
+    logger.info(
+        'Ingested %(observations)s observations and %(forecasts)s forecasts '
+        'from %(files)s files (%(invalid)s rejected) in %(seconds).1fs '
+        '(%(rows_per_second).0f rows/s)', stats
+    )
+    return stats
+
+
+DELIVERY_RETRY = {
+    'autoretry_for': (requests.RequestException, SMTPException, DeliveryError),
+    'retry_backoff': 30,
+    'retry_backoff_max': 15 * 60,
+    'retry_jitter': True,
+    'max_retries': 8,
+}
+
+
+def _deliverable(alert_id):
+    """The alert if it should still be delivered; cancelled alerts stop their batches"""
+    alert = ClimateAlert.objects.filter(pk=alert_id, is_active=True).first()
+    if alert is None:
+        logger.info('Alert %s was withdrawn; dropping its queued notifications', alert_id)
+    return alert
+
+
+@shared_task(rate_limit=settings.ALERT_RATE_LIMITS['sms'], **DELIVERY_RETRY)
+def send_alert_sms_task(alert_id, phone_numbers):
+    alert = _deliverable(alert_id)
+    return alert and send_sms_batch(phone_numbers, sms_text(alert))
+
+
+@shared_task(rate_limit=settings.ALERT_RATE_LIMITS['email'], **DELIVERY_RETRY)
+def send_alert_email_task(alert_id, addresses):
+    alert = _deliverable(alert_id)
+    return alert and send_email_batch(addresses, *email_content(alert))
+
+
+@shared_task(rate_limit=settings.ALERT_RATE_LIMITS['push'], **DELIVERY_RETRY)
+def send_alert_push_task(alert_id, user_ids):
+    alert = _deliverable(alert_id)
+    if alert is None:
+        return 0
+    tokens = list(UserDevice.objects.filter(
+        user_id__in=user_ids, is_active=True, fcm_token__isnull=False
+    ).exclude(fcm_token='').values_list('fcm_token', flat=True))
+    if not tokens:
+        return 0
+    return send_push_batch(
+        tokens, alert.get_alert_type_display(), alert.title,
+        {'alert_id': alert.pk, 'severity': alert.severity},
+    )
+
+
+DELIVERY_TASKS = {
+    'sms': send_alert_sms_task,
+    'email': send_alert_email_task,
+    'push': send_alert_push_task,
+}
+
+
+def dispatch_alert(alert_id, force=False):
+    """Claim an alert and queue its notification batches; None if it is not due"""
+    alert = claim_alert(alert_id, force=force)
+    if alert is None:
+        return None
+    stats = fan_out(alert, lambda channel, recipients: DELIVERY_TASKS[channel].delay(alert.pk, recipients))
+    ClimateAlert.objects.filter(pk=alert.pk).update(
+        recipients_notified=sum(stats['recipients'].values())
+    )
+    logger.info(
+        'Alert %s: %s subscribers, %s notifications queued in %s batches in %.2fs',
+        alert.pk, stats['subscribers'], stats['recipients'], stats['batches'], stats['seconds']
+    )
+    return stats
+
+
+@shared_task
+def dispatch_climate_alert_task(alert_id):
+    """Notify the subscribers of a newly issued alert"""
+    return dispatch_alert(alert_id)
+
+
+@shared_task
+def dispatch_pending_alerts_task():
+    """Sweep for active alerts that were never fanned out, e.g. while the broker was down"""
+    return {
+        alert_id: dispatch_alert(alert_id)
+        for alert_id in pending_alerts().values_list('pk', flat=True)
+    }
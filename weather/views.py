@@ -5,10 +5,11 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
-from django.db import models  # <- added for aggregation
 
-from .models import WeatherData, WeatherForecast, ClimateAlert, UserWeatherSubscription
+from .models import CurrentWeather, WeatherForecast, ClimateAlert, UserWeatherSubscription
 from .forms import WeatherSubscriptionForm
+from .county_alerts import county_alerts
+from .snapshots import get_current_weather
 
 
 class WeatherDashboardView(TemplateView):
@@ -18,19 +19,14 @@ class WeatherDashboardView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get major counties weather (SQLite-compatible)
+        # Get major counties weather from the snapshot table
         major_counties = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret']
         
-        latest_records = (
-            WeatherData.objects
-            .filter(county__in=major_counties)
-            .values('county')
-            .annotate(latest_timestamp=models.Max('timestamp'))
-        )
-        
-        context['major_weather'] = WeatherData.objects.filter(
-            timestamp__in=[item['latest_timestamp'] for item in latest_records]
-        ).order_by('-timestamp')[:5]
+        snapshots = CurrentWeather.objects.filter(
+            county_key__in=[county.lower() for county in major_counties],
+            sub_county_key=''
+        ).select_related('weather').order_by('-timestamp')[:5]
+        context['major_weather'] = [snapshot.weather for snapshot in snapshots]
         
         # Active alerts
         context['active_alerts'] = ClimateAlert.objects.filter(
@@ -39,9 +35,9 @@ class WeatherDashboardView(TemplateView):
         )[:5]
         
         # All counties for search
-        context['counties'] = WeatherData.objects.values_list(
-            'county', flat=True
-        ).distinct()
+        context['counties'] = CurrentWeather.objects.filter(
+            sub_county_key=''
+        ).values_list('county', flat=True)
         
         return context
 
@@ -52,12 +48,7 @@ class CountyWeatherView(View):
     
     def get(self, request, county):
         # Get current weather
-        try:
-            current = WeatherData.objects.filter(
-                county__iexact=county
-            ).latest('timestamp')
-        except WeatherData.DoesNotExist:
-            current = None
+        current = get_current_weather(county)
         
         # Get forecast
         forecast = WeatherForecast.objects.filter(
@@ -66,11 +57,7 @@ class CountyWeatherView(View):
         )[:7]
         
         # Get alerts
-        alerts = ClimateAlert.objects.filter(
-            counties__contains=[county],
-            is_active=True,
-            expires_at__gt=timezone.now()
-        )
+        alerts = county_alerts(county)
         
         context = {
             'county': county,
@@ -170,8 +157,8 @@ class IrrigationAdviceView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        from crops.models import Crop
-        context['crops'] = Crop.objects.filter(is_active=True)
+        from crops.catalog import active_crops
+        context['crops'] = active_crops()
         return context
 
 
@@ -184,20 +171,16 @@ class CurrentWeatherAPIView(View):
         if not county:
             return JsonResponse({'error': 'County parameter required'}, status=400)
         
-        try:
-            weather = WeatherData.objects.filter(
-                county__iexact=county
-            ).latest('timestamp')
-            
-            return JsonResponse({
-                'county': weather.county,
-                'temperature': float(weather.temperature),
-                'humidity': weather.humidity,
-                'condition': weather.weather_condition,
-                'description': weather.weather_description,
-                'wind_speed': float(weather.wind_speed) if weather.wind_speed else None,
-                'timestamp': weather.timestamp.isoformat(),
-            })
-            
-        except WeatherData.DoesNotExist:
-            return JsonResponse({'error': 'No weather data available'}, status=404)
\ No newline at end of file
+        weather = get_current_weather(county)
+        if weather is None:
+            return JsonResponse({'error': 'No weather data available'}, status=404)
+        
+        return JsonResponse({
+            'county': weather.county,
+            'temperature': float(weather.temperature),
+            'humidity': weather.humidity,
+            'condition': weather.weather_condition,
+            'description': weather.weather_description,
+            'wind_speed': float(weather.wind_speed) if weather.wind_speed else None,
+            'timestamp': weather.timestamp.isoformat(),
+        })
\ No newline at end of file